@@ -0,0 +1,249 @@
+"""Content-adaptive frame stride for ShopliftingDetector.
+
+Pose inference runs on keyframes only. The gap k to the next keyframe shrinks when keypoints
+moved a lot since the previous keyframe and grows while the scene is calm. Frames in between
+get keypoints and boxes linearly interpolated between the two surrounding keyframes (people
+are matched by nearest box centre) and carry the earlier keyframe's classification forward.
+Skipped frames are held back until the next keyframe, so output is delayed by at most
+max_stride frames but every frame is still emitted, in order, with its real index.
+
+    python adaptive.py vid.mp4 [--min-stride 1] [--max-stride 8] [--drift]
+"""
+import argparse
+
+import cv2
+import numpy as np
+
+from detector import FRAME_SIZE
+
+
+class AdaptiveStride:
+    def __init__(self, min_stride=1, max_stride=8, high_motion=0.01, low_motion=0.003):
+        # Motion thresholds are mean per-frame keypoint displacement in normalized (xyn) units
+        self.min_stride = min_stride
+        self.max_stride = max_stride
+        self.high_motion = high_motion
+        self.low_motion = low_motion
+        self.stride = min_stride
+        self.inferred = 0
+        self.skipped = 0
+
+    def update(self, motion, people_changed):
+        if people_changed or motion > self.high_motion:
+            self.stride = max(self.min_stride, self.stride // 2)
+        elif motion < self.low_motion:
+            self.stride = min(self.max_stride, self.stride + 1)
+        return self.stride
+
+    def report(self):
+        total = self.inferred + self.skipped
+        return {
+            "frames": total,
+            "inferred": self.inferred,
+            "skipped": self.skipped,
+            "compute_saved": self.skipped / total if total else 0.0,
+        }
+
+
+def _centre(box):
+    x1, y1, x2, y2 = box
+    return (x1 + x2) / 2, (y1 + y2) / 2
+
+
+def match_persons(a, b, max_dist=150.0):
+    # Greedy nearest-centre matching; returns [(i, j), ...] indices into a and b
+    pairs = []
+    if not a or not b:
+        return pairs
+    ca = np.array([_centre(p["box"]) for p in a])
+    cb = np.array([_centre(p["box"]) for p in b])
+    dist = np.linalg.norm(ca[:, None, :] - cb[None, :, :], axis=2)
+    used_a, used_b = set(), set()
+    for flat in np.argsort(dist, axis=None):
+        i, j = divmod(int(flat), len(b))
+        if dist[i, j] > max_dist:
+            break
+        if i in used_a or j in used_b:
+            continue
+        used_a.add(i)
+        used_b.add(j)
+        pairs.append((i, j))
+    return pairs
+
+
+def _valid(kp):
+    # YOLO reports undetected keypoints as (0, 0)
+    return np.any(kp != 0, axis=-1)
+
+
+def keypoint_motion(a, b, frames):
+    pairs = match_persons(a, b)
+    if not pairs or frames <= 0:
+        return 0.0
+    moves = []
+    for i, j in pairs:
+        ka, kb = a[i]["keypoints"], b[j]["keypoints"]
+        both = _valid(ka) & _valid(kb)
+        if both.any():
+            moves.append(np.linalg.norm(ka[both] - kb[both], axis=1).mean())
+    return float(np.mean(moves)) / frames if moves else 0.0
+
+
+def interpolate_persons(a, b, t):
+    """People of keyframe a moved a fraction t of the way towards keyframe b.
+
+    Labels and scores stay those of a; people not found in b are held in place.
+    """
+    matched = dict(match_persons(a, b))
+    out = []
+    for i, person in enumerate(a):
+        p = dict(person, interpolated=True)
+        j = matched.get(i)
+        if j is not None:
+            other = b[j]
+            p["box"] = [x + (y - x) * t for x, y in zip(person["box"], other["box"])]
+            ka, kb = person["keypoints"], other["keypoints"]
+            both = (_valid(ka) & _valid(kb))[:, None]
+            p["keypoints"] = np.where(both, ka + (kb - ka) * t, ka).astype(np.float32)
+        out.append(p)
+    return out
+
+
+def adaptive_frames(frames, infer, controller):
+    """Core schedule shared by live processing and drift measurement.
+
+    frames yields (frame_idx, frame); infer(frame_idx, frame) returns (result, persons).
+    Yields (frame_idx, frame, result, persons) in order; result is None for interpolated frames.
+    """
+    prev_idx, prev = None, None
+    pending = []
+    next_key = None
+    for frame_idx, frame in frames:
+        if next_key is not None and frame_idx < next_key:
+            pending.append((frame_idx, frame))
+            controller.skipped += 1
+            continue
+
+        r, persons = infer(frame_idx, frame)
+        controller.inferred += 1
+        if prev is not None:
+            span = frame_idx - prev_idx
+            controller.update(keypoint_motion(prev, persons, span), len(prev) != len(persons))
+            for idx, skipped_frame in pending:
+                yield idx, skipped_frame, None, interpolate_persons(prev, persons, (idx - prev_idx) / span)
+        pending = []
+        yield frame_idx, frame, r, persons
+        prev_idx, prev = frame_idx, persons
+        next_key = frame_idx + controller.stride
+
+    # Stream ended between keyframes: hold the last keyframe's people
+    for idx, skipped_frame in pending:
+        yield idx, skipped_frame, None, interpolate_persons(prev, [], 0.0)
+
+
+def _read_frames(video_path):
+    cap = cv2.VideoCapture(video_path)
+    frame_idx = 0
+    try:
+        while cap.isOpened():
+            success, frame = cap.read()
+            if not success:
+                break
+            yield frame_idx, cv2.resize(frame, FRAME_SIZE)
+            frame_idx += 1
+    finally:
+        cap.release()
+
+
+def draw_interpolated(detector, frame, persons):
+    annotated_frame = frame.copy()
+    w, h = FRAME_SIZE
+    for person in persons:
+        for x, y in person["keypoints"][_valid(person["keypoints"])]:
+            cv2.circle(annotated_frame, (int(x * w), int(y * h)), 3, (0, 255, 255), -1)
+    return detector.draw_persons(annotated_frame, persons)
+
+
+def process_video_adaptive(detector, video_path, controller=None):
+    """Yield (annotated_frame, detections) per frame, like ShopliftingDetector.process_video.
+
+    controller.report() afterwards (or during) tells how many inferences were skipped.
+    """
+    controller = controller or AdaptiveStride()
+
+    def infer(frame_idx, frame):
+        r = detector.model_yolo(frame, verbose=False)[0]
+        return r, detector.classify(r)
+
+    for frame_idx, frame, r, persons in adaptive_frames(_read_frames(video_path), infer, controller):
+        if r is not None:
+            # _read_frames hands out resized copies, so keyframes are drawn in place
+            annotated_frame = detector.annotate(r, persons, out=r.orig_img)
+        else:
+            annotated_frame = draw_interpolated(detector, frame, persons)
+        yield annotated_frame, detector.detections_for(persons, frame_idx)
+
+
+def measure_drift(detector, video_path, controller=None):
+    """Run full-rate inference, replay the adaptive schedule over it and compare.
+
+    Drift is the distance between interpolated and real keypoints on skipped frames, in
+    normalized units (1.0 = full frame width/height). Label agreement counts skipped-frame
+    people whose carried-forward label matches full-rate inference.
+    """
+    controller = controller or AdaptiveStride()
+    truth = {}
+    for frame_idx, frame in _read_frames(video_path):
+        r = detector.model_yolo(frame, verbose=False)[0]
+        truth[frame_idx] = detector.classify(r)
+
+    drifts, agree, compared = [], 0, 0
+    frames = ((idx, None) for idx in sorted(truth))
+    for frame_idx, _, r, persons in adaptive_frames(frames, lambda idx, _: (idx, truth[idx]), controller):
+        if r is not None:
+            continue
+        real = truth[frame_idx]
+        for i, j in match_persons(persons, real):
+            ka, kb = persons[i]["keypoints"], real[j]["keypoints"]
+            both = _valid(ka) & _valid(kb)
+            if both.any():
+                drifts.extend(np.linalg.norm(ka[both] - kb[both], axis=1).tolist())
+            compared += 1
+            agree += persons[i]["pred"] == real[j]["pred"]
+
+    report = controller.report()
+    report.update({
+        "drift_mean": float(np.mean(drifts)) if drifts else 0.0,
+        "drift_p95": float(np.percentile(drifts, 95)) if drifts else 0.0,
+        "drift_max": float(np.max(drifts)) if drifts else 0.0,
+        "label_agreement": agree / compared if compared else 1.0,
+    })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive-stride shoplifting detection")
+    parser.add_argument('video')
+    parser.add_argument('--min-stride', type=int, default=1)
+    parser.add_argument('--max-stride', type=int, default=8)
+    parser.add_argument('--high-motion', type=float, default=0.01)
+    parser.add_argument('--low-motion', type=float, default=0.003)
+    parser.add_argument('--drift', action='store_true', help="Measure drift against full-rate inference")
+    args = parser.parse_args()
+
+    from detector import ShopliftingDetector
+    detector = ShopliftingDetector()
+    controller = AdaptiveStride(args.min_stride, args.max_stride, args.high_motion, args.low_motion)
+
+    if args.drift:
+        report = measure_drift(detector, args.video, controller)
+    else:
+        for _ in process_video_adaptive(detector, args.video, controller):
+            pass
+        report = controller.report()
+    for key, value in report.items():
+        print(f"{key}: {value:.4f}" if isinstance(value, float) else f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
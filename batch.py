@@ -0,0 +1,242 @@
+"""Headless batch review of video archives.
+
+Every video found under the given files/directories goes through ShopliftingDetector with
+rendering off; each suspicious person becomes one record
+    {"video", "frame", "timestamp" (seconds into the video), "prob", "x1", "y1", "x2", "y2"}
+written as JSONL (one file) or Parquet (one part file per video in an output directory).
+Per-file frame counts, detections and fps are printed as each video finishes, totals at the end.
+
+Progress is checkpointed after every video. Re-running the same command skips finished
+videos (unless the file changed since) and, for JSONL, first cuts off whatever an
+interrupted video had already written, so nothing is duplicated. Without a checkpoint an
+existing output is left alone unless --overwrite is given; the same goes for a JSONL file
+that is missing or shorter than its checkpoint says. Parquet needs pyarrow.
+
+    python batch.py archive/ more.mp4 --out detections.jsonl [--batch-size 8] [--backend numpy]
+    python batch.py @videos.txt --out detections/ --format parquet
+"""
+import argparse
+import glob
+import hashlib
+import importlib.util
+import json
+import os
+import time
+
+import cv2
+
+import metrics
+from chunked import iter_persons
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.m4v', '.mpg', '.mpeg', '.wmv')
+
+
+def find_videos(inputs):
+    videos = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                videos.extend(os.path.join(root, f) for f in sorted(files) if f.lower().endswith(VIDEO_EXTENSIONS))
+        else:
+            videos.append(path)
+    # Same video listed twice is processed once
+    return list(dict.fromkeys(os.path.abspath(v) for v in videos))
+
+
+def _fingerprint(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime": st.st_mtime}
+
+
+class Checkpoint:
+    def __init__(self, path, output, fmt):
+        self.path = path
+        self.state = {"output": output, "format": fmt, "offset": 0, "done": {}}
+        self.resumed = os.path.exists(path)
+        if self.resumed:
+            with open(path) as f:
+                state = json.load(f)
+            if state.get("output") != output or state.get("format") != fmt:
+                raise SystemExit(f"Checkpoint {path} belongs to {state.get('output')} ({state.get('format')}); "
+                                 f"pass a different --checkpoint or remove it")
+            self.state = state
+
+    def is_done(self, video):
+        entry = self.state["done"].get(video)
+        return entry is not None and os.path.exists(video) and entry["file"] == _fingerprint(video)
+
+    def mark_done(self, video, stats, offset=None):
+        self.state["done"][video] = dict(stats, file=_fingerprint(video))
+        if offset is not None:
+            self.state["offset"] = offset
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.path)
+
+
+def video_records(detector, video, batch_size=1):
+    # (frames, records) for one video; records are the suspicious people
+    cap = cv2.VideoCapture(video)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {video}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    cap.release()
+
+    frames = 0
+    records = []
+    for frame_idx, persons in iter_persons(detector, video, 0, None, batch_size):
+        frames += 1
+        metrics.count("frames")
+        for person in persons:
+            if person["pred"] != 0:
+                continue
+            x1, y1, x2, y2 = person["box"]
+            records.append({
+                "video": video, "frame": frame_idx,
+                "timestamp": round(frame_idx / fps, 3) if fps else None,
+                "prob": round(person["prob"], 6),
+                "x1": round(x1, 1), "y1": round(y1, 1), "x2": round(x2, 1), "y2": round(y2, 1),
+            })
+    return frames, records
+
+
+def _parquet_part(out_dir, video):
+    # Stable, collision-free part name per input path
+    stem = os.path.splitext(os.path.basename(video))[0]
+    return os.path.join(out_dir, f"{stem}-{hashlib.sha1(video.encode()).hexdigest()[:10]}.parquet")
+
+
+def write_parquet(out_dir, video, records):
+    import pandas as pd
+    columns = ["video", "frame", "timestamp", "prob", "x1", "y1", "x2", "y2"]
+    part = _parquet_part(out_dir, video)
+    tmp = part + ".tmp"
+    pd.DataFrame.from_records(records, columns=columns).to_parquet(tmp, index=False)
+    os.replace(tmp, part)
+
+
+def existing_output(out, fmt):
+    # What a fresh run would overwrite: a non-empty JSONL file or the Parquet parts in out/
+    if fmt == 'jsonl':
+        return [out] if os.path.isfile(out) and os.path.getsize(out) else []
+    return sorted(glob.glob(os.path.join(out, '*.parquet')))
+
+
+def run(videos, out, fmt='jsonl', checkpoint=None, batch_size=1, backend='xgboost',
+        model_path='trained_model.json', yolo_path='yolo11n-pose.pt', overwrite=False):
+    checkpoint = Checkpoint(checkpoint or out.rstrip('/\\') + ".checkpoint.json", os.path.abspath(out), fmt)
+    offset = checkpoint.state["offset"]
+    if checkpoint.resumed and fmt == 'jsonl' and offset and (not os.path.isfile(out) or os.path.getsize(out) < offset):
+        # The output lost what the checkpoint counts as written; truncating up to the offset
+        # would pad it with NUL bytes
+        if not overwrite:
+            raise SystemExit(f"{out} is missing or shorter than checkpoint {checkpoint.path} says; "
+                             f"pass --overwrite to start over")
+        os.remove(checkpoint.path)
+        checkpoint = Checkpoint(checkpoint.path, os.path.abspath(out), fmt)
+    existing = [] if checkpoint.resumed else existing_output(out, fmt)
+    if existing and not overwrite:
+        raise SystemExit(f"{out} already holds detections and there is no checkpoint {checkpoint.path} "
+                         f"to resume from; pass --overwrite to replace them")
+    if fmt == 'parquet':
+        for part in existing:
+            os.remove(part)
+    todo = [v for v in videos if not checkpoint.is_done(v)]
+    skipped = len(videos) - len(todo)
+    if skipped:
+        print(f"Skipping {skipped} already processed video(s)")
+
+    totals = {"videos": 0, "failed": 0, "frames": 0, "detections": 0, "seconds": 0.0,
+              "skipped": skipped, "fps": 0.0}
+    if not todo:
+        return totals
+
+    from detector import ShopliftingDetector
+    detector = ShopliftingDetector(model_path=model_path, yolo_path=yolo_path, backend=backend, render=False)
+
+    if fmt == 'jsonl':
+        sink = open(out, 'a+b')
+        # Drop anything an interrupted run wrote after the last finished video
+        sink.truncate(checkpoint.state["offset"])
+        sink.seek(0, os.SEEK_END)
+    else:
+        os.makedirs(out, exist_ok=True)
+        sink = None
+
+    try:
+        for i, video in enumerate(todo, 1):
+            t0 = time.perf_counter()
+            try:
+                frames, records = video_records(detector, video, batch_size)
+            except Exception as e:
+                totals["failed"] += 1
+                print(f"[{i}/{len(todo)}] {video}: failed: {e}")
+                continue
+            seconds = time.perf_counter() - t0
+
+            offset = None
+            if sink is not None:
+                sink.write("".join(json.dumps(r) + "\n" for r in records).encode())
+                sink.flush()
+                os.fsync(sink.fileno())
+                offset = sink.tell()
+            else:
+                write_parquet(out, video, records)
+
+            stats = {"frames": frames, "detections": len(records), "seconds": round(seconds, 3),
+                     "fps": round(frames / seconds, 2) if seconds else 0.0}
+            checkpoint.mark_done(video, stats, offset)
+            totals["videos"] += 1
+            totals["frames"] += frames
+            totals["detections"] += len(records)
+            totals["seconds"] += seconds
+            print(f"[{i}/{len(todo)}] {video}: {frames} frames, {len(records)} detections, {stats['fps']:.1f} fps")
+    finally:
+        if sink is not None:
+            sink.close()
+
+    totals["fps"] = totals["frames"] / totals["seconds"] if totals["seconds"] else 0.0
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless shoplifting detection over many videos",
+                                     fromfile_prefix_chars='@')
+    parser.add_argument('inputs', nargs='+', help="Video files and/or directories (@file reads one per line)")
+    parser.add_argument('--out', required=True, help="JSONL file, or directory for Parquet parts")
+    parser.add_argument('--format', choices=['jsonl', 'parquet'], default=None,
+                        help="Default: parquet if --out ends in .parquet or is a directory, else jsonl")
+    parser.add_argument('--checkpoint', default=None, help="Default: <out>.checkpoint.json")
+    parser.add_argument('--overwrite', action='store_true',
+                        help="Replace an existing output that has no checkpoint to resume from, "
+                             "or a JSONL file that no longer matches its checkpoint")
+    parser.add_argument('--batch-size', type=int, default=1)
+    parser.add_argument('--backend', default='xgboost', choices=['xgboost', 'numpy'])
+    parser.add_argument('--model', default='trained_model.json')
+    parser.add_argument('--yolo', default='yolo11n-pose.pt')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="Serve per-stage metrics at http://127.0.0.1:PORT/metrics")
+    args = parser.parse_args()
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+
+    fmt = args.format
+    if fmt is None:
+        fmt = 'parquet' if args.out.endswith(('.parquet', '/', os.sep)) or os.path.isdir(args.out) else 'jsonl'
+    if fmt == 'parquet' and importlib.util.find_spec('pyarrow') is None:
+        parser.error("Parquet output needs pyarrow: pip install pyarrow")
+
+    videos = find_videos(args.inputs)
+    if not videos:
+        raise SystemExit("No videos found")
+    totals = run(videos, args.out, fmt, args.checkpoint, args.batch_size, args.backend, args.model, args.yolo,
+                 args.overwrite)
+    print(f"Done: {totals['videos']} processed, {totals['skipped']} skipped, {totals['failed']} failed; "
+          f"{totals['frames']} frames, {totals['detections']} detections in {totals['seconds']:.1f}s "
+          f"({totals['fps']:.1f} fps)")
+
+
+if __name__ == "__main__":
+    main()
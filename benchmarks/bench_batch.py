@@ -0,0 +1,44 @@
+"""Frames/sec of ShopliftingDetector.process_video for several pose batch sizes on CPU.
+
+Run from the project root:
+    python -m benchmarks.bench_batch vid.mp4 [--batch-sizes 1 2 4 8] [--frames 300]
+"""
+import argparse
+import os
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('video', nargs='?', default='vid.mp4')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--frames', type=int, default=300, help="Frames timed per batch size")
+    parser.add_argument('--model', default='trained_model.json')
+    parser.add_argument('--yolo', default='yolo11n-pose.pt')
+    args = parser.parse_args()
+
+    # Hide any GPU so the numbers reflect the edge boxes
+    os.environ['CUDA_VISIBLE_DEVICES'] = ''
+    from detector import ShopliftingDetector
+
+    detector = ShopliftingDetector(model_path=args.model, yolo_path=args.yolo)
+
+    print(f"{'K':>4} {'frames':>8} {'fps':>8}")
+    for k in args.batch_sizes:
+        # Warm up the model at this batch size before timing
+        for i, _ in enumerate(detector.process_video(args.video, batch_size=k)):
+            if i + 1 >= k:
+                break
+
+        n = 0
+        start = time.perf_counter()
+        for _ in detector.process_video(args.video, batch_size=k):
+            n += 1
+            if n >= args.frames:
+                break
+        elapsed = time.perf_counter() - start
+        print(f"{k:>4} {n:>8} {n / elapsed if elapsed else 0.0:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
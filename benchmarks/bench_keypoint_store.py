@@ -0,0 +1,85 @@
+"""Training-set load time: dataset.csv through pandas vs keypoint_store.KeypointStore.
+
+Writes the same random rows both ways (the CSV as collect.py / datset.py write it, the store
+as one part per --parts), then times what model.py does to get X and y from each, plus the
+bare (N, 34) feature matrix from the store. Run from the project root:
+    python -m benchmarks.bench_keypoint_store [--rows 1000000] [--parts 10]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from features import FEATURE_NAMES, NUM_KEYPOINTS
+from keypoint_store import KeypointStore
+
+
+def synthetic_columns(rows, seed=0, offset=0):
+    rng = np.random.default_rng(seed)
+    return {
+        'xy': rng.random((rows, NUM_KEYPOINTS, 2), dtype=np.float32),
+        'conf': rng.random((rows, NUM_KEYPOINTS), dtype=np.float32),
+        'box': (rng.random((rows, 4), dtype=np.float32) * 1000).astype(np.float32),
+        'video': np.full(rows, f'video_{seed}.mp4', dtype=object),
+        'timestamp_ms': np.arange(rows, dtype=np.float64) * 40,
+        'frame': np.arange(rows, dtype=np.int64),
+        'image_name': np.array([f'person_nn_{offset + i}.jpg' for i in range(rows)], dtype=object),
+        'label': rng.integers(0, 2, rows).astype(np.int8),
+    }
+
+
+def time_s(fn):
+    start = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - start, out
+
+
+def load_csv(path):
+    # model.py's CSV path
+    df = pd.read_csv(path)
+    X = df.drop(['label', 'image_name'], axis=1)
+    y = df['label'].map({'Suspicious': 0, 'Normal': 1})
+    return X, y
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--parts', type=int, default=10, help="Appends (store parts) the rows arrive in")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'dataset.csv')
+        store = KeypointStore(os.path.join(tmp, 'keypoints'))
+        per_part = -(-args.rows // args.parts)
+        for k, start in enumerate(range(0, args.rows, per_part)):
+            columns = synthetic_columns(min(per_part, args.rows - start), seed=k, offset=start)
+            store.append(columns)
+            n = len(columns['label'])
+            df = pd.DataFrame(columns['xy'].reshape(n, -1), columns=FEATURE_NAMES)
+            df.insert(0, 'image_name', columns['image_name'])
+            df['label'] = np.where(columns['label'] == 0, 'Suspicious', 'Normal')
+            df.to_csv(csv_path, mode='a', header=k == 0, index=False)
+
+        csv_mb = os.path.getsize(csv_path) / 2 ** 20
+        store_mb = sum(os.path.getsize(os.path.join(root, f))
+                       for root, _, files in os.walk(store.path) for f in files) / 2 ** 20
+        print(f"{args.rows} rows: CSV {csv_mb:.0f} MB, store {store_mb:.0f} MB in {len(store.parts())} parts")
+
+        csv_s, (X_csv, y_csv) = time_s(lambda: load_csv(csv_path))
+        store_s, (X_store, y_store) = time_s(lambda: KeypointStore(store.path).training_data())
+        feat_s, features = time_s(lambda: KeypointStore(store.path).features())
+        assert X_csv.shape == X_store.shape and (y_csv.to_numpy() == y_store.to_numpy()).all()
+        assert np.allclose(X_csv.to_numpy(np.float32), X_store.to_numpy(), atol=1e-6)
+
+        print(f"{'load':<28} {'seconds':>8} {'vs CSV':>8}")
+        print(f"{'CSV (pandas, model.py)':<28} {csv_s:>8.3f} {1.0:>7.1f}x")
+        print(f"{'store training_data()':<28} {store_s:>8.3f} {csv_s / store_s:>7.1f}x")
+        print(f"{'store features()':<28} {feat_s:>8.3f} {csv_s / feat_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
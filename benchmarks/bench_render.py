@@ -0,0 +1,121 @@
+"""Per-frame annotation time: current path vs renderer.FrameRenderer, at 1, 5 and 20 people.
+
+The current path is r.plot(boxes=False) followed by one cv2.rectangle and one text label per
+person. With ultralytics installed the real Results.plot is timed; without it an equivalent
+(frame copy, then ultralytics' keypoint drawing) stands in. Run from the project root:
+    python -m benchmarks.bench_render [--people 1 5 20] [--frames 200]
+"""
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from detector import FRAME_SIZE
+from renderer import KPT_COLORS, LIMB_COLORS, SKELETON, FrameRenderer, dashboard_labels
+
+
+def put_label(img, text, pos, color_bg, color_text=(255, 255, 255)):
+    # The dashboard's label helper before sprites: measures and rasterizes every call
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    scale, thick = 0.6, 1
+    (tw, th), baseline = cv2.getTextSize(text, font, scale, thick)
+    x, y = pos
+    cv2.rectangle(img, (x, y - th - baseline - 4), (x + tw + 8, y + baseline), color_bg, -1)
+    cv2.putText(img, text, (x + 4, y), font, scale, color_text, thick, cv2.LINE_AA)
+
+
+def synthetic_people(n, seed=0):
+    rng = np.random.default_rng(seed)
+    w, h = FRAME_SIZE
+    x1 = rng.uniform(0, w - 120, n)
+    y1 = rng.uniform(20, h - 260, n)
+    boxes = np.stack([x1, y1, x1 + 100, y1 + 240], axis=1).astype(np.float32)
+    xy = np.stack([
+        x1[:, None] + rng.uniform(0, 100, (n, 17)),
+        y1[:, None] + rng.uniform(0, 240, (n, 17)),
+    ], axis=-1).astype(np.float32)
+    conf = rng.uniform(0.3, 1.0, (n, 17)).astype(np.float32)
+    persons = [{"box": box.tolist(), "pred": i % 2, "keypoints": kp / np.array([w, h], dtype=np.float32)}
+               for i, (box, kp) in enumerate(zip(boxes, xy))]
+    return boxes, xy, conf, persons
+
+
+def emulated_plot(frame, xy, conf, conf_thres=0.25, radius=5):
+    # ultralytics Annotator.kpts on a copy of the frame, limb by limb
+    im = frame.copy()
+    h, w = im.shape[:2]
+    thickness = int(np.ceil(max(round(sum(im.shape) / 2 * 0.003), 2) / 2))
+    for kpts, kconf in zip(xy[::-1], conf[::-1]):
+        for i, (x, y) in enumerate(kpts):
+            if x % w != 0 and y % h != 0 and kconf[i] >= conf_thres:
+                cv2.circle(im, (int(x), int(y)), radius, KPT_COLORS[i], -1, lineType=cv2.LINE_AA)
+        for i, (a, b) in enumerate(SKELETON):
+            if kconf[a] < conf_thres or kconf[b] < conf_thres:
+                continue
+            pos1 = (int(kpts[a, 0]), int(kpts[a, 1]))
+            pos2 = (int(kpts[b, 0]), int(kpts[b, 1]))
+            cv2.line(im, pos1, pos2, LIMB_COLORS[i], thickness=thickness, lineType=cv2.LINE_AA)
+    return im
+
+
+def make_plot(frame, boxes, xy, conf):
+    # Real Results.plot when ultralytics is importable, otherwise the emulation
+    try:
+        import torch
+        from ultralytics.engine.results import Results
+    except ImportError:
+        return lambda: emulated_plot(frame, xy, conf), "emulated"
+    n = len(boxes)
+    det = torch.from_numpy(np.concatenate([boxes, np.ones((n, 1)), np.zeros((n, 1))], axis=1).astype(np.float32))
+    kpts = torch.from_numpy(np.concatenate([xy, conf[..., None]], axis=-1))
+    r = Results(frame, path="", names={0: "person"}, boxes=det, keypoints=kpts)
+    return lambda: r.plot(boxes=False), "ultralytics"
+
+
+def current_path(plot, persons):
+    annotated_frame = plot()
+    for person in persons:
+        x1, y1, x2, y2 = (int(v) for v in person["box"])
+        if person["pred"] == 0:
+            cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), (0, 0, 255), 3)
+            put_label(annotated_frame, "!! SUSPICIOUS", (x1, max(y1 - 4, 20)), (180, 0, 0))
+        else:
+            cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), (0, 200, 80), 2)
+            put_label(annotated_frame, "Normal", (x1, max(y1 - 4, 20)), (0, 140, 60))
+    return annotated_frame
+
+
+def time_ms(fn, frames):
+    fn()
+    start = time.perf_counter()
+    for _ in range(frames):
+        fn()
+    return (time.perf_counter() - start) / frames * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--people', type=int, nargs='+', default=[1, 5, 20])
+    parser.add_argument('--frames', type=int, default=200, help="Frames timed per case")
+    args = parser.parse_args()
+
+    w, h = FRAME_SIZE
+    frame = (np.random.default_rng(1).random((h, w, 3)) * 255).astype(np.uint8)
+    renderer = FrameRenderer(dashboard_labels())
+    buffer = np.empty_like(frame)
+    scratch = frame.copy()
+
+    print(f"{'people':>6} {'current ms':>11} {'render ms':>10} {'in place ms':>12} {'speedup':>8}  plot")
+    for n in args.people:
+        boxes, xy, conf, persons = synthetic_people(n)
+        plot, kind = make_plot(frame, boxes, xy, conf)
+        current = time_ms(lambda: current_path(plot, persons), args.frames)
+        # Into a reused buffer (one copy of the frame), and in place on a frame we own
+        into_buffer = time_ms(lambda: renderer.render(frame, persons, xy, conf, out=buffer), args.frames)
+        in_place = time_ms(lambda: renderer.render(scratch, persons, xy, conf), args.frames)
+        print(f"{n:>6} {current:>11.3f} {into_buffer:>10.3f} {in_place:>12.3f} {current / into_buffer:>7.1f}x  {kind}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Microbenchmark of per-frame person scoring: per-person DMatrix, batched inplace_predict and the NumPy forest.
+
+Run from the project root:
+    python -m benchmarks.bench_scoring [--model trained_model.json] [--persons 1 5 15 50]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from features import NUM_KEYPOINTS
+from forest import TreeEnsemble
+
+
+def time_call(fn, X, repeat):
+    fn(X)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(X)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default='trained_model.json')
+    parser.add_argument('--persons', type=int, nargs='+', default=[1, 5, 15, 50])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    forest = TreeEnsemble.from_json(args.model)
+    print(f"NumPy forest load: {(time.perf_counter() - start) * 1000:.1f} ms "
+          f"({forest.num_trees} trees, depth {forest.depth})")
+
+    start = time.perf_counter()
+    import xgboost as xgb
+    booster = xgb.Booster()
+    booster.load_model(args.model)
+    print(f"xgboost import + load: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    from benchmarks.scoring_parity import per_person_predict
+
+    rng = np.random.default_rng(0)
+    print(f"{'persons':>8} {'per-person':>12} {'inplace':>12} {'numpy':>12}   (ms per frame)")
+    for n in args.persons:
+        X = rng.random((n, NUM_KEYPOINTS * 2), dtype=np.float32)
+        legacy = time_call(lambda a: per_person_predict(booster, a), X, max(args.repeat // 10, 1))
+        inplace = time_call(booster.inplace_predict, X, args.repeat)
+        numpy_forest = time_call(forest.predict, X, args.repeat)
+        print(f"{n:>8} {legacy * 1000:>12.3f} {inplace * 1000:>12.3f} {numpy_forest * 1000:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
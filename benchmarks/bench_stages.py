@@ -0,0 +1,208 @@
+"""Per-stage latency of the detection path on synthetic video, written as JSON and checked against a baseline.
+
+A SyntheticScene video is generated at the requested resolution, length and person count,
+then every frame goes through decode, resize, pose, features, classifier, render and
+jpeg_encode, each timed on its own (p50/p95/p99/mean over the timed frames). Features,
+classifier and render are ShopliftingDetector.classify and annotate themselves, timed by
+their own metrics, so the benchmark measures the code process_video runs. Pose runs with
+the weight-free StubPose (no ultralytics needed) and, when the weights file exists, again
+with the real model. trained_model.json is used for the classifier if present, otherwise a
+same-shaped model trained on random data with a fixed seed.
+
+With --baseline, each stage's p50 is compared with the stored run; a stage more than
+--tolerance slower (and at least --min-ms slower) is reported as a regression and the
+exit status is 1. --save-baseline stores this run as the new baseline. Run from the project root:
+    python -m benchmarks.bench_stages [--width 1280 --height 720 --seconds 10 --people 5]
+                                      [--out stages.json] [--baseline stage_baseline.json [--save-baseline]]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+import metrics
+from benchmarks.synthetic import StubPose, SyntheticScene
+from detector import ShopliftingDetector
+from features import FRAME_SIZE, NUM_KEYPOINTS
+
+STAGES = ("decode", "resize", "pose", "features", "classifier", "render", "jpeg_encode")
+
+
+def classifier_path(model_path, tmp):
+    # (path, name): model_path if it exists, else a stand-in saved in tmp
+    if os.path.exists(model_path):
+        return model_path, model_path
+    import xgboost as xgb
+    # model.py's inputs, objective and shape (50 trees of depth 3), so inplace_predict costs the same
+    rng = np.random.default_rng(0)
+    X = rng.random((4000, NUM_KEYPOINTS * 2), dtype=np.float32)
+    y = (X[:, 19] + X[:, 21] > X[:, 18] + X[:, 20]).astype(np.float32)
+    booster = xgb.train({"objective": "binary:logistic", "tree_method": "hist", "eta": 0.1, "max_depth": 3,
+                         "seed": 0}, xgb.DMatrix(X, label=y), num_boost_round=50)
+    path = os.path.join(tmp, "synthetic_model.json")
+    booster.save_model(path)
+    return path, "synthetic"
+
+
+def run_stages(video, detector, frames, warmup=10, jpeg_quality=90):
+    """Time every stage for up to `frames` frames after `warmup` untimed ones.
+
+    Each frame goes through detector.classify and detector.annotate (drawing into the frame,
+    as process_video does); their own metrics give the features, classifier and render times.
+    """
+    cap = cv2.VideoCapture(video)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {video}")
+    metrics.disable()
+    registry = metrics.enable()
+    n = 0
+    start = time.perf_counter()
+    try:
+        while n < warmup + frames:
+            if n == warmup:
+                metrics.disable()
+                registry = metrics.enable()
+                start = time.perf_counter()
+            with metrics.timed("decode"):
+                ok, frame = cap.read()
+            if not ok:
+                break
+            with metrics.timed("resize"):
+                frame = cv2.resize(frame, FRAME_SIZE)
+            with metrics.timed("pose"):
+                r = detector.model_yolo(frame, verbose=False)[0]
+            persons = detector.classify(r)
+            annotated_frame = detector.annotate(r, persons, out=r.orig_img)
+            with metrics.timed("jpeg_encode"):
+                cv2.imencode('.jpg', annotated_frame, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+            n += 1
+    finally:
+        cap.release()
+        metrics.disable()
+    elapsed = time.perf_counter() - start
+    timed = max(n - warmup, 0)
+
+    stages = {}
+    snapshot = registry.snapshot()["stages"]
+    for name in STAGES:
+        s = snapshot.get(name)
+        if s is None:
+            continue
+        stages[name] = {"p50_ms": s["p50"] * 1000, "p95_ms": s["p95"] * 1000, "p99_ms": s["p99"] * 1000,
+                        "mean_ms": s["mean"] * 1000, "count": s["count"]}
+    return {"frames": timed, "fps": timed / elapsed if elapsed and timed else 0.0, "stages": stages}
+
+
+def compare(results, baseline, tolerance=0.15, min_ms=0.05):
+    """[(run, stage, baseline p50, current p50)] for stages that got slower than allowed."""
+    regressions = []
+    for run, current in results["runs"].items():
+        before = baseline.get("runs", {}).get(run)
+        if before is None:
+            continue
+        for stage, s in current["stages"].items():
+            b = before["stages"].get(stage)
+            if b is None:
+                continue
+            old, new = b["p50_ms"], s["p50_ms"]
+            if new > old * (1 + tolerance) and new - old > min_ms:
+                regressions.append((run, stage, old, new))
+    return regressions
+
+
+def print_table(results, baseline=None):
+    for run, r in results["runs"].items():
+        before = (baseline or {}).get("runs", {}).get(run, {}).get("stages", {})
+        print(f"\n{run}: {r['frames']} frames, {r['fps']:.1f} fps")
+        print(f"{'stage':<12} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'mean ms':>9} {'vs base':>9}")
+        for stage, s in r["stages"].items():
+            b = before.get(stage)
+            change = f"{(s['p50_ms'] / b['p50_ms'] - 1) * 100:+.0f}%" if b and b["p50_ms"] else ""
+            print(f"{stage:<12} {s['p50_ms']:>9.3f} {s['p95_ms']:>9.3f} {s['p99_ms']:>9.3f} "
+                  f"{s['mean_ms']:>9.3f} {change:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--fps', type=int, default=25)
+    parser.add_argument('--people', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--warmup', type=int, default=10, help="Untimed frames at the start of each run")
+    parser.add_argument('--jpeg-quality', type=int, default=90)
+    parser.add_argument('--model', default='trained_model.json')
+    parser.add_argument('--yolo', default='yolo11n-pose.pt', help="Real pose weights; skipped if the file is missing")
+    parser.add_argument('--stub-only', action='store_true', help="Never run the real pose model")
+    parser.add_argument('--keep-video', default=None, help="Also save the generated video here")
+    parser.add_argument('--out', default=None, help="Write the results JSON here")
+    parser.add_argument('--baseline', default=None, help="Stored results JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Overwrite --baseline with this run")
+    parser.add_argument('--tolerance', type=float, default=0.15, help="Allowed p50 slowdown per stage (0.15 = 15%%)")
+    parser.add_argument('--min-ms', type=float, default=0.05, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    scene = SyntheticScene(args.width, args.height, args.people, args.seed)
+    total = args.warmup + int(args.seconds * args.fps)
+
+    results = {
+        "config": {"width": args.width, "height": args.height, "seconds": args.seconds, "fps": args.fps,
+                   "people": args.people, "seed": args.seed, "warmup": args.warmup,
+                   "jpeg_quality": args.jpeg_quality, "frame_size": list(FRAME_SIZE), "classifier": None},
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "machine": platform.machine(), "cpus": os.cpu_count(),
+                        "opencv": cv2.__version__, "numpy": np.__version__},
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "runs": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path, results["config"]["classifier"] = classifier_path(args.model, tmp)
+        video = args.keep_video or os.path.join(tmp, "synthetic.mp4")
+        scene.write(video, total, args.fps)
+
+        detector = ShopliftingDetector(model_path=model_path, pose_model=StubPose(scene))
+        results["runs"]["stub"] = run_stages(video, detector, total - args.warmup, args.warmup,
+                                             jpeg_quality=args.jpeg_quality)
+        if not args.stub_only and os.path.exists(args.yolo):
+            detector = ShopliftingDetector(model_path=model_path, yolo_path=args.yolo)
+            results["runs"][os.path.basename(args.yolo)] = run_stages(
+                video, detector, total - args.warmup, args.warmup, jpeg_quality=args.jpeg_quality)
+
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != results["config"]:
+            print(f"Warning: {args.baseline} was recorded with different settings: {baseline.get('config')}")
+
+    print_table(results, baseline)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        if not args.baseline:
+            parser.error("--save-baseline needs --baseline PATH")
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved baseline to {args.baseline}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance, args.min_ms)
+        for run, stage, old, new in regressions:
+            print(f"REGRESSION {run}/{stage}: p50 {old:.3f} ms -> {new:.3f} ms ({(new / old - 1) * 100:+.0f}%)")
+        if regressions:
+            sys.exit(1)
+        print("\nNo regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""Replay the repo's own store imagery through ShopliftingDetector.process_video as a virtual video.
+
+Two corpora:
+  images   the sampled full frames in images/ (img_0.jpg, img_1.jpg, ... in numeric order)
+  crops    the labelled person crops in dataset_path/Normal and dataset_path/Suspicious, each
+           pasted at its original size onto a grey frame the size of the images/ frames
+Frames are served by FolderCapture, which stands in for cv2.VideoCapture, so they go through
+the same decode, resize, pose, features, classifier and render path as a camera feed.
+
+Every combination of --strides, --imgsz and --batch-sizes is one run. A run reports
+throughput, per-stage p50/p95/p99 (metrics module), the peak RSS sampled during the run and,
+for crops, agreement with the folder labels: the largest detected person in each crop
+against its folder, plus how many crops had no confident person. Stride only applies to
+images; crops are unrelated people, so reusing the previous result would only add noise.
+Crops sit at the centre of the frame rather than where they were cut from, so their
+keypoints are not in the training positions: compare agreement between runs, not with the
+model's test accuracy. Run from the project root:
+    python -m benchmarks.replay [--corpus images crops] [--strides 1 2 4] [--imgsz 640 480]
+                                [--batch-sizes 1 4] [--limit 500] [--out replay.json]
+"""
+import argparse
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import metrics
+
+LABELS = ("Normal", "Suspicious")
+# Label of a person by prediction (pred 0 is suspicious)
+PRED_LABEL = {0: "Suspicious", 1: "Normal"}
+GREY = (114, 114, 114)
+
+
+def natural_sorted(names):
+    return sorted(names, key=lambda n: [int(t) if t.isdigit() else t for t in re.split(r'(\d+)', n)])
+
+
+def list_images(directory):
+    return [os.path.join(directory, n) for n in natural_sorted(os.listdir(directory))
+            if n.lower().endswith(('.jpg', '.jpeg', '.png'))]
+
+
+class FolderCapture:
+    """Read-only cv2.VideoCapture look-alike over a list of image files.
+
+    With canvas_size=(w, h) each image is pasted, unscaled and centred, onto a grey
+    frame of that size (shrunk first if it does not fit).
+    """
+
+    def __init__(self, paths, canvas_size=None, fps=25.0):
+        self.paths = paths
+        self.canvas_size = canvas_size
+        self.fps = fps
+        self.index = 0
+        self._open = True
+
+    def isOpened(self):
+        return self._open
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(len(self.paths))
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.index)
+        return 0.0
+
+    def _paste(self, img):
+        w, h = self.canvas_size
+        ih, iw = img.shape[:2]
+        if iw > w or ih > h:
+            scale = min(w / iw, h / ih)
+            img = cv2.resize(img, (max(1, int(iw * scale)), max(1, int(ih * scale))), interpolation=cv2.INTER_AREA)
+            ih, iw = img.shape[:2]
+        canvas = np.empty((h, w, 3), dtype=np.uint8)
+        canvas[:] = GREY
+        y, x = (h - ih) // 2, (w - iw) // 2
+        canvas[y:y + ih, x:x + iw] = img
+        return canvas
+
+    def read(self):
+        while self._open and self.index < len(self.paths):
+            img = cv2.imread(self.paths[self.index])
+            self.index += 1
+            if img is None:
+                print(f"Skipping unreadable image: {self.paths[self.index - 1]}")
+                continue
+            return True, self._paste(img) if self.canvas_size else img
+        return False, None
+
+    def release(self):
+        self._open = False
+
+
+class StrideGate:
+    # process_video gate that runs pose on every stride-th frame and reuses the result in between
+    def __init__(self, stride):
+        self.stride = stride
+        self.frames = 0
+
+    def should_infer(self, frame):
+        run = self.frames % self.stride == 0
+        self.frames += 1
+        return run
+
+
+class FixedImgsz:
+    # Forwards pose calls to the YOLO model with a fixed inference size
+    def __init__(self, model, imgsz):
+        self.model = model
+        self.imgsz = imgsz
+
+    def __call__(self, source, **kwargs):
+        return self.model(source, imgsz=self.imgsz, **kwargs)
+
+    def track(self, source, **kwargs):
+        return self.model.track(source, imgsz=self.imgsz, **kwargs)
+
+
+def current_rss():
+    # Resident set size in bytes, or None where it cannot be read
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class PeakRss:
+    """Highest RSS seen while the block runs, sampled every `interval` seconds."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+
+    def _sample(self):
+        rss = current_rss()
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return False
+
+
+def make_detector(model_path, yolo_path, backend):
+    from detector import ShopliftingDetector
+
+    class ReplayDetector(ShopliftingDetector):
+        # Remembers the people of the frame process_video is about to yield
+        last_persons = []
+
+        def detections_for(self, persons, frame_idx):
+            self.last_persons = persons
+            return super().detections_for(persons, frame_idx)
+
+    return ReplayDetector(model_path=model_path, yolo_path=yolo_path, backend=backend)
+
+
+def replay(detector, capture, labels=None, stride=1, imgsz=None, batch_size=1):
+    """Run one virtual video through process_video; labels (one per frame) enable agreement."""
+    model = detector.model_yolo
+    if imgsz:
+        detector.model_yolo = FixedImgsz(model, imgsz)
+    metrics.disable()
+    registry = metrics.enable()
+    gate = StrideGate(stride) if stride > 1 else None
+    confusion = {label: {"Normal": 0, "Suspicious": 0, "missed": 0} for label in LABELS}
+    frames = 0
+    try:
+        with PeakRss() as rss:
+            start = time.perf_counter()
+            for _ in detector.process_video(capture, batch_size=batch_size, gate=gate):
+                if labels is not None:
+                    persons = detector.last_persons
+                    if persons:
+                        largest = max(persons, key=lambda p: (p["box"][2] - p["box"][0]) * (p["box"][3] - p["box"][1]))
+                        confusion[labels[frames]][PRED_LABEL[largest["pred"]]] += 1
+                    else:
+                        confusion[labels[frames]]["missed"] += 1
+                frames += 1
+            elapsed = time.perf_counter() - start
+    finally:
+        detector.model_yolo = model
+        metrics.disable()
+
+    snapshot = registry.snapshot()
+    result = {
+        "stride": stride, "imgsz": imgsz, "batch_size": batch_size,
+        "frames": frames, "seconds": round(elapsed, 3),
+        "fps": frames / elapsed if elapsed else 0.0,
+        "peak_rss_mb": round(rss.peak / 2 ** 20, 1) if rss.peak is not None else None,
+        "stages": {name: {"p50_ms": s["p50"] * 1000, "p95_ms": s["p95"] * 1000, "p99_ms": s["p99"] * 1000,
+                          "mean_ms": s["mean"] * 1000, "count": s["count"]}
+                   for name, s in snapshot["stages"].items()},
+        "counters": snapshot["counters"],
+    }
+    if labels is not None:
+        detected = sum(c["Normal"] + c["Suspicious"] for c in confusion.values())
+        agree = sum(confusion[label][label] for label in LABELS)
+        result["confusion"] = confusion
+        result["agreement"] = agree / detected if detected else 0.0
+        result["missed"] = sum(c["missed"] for c in confusion.values())
+    return result
+
+
+def crop_corpus(dataset_dir, limit=None):
+    paths, labels = [], []
+    for label in LABELS:
+        files = list_images(os.path.join(dataset_dir, label))
+        paths.extend(files)
+        labels.extend([label] * len(files))
+    if limit:
+        # Keep both classes when shortening the run
+        picked = np.linspace(0, len(paths) - 1, min(limit, len(paths))).astype(int)
+        paths, labels = [paths[i] for i in picked], [labels[i] for i in picked]
+    return paths, labels
+
+
+def print_run(corpus, r):
+    line = (f"{corpus:<7} stride={r['stride']:<2} imgsz={str(r['imgsz'] or 'default'):<7} batch={r['batch_size']:<3}"
+            f" {r['frames']:>5} frames {r['fps']:>7.2f} fps  peak RSS {r['peak_rss_mb']} MB")
+    if "agreement" in r:
+        line += f"  agreement {r['agreement'] * 100:.1f}% ({r['missed']} missed)"
+    print(line)
+    for stage in ("decode", "resize", "gate", "pose", "features", "classifier", "render"):
+        s = r["stages"].get(stage)
+        if s:
+            print(f"    {stage:<11} p50 {s['p50_ms']:>8.3f}  p95 {s['p95_ms']:>8.3f}  p99 {s['p99_ms']:>8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', nargs='+', choices=['images', 'crops'], default=['images', 'crops'])
+    parser.add_argument('--images', default='images')
+    parser.add_argument('--dataset', default='dataset_path')
+    parser.add_argument('--strides', type=int, nargs='+', default=[1])
+    parser.add_argument('--imgsz', type=int, nargs='+', default=[0], help="Pose inference size; 0 = model default")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1])
+    parser.add_argument('--limit', type=int, default=None, help="Use at most this many images per corpus")
+    parser.add_argument('--backend', default='xgboost', choices=['xgboost', 'numpy'])
+    parser.add_argument('--model', default='trained_model.json')
+    parser.add_argument('--yolo', default='yolo11n-pose.pt')
+    parser.add_argument('--out', default=None, help="Write all runs as JSON here")
+    args = parser.parse_args()
+
+    frames = list_images(args.images)[:args.limit] if os.path.isdir(args.images) else []
+    if not frames:
+        sys.exit(f"No images found in {args.images}")
+    first = cv2.imread(frames[0])
+    frame_size = (first.shape[1], first.shape[0])
+
+    detector = make_detector(args.model, args.yolo, args.backend)
+    runs = []
+    for stride, imgsz, batch_size in itertools.product(args.strides, args.imgsz, args.batch_sizes):
+        if 'images' in args.corpus:
+            r = replay(detector, FolderCapture(frames), stride=stride, imgsz=imgsz or None, batch_size=batch_size)
+            r["corpus"] = "images"
+            runs.append(r)
+            print_run("images", r)
+        if 'crops' in args.corpus and stride == args.strides[0]:
+            paths, labels = crop_corpus(args.dataset, args.limit)
+            r = replay(detector, FolderCapture(paths, canvas_size=frame_size), labels,
+                       imgsz=imgsz or None, batch_size=batch_size)
+            r["corpus"] = "crops"
+            runs.append(r)
+            print_run("crops", r)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"frame_size": frame_size, "runs": runs}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Check batched XGBoost scoring and the NumPy forest against the per-person DataFrame/DMatrix path.
+
+Run from the project root:
+    python -m benchmarks.scoring_parity [--model trained_model.json] [--images images] [--frames 200]
+"""
+import argparse
+import os
+
+import cv2
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from features import NUM_KEYPOINTS, keypoints_to_features
+from forest import TreeEnsemble
+
+
+def per_person_predict(booster, features):
+    # The original loop: one dict, DataFrame, DMatrix and predict call per person
+    out = []
+    for row in features.tolist():
+        data = {}
+        for j in range(NUM_KEYPOINTS):
+            data[f'x{j}'] = row[2 * j]
+            data[f'y{j}'] = row[2 * j + 1]
+        df = pd.DataFrame(data, index=[0])
+        out.append(float(booster.predict(xgb.DMatrix(df))[0]))
+    return np.array(out, dtype=np.float32)
+
+
+def batched_predict(booster, features):
+    return booster.inplace_predict(features)
+
+
+def collect_features(images_dir, max_frames, yolo_path='yolo11n-pose.pt'):
+    # Real poses from the sampled store frames, falling back to random keypoints
+    feats = []
+    if os.path.isdir(images_dir):
+        try:
+            from ultralytics import YOLO
+            model = YOLO(yolo_path)
+            names = sorted(n for n in os.listdir(images_dir) if n.lower().endswith('.jpg'))[:max_frames]
+            for name in names:
+                frame = cv2.imread(os.path.join(images_dir, name))
+                if frame is None:
+                    continue
+                r = model(cv2.resize(frame, (1018, 600)), verbose=False)[0]
+                if r.keypoints is not None:
+                    feats.append(keypoints_to_features(r.keypoints.xyn))
+        except Exception as e:
+            print(f"Pose extraction skipped: {e}")
+    rng = np.random.default_rng(0)
+    feats.append(rng.random((500, NUM_KEYPOINTS * 2), dtype=np.float32))
+    return np.concatenate(feats)
+
+
+def forest_edge_cases(forest, n_features):
+    split = forest.left != np.arange(len(forest.left))
+    rows = np.full((int(split.sum()), n_features), 0.5, dtype=np.float32)
+    rows[np.arange(len(rows)), forest.feature[split]] = forest.threshold[split]
+    missing = rows.copy()
+    missing[np.arange(len(rows)), forest.feature[split]] = np.nan
+    return np.concatenate([rows, missing])
+
+
+def check_parity(expected, got, atol=0.0):
+    diff = np.abs(expected - got)
+    mismatches = int(np.count_nonzero(diff > atol))
+    return mismatches, float(diff.max()) if len(diff) else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default='trained_model.json')
+    parser.add_argument('--images', default='images')
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--atol', type=float, default=1e-6, help="Tolerance for the NumPy forest")
+    args = parser.parse_args()
+
+    booster = xgb.Booster()
+    booster.load_model(args.model)
+    forest = TreeEnsemble.from_json(args.model)
+    features = collect_features(args.images, args.frames)
+    # Inputs exactly on a split threshold and missing values exercise both branch rules
+    features = np.concatenate([features, forest_edge_cases(forest, len(features[0]))])
+    expected = per_person_predict(booster, features)
+
+    failed = False
+    for name, got, atol in [
+        ("inplace_predict", batched_predict(booster, features), 0.0),
+        ("numpy forest", forest.predict(features), args.atol),
+    ]:
+        mismatches, max_diff = check_parity(expected, got, atol)
+        print(f"{name}: persons {len(features)}, mismatches {mismatches}, max |diff| {max_diff:.3g}")
+        failed = failed or mismatches > 0
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
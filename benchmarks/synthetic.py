@@ -0,0 +1,144 @@
+"""Synthetic store footage and a stand-in pose model for benchmarks.
+
+SyntheticScene draws stick figures walking across a fixed textured background, at any
+resolution, length and person count; everything is derived from the seed, so the same
+arguments always give the same video. StubPose answers like a YOLO pose model (same result
+attributes, callable on one frame or a list) with the scene's true keypoints, so the stages
+after pose run on realistic data without weights or a GPU. Write a video with:
+    python -m benchmarks.synthetic out.mp4 [--width 1280 --height 720 --seconds 10 --people 5]
+"""
+import argparse
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+# COCO keypoints inside a person's box (x, y as fractions of the box)
+TEMPLATE = np.array([
+    [0.50, 0.08], [0.54, 0.06], [0.46, 0.06], [0.58, 0.08], [0.42, 0.08],
+    [0.68, 0.22], [0.32, 0.22], [0.78, 0.38], [0.22, 0.38], [0.82, 0.52], [0.18, 0.52],
+    [0.62, 0.55], [0.38, 0.55], [0.64, 0.75], [0.36, 0.75], [0.65, 0.95], [0.35, 0.95],
+], dtype=np.float32)
+LIMBS = [(15, 13), (13, 11), (16, 14), (14, 12), (11, 12), (5, 11), (6, 12), (5, 6), (5, 7),
+         (6, 8), (7, 9), (8, 10), (1, 2), (0, 1), (0, 2), (1, 3), (2, 4), (3, 5), (4, 6)]
+# Keypoints that swing while walking: elbows/wrists and knees/ankles, with opposite phases per side
+SWING = {7: 0.06, 9: 0.12, 8: -0.06, 10: -0.12, 13: -0.05, 15: -0.10, 14: 0.05, 16: 0.10}
+
+
+class SyntheticScene:
+    def __init__(self, width=1280, height=720, people=5, seed=0):
+        self.width = width
+        self.height = height
+        self.people = people
+        rng = np.random.default_rng(seed)
+        # Box size, start position, horizontal speed (fraction of the frame per frame) and gait phase
+        self.size = np.stack([rng.uniform(0.07, 0.12, people), rng.uniform(0.30, 0.45, people)], axis=1)
+        self.start = np.stack([rng.uniform(0.0, 1.0, people), rng.uniform(0.05, 0.5, people)], axis=1)
+        self.speed = rng.uniform(0.002, 0.006, people) * rng.choice([-1, 1], people)
+        self.phase = rng.uniform(0, 2 * np.pi, people)
+        self.colors = [tuple(int(c) for c in rng.integers(40, 220, 3)) for _ in range(people)]
+        # Shelves and noise so the encoder and decoder have real texture to work on
+        bg = rng.integers(90, 140, (height, width, 3), dtype=np.uint8)
+        for x in np.linspace(0, width, 7)[:-1].astype(int):
+            cv2.rectangle(bg, (x + 10, height // 10), (x + width // 7, height // 3),
+                          tuple(int(c) for c in rng.integers(60, 200, 3)), -1)
+        self.background = bg
+
+    def boxes(self, index):
+        """(people, 4) normalized x1, y1, x2, y2 at frame `index`."""
+        w, h = self.size[:, 0], self.size[:, 1]
+        span = 1.0 - w
+        # Walk back and forth across the frame
+        x = np.abs((self.start[:, 0] * span + self.speed * index) % (2 * span) - span)
+        y = self.start[:, 1]
+        return np.stack([x, y, x + w, y + h], axis=1).astype(np.float32)
+
+    def keypoints(self, index):
+        """(people, 17, 2) normalized keypoints at frame `index`."""
+        boxes = self.boxes(index)
+        kpts = np.repeat(TEMPLATE[None], self.people, axis=0).copy()
+        swing = np.sin(self.phase + index * 0.25)
+        for j, amount in SWING.items():
+            kpts[:, j, 0] += amount * swing
+        size = boxes[:, None, 2:] - boxes[:, None, :2]
+        return (boxes[:, None, :2] + kpts * size).astype(np.float32)
+
+    def frame(self, index):
+        img = self.background.copy()
+        scale = np.array([self.width, self.height], dtype=np.float32)
+        thickness = max(2, self.width // 320)
+        for color, kp in zip(self.colors, self.keypoints(index) * scale):
+            pts = kp.astype(np.int32)
+            for a, b in LIMBS:
+                cv2.line(img, tuple(pts[a]), tuple(pts[b]), color, thickness, cv2.LINE_AA)
+            cv2.circle(img, tuple(pts[0]), thickness * 4, color, -1, cv2.LINE_AA)
+        return img
+
+    def write(self, path, frames, fps=25):
+        out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (self.width, self.height))
+        if not out.isOpened():
+            raise IOError(f"Could not open video writer: {path}")
+        try:
+            for i in range(frames):
+                out.write(self.frame(i))
+        finally:
+            out.release()
+        return path
+
+
+class StubPose:
+    """Deterministic stand-in for YOLO(...)(frames): returns the scene's keypoints.
+
+    Results arrive in call order, one scene frame per image, so feed it the scene's frames
+    in sequence (reset() starts again at frame 0). The only work done per image is the
+    letterbox resize to `imgsz` the real model does before inference.
+    """
+
+    def __init__(self, scene, imgsz=640, conf=0.9):
+        self.scene = scene
+        self.imgsz = imgsz
+        self.conf = conf
+        self.index = 0
+
+    def reset(self):
+        self.index = 0
+
+    def _result(self, frame):
+        h, w = frame.shape[:2]
+        r = self.imgsz / max(h, w)
+        cv2.resize(frame, (round(w * r), round(h * r)), interpolation=cv2.INTER_LINEAR)
+
+        xyn = self.scene.keypoints(self.index)
+        boxes = self.scene.boxes(self.index) * np.array([w, h, w, h], dtype=np.float32)
+        self.index += 1
+        n = len(xyn)
+        return SimpleNamespace(
+            orig_img=frame,
+            boxes=SimpleNamespace(xyxy=boxes, conf=np.full(n, self.conf, dtype=np.float32), id=None),
+            keypoints=SimpleNamespace(xyn=xyn, xy=xyn * np.array([w, h], dtype=np.float32),
+                                      conf=np.full((n, 17), self.conf, dtype=np.float32)),
+        )
+
+    def __call__(self, frames, verbose=False, **kwargs):
+        if isinstance(frames, np.ndarray):
+            frames = [frames]
+        return [self._result(f) for f in frames]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic benchmark video")
+    parser.add_argument('out')
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--fps', type=int, default=25)
+    parser.add_argument('--people', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    scene = SyntheticScene(args.width, args.height, args.people, args.seed)
+    scene.write(args.out, int(args.seconds * args.fps), args.fps)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
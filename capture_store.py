@@ -0,0 +1,126 @@
+"""SQLite index of the suspect captures saved by the dashboard.
+
+Every saved capture gets a row (path, creation time, frame, score, file size), so start-up
+reads the newest N rows instead of listing, stat-ing and parsing every file in the folder.
+Files saved before the index existed are picked up once by migrate(). prune() enforces the
+retention limits in bulk: captures older than max_age_days, beyond max_entries, or beyond
+max_bytes of files (newest kept first) are deleted together with their rows.
+"""
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+INDEX_NAME = "index.sqlite3"
+
+
+def parse_capture_name(fname):
+    # suspect_<YYYYmmdd>_<HHMMSS>_f<frame>_s<score>.jpg -> (time, frame, score)
+    parts = fname.split('_')
+    ts_str = f"{parts[2][:2]}:{parts[2][2:4]}:{parts[2][4:]}"
+    return ts_str, int(parts[3][1:]), float(parts[4][1:-4])
+
+
+class CaptureStore:
+    def __init__(self, directory, max_entries=10000, max_bytes=1024 ** 3, max_age_days=30):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        os.makedirs(directory, exist_ok=True)
+        # Written from the detection worker, read from the script thread
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, INDEX_NAME), check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("""CREATE TABLE IF NOT EXISTS captures (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                path TEXT UNIQUE NOT NULL,
+                created REAL NOT NULL,
+                time TEXT, frame INTEGER, score REAL, size INTEGER)""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS captures_created ON captures (created)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def add(self, path, frame, score, created=None, size=None):
+        created = time.time() if created is None else created
+        if size is None:
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+        entry = {"path": path, "time": datetime.fromtimestamp(created).strftime("%H:%M:%S"),
+                 "frame": int(frame), "score": float(score)}
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO captures (path, created, time, frame, score, size) VALUES (?, ?, ?, ?, ?, ?)",
+                (path, created, entry["time"], entry["frame"], entry["score"], size))
+        return entry
+
+    def recent(self, n):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT path, time, frame, score FROM captures ORDER BY created DESC, id DESC LIMIT ?",
+                (n,)).fetchall()
+        return [{"path": p, "time": t, "frame": f, "score": s} for p, t, f, s in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM captures").fetchone()[0]
+
+    def migrate(self):
+        """Index capture files saved before the index existed. Runs once per folder."""
+        with self._lock:
+            done = self._db.execute("SELECT value FROM meta WHERE key = 'migrated'").fetchone()
+        if done:
+            return 0
+        rows = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.jpg'):
+                continue
+            st = entry.stat()
+            try:
+                ts_str, frm, sc = parse_capture_name(entry.name)
+            except (IndexError, ValueError):
+                ts_str, frm, sc = 'Unknown', 0, 0.0
+            rows.append((entry.path, st.st_mtime, ts_str, frm, sc, st.st_size))
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO captures (path, created, time, frame, score, size) VALUES (?, ?, ?, ?, ?, ?)",
+                rows)
+            self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated', ?)", (str(time.time()),))
+        return len(rows)
+
+    def prune(self):
+        """Delete captures beyond the age, count and size limits; returns how many went."""
+        cutoff = time.time() - self.max_age_days * 86400 if self.max_age_days else None
+        with self._lock:
+            rows = self._db.execute("""
+                SELECT id, path FROM (
+                    SELECT id, path, created,
+                           ROW_NUMBER() OVER (ORDER BY created DESC, id DESC) AS rank,
+                           SUM(size) OVER (ORDER BY created DESC, id DESC) AS total
+                    FROM captures)
+                WHERE (? IS NOT NULL AND rank > ?) OR (? IS NOT NULL AND total > ?)
+                   OR (? IS NOT NULL AND created < ?)""",
+                (self.max_entries, self.max_entries, self.max_bytes, self.max_bytes, cutoff, cutoff)).fetchall()
+        return self._delete(rows)
+
+    def clear(self):
+        # Every capture in the folder, indexed or not
+        with self._lock:
+            rows = self._db.execute("SELECT id, path FROM captures").fetchall()
+        removed = self._delete(rows)
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.jpg'):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+        return removed
+
+    def _delete(self, rows):
+        for _, path in rows:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM captures WHERE id = ?", [(row_id,) for row_id, _ in rows])
+        return len(rows)
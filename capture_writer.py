@@ -0,0 +1,145 @@
+"""Background JPEG writer for suspect captures.
+
+submit() only puts the frame on a bounded queue; a small pool of threads encodes (optionally
+downscaled) and writes it, records it in the capture index and then calls the submitter's
+callback with the capture entry. When the queue is full the overflow policy decides:
+  drop_oldest  discard the oldest queued capture (default; detection never waits)
+  drop_newest  discard the capture being submitted
+  block        wait for room, so nothing is lost but detection can stall
+close() writes everything still queued before the threads exit.
+"""
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import cv2
+
+import metrics
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+
+class CaptureWriter:
+    def __init__(self, directory, store=None, workers=2, queue_size=16, quality=90, width=None,
+                 overflow='drop_oldest'):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.directory = directory
+        self.store = store
+        self.quality = quality
+        self.width = width
+        self.overflow = overflow
+        self.submitted = 0
+        self.written = 0
+        self.dropped_oldest = 0
+        self.dropped_newest = 0
+        self.blocked = 0
+        self.errors = 0
+        self.write_seconds = 0.0
+        self._q = queue.Queue(queue_size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._threads = [threading.Thread(target=self._run, daemon=True) for _ in range(workers)]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, frame, frame_num, score, callback=None):
+        """Queue one capture; the frame must not be modified afterwards.
+
+        Returns False if the capture was dropped. callback(entry) runs on a writer thread
+        once the file is on disk.
+        """
+        if self._closed:
+            raise RuntimeError("CaptureWriter is closed")
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.directory, f"suspect_{ts}_f{frame_num}_s{score:.2f}.jpg")
+        item = (frame, path, frame_num, score, callback)
+        with self._lock:
+            self.submitted += 1
+            if self.overflow == 'block':
+                if self._q.full():
+                    self.blocked += 1
+            else:
+                while True:
+                    try:
+                        self._q.put_nowait(item)
+                        return True
+                    except queue.Full:
+                        if self.overflow == 'drop_newest':
+                            self.dropped_newest += 1
+                            return False
+                        try:
+                            self._q.get_nowait()
+                            self._q.task_done()
+                            self.dropped_oldest += 1
+                        except queue.Empty:
+                            pass
+        self._q.put(item)
+        return True
+
+    def _write(self, frame, path, frame_num, score, callback):
+        h, w = frame.shape[:2]
+        if self.width and w > self.width:
+            frame = cv2.resize(frame, (self.width, max(1, h * self.width // w)), interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, int(self.quality)])
+        if not ok:
+            raise ValueError("JPEG encoding failed")
+        with open(path, 'wb') as f:
+            f.write(buf.tobytes())
+        if self.store is not None:
+            entry = self.store.add(path, frame_num, score, size=len(buf))
+        else:
+            entry = {"path": path, "time": datetime.now().strftime("%H:%M:%S"),
+                     "frame": frame_num, "score": score}
+        if callback is not None:
+            callback(entry)
+
+    def _run(self):
+        while True:
+            item = self._q.get()
+            if item is None:
+                self._q.task_done()
+                return
+            start = time.perf_counter()
+            try:
+                self._write(*item)
+                elapsed = time.perf_counter() - start
+                metrics.observe("capture_write", elapsed)
+                with self._lock:
+                    self.written += 1
+                    self.write_seconds += elapsed
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                print(f"Capture error: {e}")
+            finally:
+                self._q.task_done()
+
+    def flush(self):
+        # Block until every queued capture has been written (or failed)
+        self._q.join()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        for _ in self._threads:
+            self._q.put(None)
+        for t in self._threads:
+            t.join()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": self._q.qsize(),
+                "submitted": self.submitted,
+                "written": self.written,
+                "dropped_oldest": self.dropped_oldest,
+                "dropped_newest": self.dropped_newest,
+                "blocked": self.blocked,
+                "errors": self.errors,
+                "avg_write_ms": self.write_seconds / self.written * 1000 if self.written else 0.0,
+            }
@@ -0,0 +1,165 @@
+"""Offline review of one long video across CPU cores.
+
+The video is split into half-open frame ranges [start, end). Worker processes, each with
+its own ShopliftingDetector, pull ranges from a shared queue as they free up, so a slow
+range never leaves the other cores idle. Per-range detections are merged back into
+global frame order. The last range is open-ended so an inaccurate frame count can never
+drop frames at the tail.
+
+    python chunked.py vid.mp4 --workers 4 --chunk-frames 500 [--verify]
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+
+import cv2
+
+from detector import FRAME_SIZE
+
+_detector = None
+
+
+def plan_chunks(total_frames, chunk_frames):
+    # Contiguous, non-overlapping ranges; the final one runs to end of stream (end=None)
+    chunks = []
+    start = 0
+    while start + chunk_frames < total_frames:
+        chunks.append((start, start + chunk_frames))
+        start += chunk_frames
+    chunks.append((start, None))
+    return chunks
+
+
+def open_at(video_path, start):
+    cap = cv2.VideoCapture(video_path)
+    if start == 0:
+        return cap
+    # Right after set() POS_FRAMES only echoes the request; after a grab it says where the
+    # decoder really is. Land on the frame before start and step over it to check the seek
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start - 1)
+    if cap.grab() and int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == start:
+        return cap
+    # Seek was not frame-accurate for this container; walk forward without decoding
+    cap.release()
+    cap = cv2.VideoCapture(video_path)
+    for _ in range(start):
+        if not cap.grab():
+            break
+    return cap
+
+
+def _init_worker(model_path, yolo_path, backend):
+    global _detector
+    from detector import ShopliftingDetector
+    _detector = ShopliftingDetector(model_path=model_path, yolo_path=yolo_path, backend=backend)
+
+
+def iter_persons(detector, video_path, start=0, end=None, batch_size=1):
+    """Yield (frame_idx, persons) for frames start..end-1 (end=None: to end of stream), unannotated."""
+    cap = open_at(video_path, start)
+    frame_idx = start
+    batch = []
+    try:
+        while end is None or frame_idx + len(batch) < end:
+            success, frame = cap.read()
+            if success:
+                batch.append(cv2.resize(frame, FRAME_SIZE))
+            if batch and (len(batch) >= batch_size or not success
+                          or (end is not None and frame_idx + len(batch) >= end)):
+                for r in detector.model_yolo(batch, verbose=False):
+                    yield frame_idx, detector.classify(r)
+                    frame_idx += 1
+                batch = []
+            if not success:
+                break
+    finally:
+        cap.release()
+
+
+def detect_range(detector, video_path, start, end, batch_size=1):
+    """Return [(frame_idx, detections), ...] for frames start..end-1 (end=None: to end of stream)."""
+    return [(frame_idx, detector.detections_for(persons, frame_idx))
+            for frame_idx, persons in iter_persons(detector, video_path, start, end, batch_size)]
+
+
+def _run_chunk(args):
+    video_path, start, end, batch_size = args
+    t0 = time.perf_counter()
+    frames = detect_range(_detector, video_path, start, end, batch_size)
+    return start, frames, time.perf_counter() - t0
+
+
+def process_video_parallel(video_path, workers=None, chunk_frames=500, batch_size=1,
+                           model_path='trained_model.json', yolo_path='yolo11n-pose.pt', backend='xgboost'):
+    """Yield (frame_idx, detections) for every frame, in global frame order."""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {video_path}")
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    chunks = plan_chunks(total, chunk_frames)
+    workers = workers or os.cpu_count() or 1
+    # Models are not fork-safe; every worker loads its own
+    ctx = mp.get_context('spawn')
+    with ctx.Pool(workers, initializer=_init_worker, initargs=(model_path, yolo_path, backend)) as pool:
+        tasks = [(video_path, start, end, batch_size) for start, end in chunks]
+        pending = {}
+        order = [start for start, _ in chunks]
+        k = 0
+        # chunksize=1 so each free worker takes the next range as soon as it is done
+        for start, frames, _ in pool.imap_unordered(_run_chunk, tasks, chunksize=1):
+            pending[start] = frames
+            # Release finished ranges as soon as everything before them is out
+            while k < len(order) and order[k] in pending:
+                yield from pending.pop(order[k])
+                k += 1
+
+
+def process_video_single(video_path, batch_size=1, model_path='trained_model.json',
+                         yolo_path='yolo11n-pose.pt', backend='xgboost'):
+    from detector import ShopliftingDetector
+    detector = ShopliftingDetector(model_path=model_path, yolo_path=yolo_path, backend=backend)
+    yield from detect_range(detector, video_path, 0, None, batch_size)
+
+
+def _comparable(frames):
+    # Wall-clock "time" differs between runs; everything else must match
+    return [(i, [{k: v for k, v in d.items() if k != "time"} for d in dets]) for i, dets in frames]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process one long video across CPU cores")
+    parser.add_argument('video')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-frames', type=int, default=500)
+    parser.add_argument('--batch-size', type=int, default=1)
+    parser.add_argument('--backend', default='xgboost', choices=['xgboost', 'numpy'])
+    parser.add_argument('--out', default=None, help="Write detections as JSONL")
+    parser.add_argument('--verify', action='store_true', help="Compare against a single-process run")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    frames = list(process_video_parallel(args.video, args.workers, args.chunk_frames,
+                                         args.batch_size, backend=args.backend))
+    elapsed = time.perf_counter() - t0
+    print(f"Processed {len(frames)} frames in {elapsed:.1f}s ({len(frames) / elapsed:.1f} fps)")
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            for frame_idx, detections in frames:
+                for d in detections:
+                    f.write(json.dumps(d) + "\n")
+
+    if args.verify:
+        single = list(process_video_single(args.video, args.batch_size, backend=args.backend))
+        if _comparable(single) != _comparable(frames):
+            print("Mismatch against single-process run")
+            raise SystemExit(1)
+        print("Matches single-process run")
+
+
+if __name__ == "__main__":
+    main()
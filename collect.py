@@ -0,0 +1,242 @@
+"""Keypoint dataset collection from one video (shared by Normal.py and Suspicious.py).
+
+Sample i is taken at i * ((seconds / samples) * 1000) ms with seconds = round(frame_count / fps),
+the same timestamps as the original per-sample cap.set(CAP_PROP_POS_MSEC) loop, or every
+--stride-ms. Instead of seeking (back to a keyframe, then decoding forward) for every
+sample, the video is decoded once from start to end: frames before the next sample are
+passed over with grab(), which decodes but never retrieves them, and the sample itself is
+read. A timestamp maps to frame int(msec / 1000 * fps + 0.5), as OpenCV's seek does, so the
+saved frames, crops and keypoints are identical to the seeking version.
+
+Each sample is saved as img_<i>.jpg; every person above --conf becomes person_nn_<a>.jpg
+and one keypoint row (image_name, x0, y0, ... x16, y16) appended to the CSV, or, with
+--store, to a keypoint_store.KeypointStore with confidences, box, video and timestamp.
+    python collect.py nm1.mp4 --samples 1000
+    python collect.py susup1.mp4 --samples 2000 --start-index 288
+    python collect.py vid.mp4 --stride-ms 500 --frames-dir images --crops-dir images1 --csv nkeypoint.csv
+    python collect.py nm1.mp4 --samples 1000 --store keypoints --label Normal
+"""
+import argparse
+import heapq
+import itertools
+import os
+
+import cv2
+import numpy as np
+import pandas as pd
+
+from features import NUM_KEYPOINTS, to_numpy
+from temporal import TEMPORAL_FEATURE_NAMES, TrackHistory, push_tracked, sample_frame, temporal_columns
+
+
+def sample_step_ms(frame_count, fps, samples=None, stride_ms=None):
+    """Milliseconds between samples: a fixed stride, or the collection scripts' samples-per-video."""
+    if stride_ms is not None:
+        return float(stride_ms)
+    if not samples:
+        raise ValueError("Give either samples or stride_ms")
+    seconds = round(frame_count / fps)
+    return (seconds / samples) * 1000
+
+
+def iter_samples(video_path, samples=None, stride_ms=None, grid_ms=None):
+    """Yield (i, msec, frame_index, frame) for sample i = 0, 1, ... until the video ends.
+
+    Decodes sequentially. When two samples fall on the same frame, the same array is
+    yielded again. With grid_ms, the frames of a second grid (one every grid_ms) that are
+    not samples themselves are yielded in between, in frame order, with i None.
+    video_path may also be an already opened cv2.VideoCapture.
+    """
+    cap = video_path if hasattr(video_path, 'read') else cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    step = sample_step_ms(cap.get(cv2.CAP_PROP_FRAME_COUNT), fps, samples, stride_ms)
+    if step <= 0 or (grid_ms is not None and grid_ms <= 0):
+        cap.release()
+        raise ValueError(f"Sample spacing must be positive (got {step} ms, grid {grid_ms} ms)")
+
+    # i * ((seconds / samples) * 1000), evaluated exactly as the original loop did
+    targets = ((sample_frame(i, step, fps), i, i * step) for i in itertools.count())
+    if grid_ms is not None:
+        grid = ((sample_frame(k, grid_ms, fps), None, k * grid_ms) for k in itertools.count())
+        # On a shared frame the sample comes first and the grid entry is dropped
+        targets = heapq.merge(targets, grid, key=lambda t: t[0])
+
+    pos = 0  # index of the frame the next grab()/read() returns
+    current = -1
+    frame = None
+    try:
+        for target, i, msec in targets:
+            if target == current and i is None:
+                continue
+            if target != current:
+                while pos < target:
+                    if not cap.grab():
+                        return
+                    pos += 1
+                flag, frame = cap.read()
+                if not flag:
+                    return
+                pos += 1
+                current = target
+            yield i, msec, current, frame
+    finally:
+        cap.release()
+
+
+def person_rows(r, frame, start_index, conf_threshold=0.75, temporal=None):
+    """(crop, row, index in r) for every person in YOLO result r above the threshold; crops are numbered from start_index.
+
+    temporal maps an index in r to its temporal columns; people missing from it get NaN.
+    """
+    bound_box = r.boxes.xyxy  # Get bounding boxes
+    conf = r.boxes.conf.tolist()  # Confidence score
+    keypoints = r.keypoints.xyn.tolist()  # Human keypoints
+    out = []
+    a = start_index
+    for index, box in enumerate(bound_box):
+        if conf[index] > conf_threshold:
+            x1, y1, x2, y2 = box.tolist()
+            cropped_person = frame[int(y1):int(y2), int(x1):int(x2)]
+            data = {'image_name': f'person_nn_{a}.jpg'}
+            for j in range(len(keypoints[index])):
+                data[f'x{j}'] = keypoints[index][j][0]
+                data[f'y{j}'] = keypoints[index][j][1]
+            if temporal is not None:
+                data.update(temporal.get(index) or dict.fromkeys(TEMPORAL_FEATURE_NAMES, np.nan))
+            out.append((cropped_person, data, index))
+            a += 1
+    return out
+
+
+def _store_rows(columns, r, people, video_path, msec, frame_index, label, temporal_features):
+    # Add one sample's people to the per-column lists collect() hands to the keypoint store
+    index = [i for _, _, i in people]
+    n = len(index)
+    kp_conf = r.keypoints.conf
+    columns['xy'].append(to_numpy(r.keypoints.xyn)[index].astype(np.float32))
+    columns['conf'].append(to_numpy(kp_conf)[index].astype(np.float32) if kp_conf is not None
+                           else np.full((n, NUM_KEYPOINTS), np.nan, dtype=np.float32))
+    columns['box'].append(to_numpy(r.boxes.xyxy)[index].astype(np.float32))
+    columns['video'].append(np.full(n, video_path, dtype=object))
+    columns['timestamp_ms'].append(np.full(n, msec, dtype=np.float64))
+    columns['frame'].append(np.full(n, frame_index, dtype=np.int64))
+    columns['image_name'].append(np.array([data['image_name'] for _, data, _ in people], dtype=object))
+    columns['label'].append(np.full(n, label, dtype=np.int8))
+    if temporal_features:
+        columns['temporal'].append(np.array([[data.get(name, np.nan) for name in TEMPORAL_FEATURE_NAMES]
+                                             for _, data, _ in people], dtype=np.float32))
+
+
+def collect(video_path, model, frames_dir, cropped_dir, samples=None, stride_ms=None, start_index=0,
+            conf_threshold=0.75, temporal_features=False, store=None, label=None):
+    """Save sampled frames and person crops; returns (rows, samples taken, next crop index).
+
+    frames_dir=None keeps only the crops. With a keypoint_store.KeypointStore the people are
+    also appended to it, as one part, with keypoint confidences, box, video, timestamp and
+    frame; label is 'Normal', 'Suspicious' or None.
+
+    With temporal_features every tracked person goes into a temporal.TrackHistory on its
+    SAMPLE_HZ grid, as in ShopliftingDetector.process_video, whatever the sample spacing:
+    the grid frames between samples are decoded and tracked too. A row gets the history of
+    its track as of the last grid frame, NaN columns if there is none.
+    """
+    if frames_dir is not None:
+        os.makedirs(frames_dir, exist_ok=True)
+    os.makedirs(cropped_dir, exist_ok=True)
+    history = TrackHistory() if temporal_features else None
+    all_data = []
+    columns = None
+    if store is not None:
+        from keypoint_store import LABEL_CODES, UNLABELLED
+        label_code = LABEL_CODES[label] if label else UNLABELLED
+        columns = {name: [] for name in ('xy', 'conf', 'box', 'video', 'timestamp_ms', 'frame', 'image_name', 'label')}
+        if temporal_features:
+            columns['temporal'] = []
+    a = start_index
+    taken = 0
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    grid_ms = history.step_ms if history is not None else None
+    for i, msec, frame_index, frame in iter_samples(cap, samples, stride_ms, grid_ms):
+        if history is not None:
+            results = model.track(frame, persist=True, verbose=False)
+            if history.due(frame_index, fps):
+                for r in results:
+                    push_tracked(history, r)
+        if i is None:
+            # Grid frame only feeds the history
+            continue
+
+        # Save full frame image
+        if frames_dir is not None:
+            cv2.imwrite(os.path.join(frames_dir, f'img_{i}.jpg'), frame)
+
+        # Run YOLO detection
+        if history is None:
+            results = model(frame, verbose=False)
+
+        for r in results:
+            temporal = None
+            if history is not None:
+                track_ids = [] if r.boxes.id is None else [int(t) for t in to_numpy(r.boxes.id).tolist()]
+                temporal = dict(enumerate(temporal_columns(history, track_ids)))
+            people = person_rows(r, frame, a, conf_threshold, temporal)
+            for cropped_person, data, _ in people:
+                cv2.imwrite(os.path.join(cropped_dir, data['image_name']), cropped_person)
+                all_data.append(data)
+                a += 1
+            if columns is not None and people:
+                _store_rows(columns, r, people, video_path, msec, frame_index, label_code, temporal_features)
+        taken = i + 1
+    if columns is not None and all_data:
+        store.append({name: np.concatenate(chunks) for name, chunks in columns.items()})
+    return all_data, taken, a
+
+
+def append_csv(rows, csv_file_path):
+    df = pd.DataFrame(rows)
+    # Check if the file exists to determine whether to append or create new
+    if not os.path.isfile(csv_file_path):
+        df.to_csv(csv_file_path, index=False)  # Create new file if it doesn't exist
+    else:
+        df.to_csv(csv_file_path, mode='a', header=False, index=False)  # Append if it exists
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sample frames, person crops and keypoints from a video")
+    parser.add_argument('video')
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--samples', type=int, help="Samples spread over the video (Normal.py: 1000, Suspicious.py: 2000)")
+    group.add_argument('--stride-ms', type=float, help="One sample every this many milliseconds")
+    parser.add_argument('--start-index', type=int, default=0, help="Number of the first person_nn_ crop")
+    parser.add_argument('--frames-dir', default='images')
+    parser.add_argument('--crops-dir', default='images1')
+    parser.add_argument('--csv', default='nkeypoint.csv')
+    parser.add_argument('--store', default=None, help="Append to this keypoint store instead of the CSV")
+    parser.add_argument('--label', choices=['Normal', 'Suspicious'], default=None, help="Label stored rows")
+    parser.add_argument('--conf', type=float, default=0.75)
+    parser.add_argument('--yolo', default='yolo11s-pose.pt')
+    parser.add_argument('--temporal', action='store_true',
+                        help="Track people and add the temporal feature columns (changes the CSV schema)")
+    args = parser.parse_args()
+
+    from ultralytics import YOLO
+    model = YOLO(args.yolo)
+    store = None
+    if args.store:
+        from keypoint_store import KeypointStore
+        store = KeypointStore(args.store)
+    rows, taken, next_index = collect(args.video, model, args.frames_dir, args.crops_dir, args.samples,
+                                      args.stride_ms, args.start_index, args.conf, args.temporal,
+                                      store, args.label)
+    print(f"Total frames processed: {taken}, cropped images saved: {next_index - args.start_index} "
+          f"(next index {next_index})")
+    if store is None:
+        append_csv(rows, args.csv)
+    print(f"Keypoint data saved to {args.store or args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""Keypoint dataset collection from many labelled videos across CPU cores.
+
+The manifest is a CSV with `video` and `label` (Normal or Suspicious) columns and, optionally,
+per-video `samples` or `stride_ms` (otherwise --samples / --stride-ms apply); relative
+paths are relative to the manifest. Every video is sampled by collect.collect in a worker
+process that loads its own pose model once. Each video writes its crops and keypoint rows
+to a shard directory of its own (<out>/.shards/<name>-<hash>/), so workers share no files
+and no crop counter. Finished shards survive an interrupted run; running the same command
+again only collects the videos that have none.
+
+Once every video is done the shards are merged in manifest order: crops move to
+<out>/<label>/person_nn_<n>.jpg, with n continuing after the highest number already in
+those folders, and the rows, labelled from the manifest, are appended to <out>/dataset.csv
+(image_name, x0, y0, ... x16, y16, label). That is the layout model.py trains from, without
+imgshuffle.py's numeric split or datset.py's folder lookup. With --store the rows go to the
+keypoint store <out>/keypoints (see keypoint_store.py) instead of dataset.csv.
+
+Merged videos are listed in <out>/merged.json and never collected or merged again, so
+re-running a finished command adds nothing. A merge first writes its plan to a journal,
+then the rows, then the ledger (the commit point), then moves the crops. A merge that died
+before the ledger is rolled back (the CSV truncated, new store parts removed) and one that
+died after it is finished, the next time merge runs.
+
+    python collect_parallel.py videos.csv --out dataset_path [--workers 4] [--samples 1000] [--store]
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing as mp
+import os
+import re
+import shutil
+import time
+
+import cv2
+import numpy as np
+import pandas as pd
+
+from collect import collect
+from features import FEATURE_NAMES
+from keypoint_store import KeypointStore
+
+LABELS = ('Normal', 'Suspicious')
+SHARDS_DIR = '.shards'
+ROWS_NAME = 'rows.csv'
+STORE_NAME = 'keypoints'
+LEDGER_NAME = 'merged.json'
+JOURNAL_NAME = 'merge.json'
+
+_model = None
+
+
+def read_manifest(path, samples=None, stride_ms=None):
+    df = pd.read_csv(path, dtype={'video': str, 'label': str})
+    missing = {'video', 'label'} - set(df.columns)
+    if missing:
+        raise ValueError(f"{path}: missing column(s) {', '.join(sorted(missing))}")
+    base = os.path.dirname(os.path.abspath(path))
+    entries = []
+    seen = set()
+    for row in df.to_dict('records'):
+        label = str(row['label']).strip()
+        if label not in LABELS:
+            raise ValueError(f"{path}: label of {row['video']} must be one of {', '.join(LABELS)}, got {label!r}")
+        video = os.path.abspath(os.path.join(base, row['video'].strip()))
+        if video in seen:
+            raise ValueError(f"{path}: {video} is listed more than once")
+        seen.add(video)
+        entry = {"video": video, "label": label, "samples": None, "stride_ms": None}
+        if pd.notna(row.get('samples')):
+            entry["samples"] = int(row['samples'])
+        elif pd.notna(row.get('stride_ms')):
+            entry["stride_ms"] = float(row['stride_ms'])
+        elif stride_ms is not None:
+            entry["stride_ms"] = stride_ms
+        else:
+            entry["samples"] = samples
+        entries.append(entry)
+    return entries
+
+
+def shard_path(out, video):
+    # Stable, collision-free shard name per input path
+    stem = os.path.splitext(os.path.basename(video))[0]
+    return os.path.join(out, SHARDS_DIR, f"{stem}-{hashlib.sha1(video.encode()).hexdigest()[:10]}")
+
+
+def _write_json(path, data):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def merged_videos(out):
+    """Videos already merged into out, from its ledger."""
+    path = os.path.join(out, LEDGER_NAME)
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return set(json.load(f)["videos"])
+
+
+def _init_worker(yolo_path, threads):
+    global _model
+    # One decode thread and a share of the cores for torch, so workers don't oversubscribe
+    cv2.setNumThreads(1)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    from ultralytics import YOLO
+    _model = YOLO(yolo_path)
+
+
+def _collect_shard(args):
+    entry, shard, conf_threshold, temporal_features, use_store = args
+    t0 = time.perf_counter()
+    tmp = shard + '.tmp'
+    try:
+        shutil.rmtree(tmp, ignore_errors=True)
+        store = KeypointStore(os.path.join(tmp, STORE_NAME)) if use_store else None
+        rows, taken, crops = collect(entry["video"], _model, None, os.path.join(tmp, 'crops'), entry["samples"],
+                                     entry["stride_ms"], 0, conf_threshold, temporal_features,
+                                     store, entry["label"])
+        columns = None if rows else ['image_name'] + FEATURE_NAMES
+        pd.DataFrame(rows, columns=columns).to_csv(os.path.join(tmp, ROWS_NAME), index=False)
+        # The shard only appears once it is complete
+        os.replace(tmp, shard)
+    except Exception as e:
+        return entry["video"], None, str(e), time.perf_counter() - t0
+    return entry["video"], taken, crops, time.perf_counter() - t0
+
+
+def next_crop_index(out):
+    last = -1
+    for label in LABELS:
+        folder = os.path.join(out, label)
+        if os.path.isdir(folder):
+            for name in os.listdir(folder):
+                m = re.fullmatch(r'person_nn_(\d+)\.\w+', name)
+                if m:
+                    last = max(last, int(m.group(1)))
+    return last + 1
+
+
+def _remove_shards_dir(out):
+    # Only once no shard (e.g. of a video missing from this manifest) is left in it
+    try:
+        os.rmdir(os.path.join(out, SHARDS_DIR))
+    except OSError:
+        pass
+
+
+def _recover(out):
+    # Finish or undo a merge that was interrupted, from its journal
+    journal_path = os.path.join(out, SHARDS_DIR, JOURNAL_NAME)
+    if not os.path.exists(journal_path):
+        return
+    with open(journal_path) as f:
+        journal = json.load(f)
+    if set(journal["videos"]) <= merged_videos(out):
+        # Committed: only crops and shards were left to move and delete
+        for src, dst in journal["moves"]:
+            if os.path.exists(src):
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                os.replace(src, dst)
+        for shard in journal["shards"]:
+            shutil.rmtree(shard, ignore_errors=True)
+    elif "store_parts" in journal:
+        store = KeypointStore(os.path.join(out, STORE_NAME))
+        if journal["store_parts"] is None:
+            shutil.rmtree(store.path, ignore_errors=True)
+        else:
+            for part in set(store.parts()) - set(journal["store_parts"]):
+                shutil.rmtree(part)
+    else:
+        csv_path = os.path.join(out, 'dataset.csv')
+        if journal["csv_size"] is None:
+            if os.path.exists(csv_path):
+                os.remove(csv_path)
+        else:
+            with open(csv_path, 'r+b') as f:
+                f.truncate(journal["csv_size"])
+    os.remove(journal_path)
+    _remove_shards_dir(out)
+
+
+def merge(entries, out, use_store=False):
+    """Move every shard's crops into <out>/<label>/ and append its rows to dataset.csv
+    (or the keypoint store); returns rows added. Videos already merged are skipped."""
+    _recover(out)
+    done = merged_videos(out)
+    entries = [e for e in entries if e["video"] not in done]
+    if not entries:
+        return 0
+    parts = []
+    for entry in entries:
+        shard = shard_path(out, entry["video"])
+        rows = pd.read_csv(os.path.join(shard, ROWS_NAME))
+        rows['label'] = entry["label"]
+        parts.append((entry, shard, rows))
+    df = pd.concat([rows for _, _, rows in parts], ignore_index=True)
+
+    csv_path = os.path.join(out, 'dataset.csv')
+    exists = os.path.isfile(csv_path)
+    store = KeypointStore(os.path.join(out, STORE_NAME)) if use_store else None
+    if store is not None:
+        shard_columns = [KeypointStore(os.path.join(shard, STORE_NAME)).read(mmap=False)
+                         for _, shard, rows in parts if len(rows)]
+        if shard_columns:
+            new = {name: np.concatenate([c[name] for c in shard_columns]) for name in shard_columns[0]}
+            if store.schema is not None and set(new) != set(store.columns):
+                raise ValueError(f"{store.path} has columns {store.columns}, new rows have {sorted(new)}")
+    elif exists:
+        header = list(pd.read_csv(csv_path, nrows=0).columns)
+        if header != list(df.columns):
+            raise ValueError(f"{csv_path} has columns {header}, new rows have {list(df.columns)}")
+
+    index = next_crop_index(out)
+    names, moves = [], []
+    for entry, shard, rows in parts:
+        label_dir = os.path.join(out, entry["label"])
+        for name in rows['image_name']:
+            new_name = f'person_nn_{index}.jpg'
+            moves.append((os.path.join(shard, 'crops', name), os.path.join(label_dir, new_name)))
+            names.append(new_name)
+            index += 1
+    df['image_name'] = names
+
+    journal = {"videos": [entry["video"] for entry in entries], "moves": moves,
+               "shards": [shard for _, shard, _ in parts]}
+    if store is not None:
+        journal["store_parts"] = store.parts() if store.schema is not None else None
+    else:
+        journal["csv_size"] = os.path.getsize(csv_path) if exists else None
+    journal_path = os.path.join(out, SHARDS_DIR, JOURNAL_NAME)
+    _write_json(journal_path, journal)
+
+    if store is not None:
+        if shard_columns:
+            # Shard rows are in the same order as their rows.csv
+            new['image_name'] = np.asarray(names, dtype=object)
+            store.append(new)
+    elif exists:
+        df.to_csv(csv_path, mode='a', header=False, index=False)
+    else:
+        df.to_csv(csv_path, index=False)
+    _write_json(os.path.join(out, LEDGER_NAME), {"videos": sorted(done | set(journal["videos"]))})
+
+    for entry, _, _ in parts:
+        os.makedirs(os.path.join(out, entry["label"]), exist_ok=True)
+    for src, dst in moves:
+        os.replace(src, dst)
+    for _, shard, _ in parts:
+        shutil.rmtree(shard)
+    os.remove(journal_path)
+    _remove_shards_dir(out)
+    return len(df)
+
+
+def collect_parallel(entries, out, workers=None, yolo_path='yolo11s-pose.pt', conf_threshold=0.75,
+                     temporal_features=False, threads=None, use_store=False):
+    """Collect every manifest entry into its shard; returns (stats per video, failures)."""
+    os.makedirs(os.path.join(out, SHARDS_DIR), exist_ok=True)
+    merged = merged_videos(out) & {e["video"] for e in entries}
+    if merged:
+        print(f"Skipping {len(merged)} video(s) already merged into {out}")
+    todo = [e for e in entries if e["video"] not in merged and not os.path.isdir(shard_path(out, e["video"]))]
+    if len(todo) + len(merged) < len(entries):
+        print(f"Reusing {len(entries) - len(todo) - len(merged)} finished shard(s)")
+    if not todo:
+        return {}, {}
+    # Longest videos first so the last worker to finish is not left with a long one
+    todo.sort(key=lambda e: os.path.getsize(e["video"]) if os.path.exists(e["video"]) else 0, reverse=True)
+
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+    threads = threads or max(1, (os.cpu_count() or 1) // workers)
+    stats, failures = {}, {}
+    # Models are not fork-safe; every worker loads its own
+    ctx = mp.get_context('spawn')
+    with ctx.Pool(workers, initializer=_init_worker, initargs=(yolo_path, threads)) as pool:
+        tasks = [(e, shard_path(out, e["video"]), conf_threshold, temporal_features, use_store) for e in todo]
+        for k, (video, taken, result, seconds) in enumerate(pool.imap_unordered(_collect_shard, tasks, chunksize=1), 1):
+            if taken is None:
+                failures[video] = result
+                print(f"[{k}/{len(todo)}] {video}: failed: {result}")
+                continue
+            stats[video] = {"samples": taken, "crops": result, "seconds": seconds}
+            print(f"[{k}/{len(todo)}] {video}: {taken} samples, {result} crops, "
+                  f"{taken / seconds if seconds else 0.0:.1f} samples/s")
+    return stats, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collect a labelled keypoint dataset from many videos in parallel")
+    parser.add_argument('manifest', help="CSV with video,label[,samples|stride_ms] columns")
+    parser.add_argument('--out', default='dataset_path')
+    parser.add_argument('--workers', type=int, default=None, help="Default: one per CPU core")
+    parser.add_argument('--threads-per-worker', type=int, default=None, help="Default: cores / workers")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--samples', type=int, default=1000, help="Default samples per video")
+    group.add_argument('--stride-ms', type=float, default=None, help="Default: one sample every this many ms")
+    parser.add_argument('--conf', type=float, default=0.75)
+    parser.add_argument('--yolo', default='yolo11s-pose.pt')
+    parser.add_argument('--temporal', action='store_true',
+                        help="Track people and add the temporal feature columns (changes the CSV schema)")
+    parser.add_argument('--store', action='store_true', help="Write rows to <out>/keypoints instead of dataset.csv")
+    args = parser.parse_args()
+
+    entries = read_manifest(args.manifest, args.samples, args.stride_ms)
+    t0 = time.perf_counter()
+    stats, failures = collect_parallel(entries, args.out, args.workers, args.yolo, args.conf, args.temporal,
+                                       args.threads_per_worker, args.store)
+    elapsed = time.perf_counter() - t0
+    if stats:
+        taken = sum(s["samples"] for s in stats.values())
+        print(f"Collected {taken} samples from {len(stats)} video(s) in {elapsed:.1f}s "
+              f"({taken / elapsed:.1f} samples/s)")
+    if failures:
+        raise SystemExit(f"{len(failures)} video(s) failed; finished shards are kept, re-run to retry")
+
+    added = merge(entries, args.out, args.store)
+    print(f"Merged {added} rows into {os.path.join(args.out, STORE_NAME if args.store else 'dataset.csv')}")
+
+
+if __name__ == "__main__":
+    main()
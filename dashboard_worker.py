@@ -0,0 +1,205 @@
+"""Background detection for the Streamlit dashboard.
+
+Reading the source, pose inference, classification and annotation run on a DetectionWorker
+thread (captures are handed to a CaptureWriter and written by its own threads), which
+publishes a snapshot of its latest state under a lock. The Streamlit script thread only
+polls snapshot() at the UI refresh rate, so a slow browser never holds up detection and
+detection fps no longer includes UI time. Streamlit calls must stay on the script thread,
+so nothing in here touches `st`.
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import cv2
+
+import metrics
+from detector import FRAME_SIZE
+from features import to_numpy
+from renderer import FrameRenderer, dashboard_labels
+
+# Alerts kept in memory: what the dashboard shows. The full stream goes to the event log.
+ALERT_CAPACITY = 20
+
+
+class DetectionWorker(threading.Thread):
+    """Runs the dashboard's detection loop on an already opened cv2.VideoCapture.
+
+    `conf_threshold` and `sus_threshold` may be changed while running. Suspicious frames go to
+    `writer` (a CaptureWriter), which the worker closes, flushing queued captures, on exit.
+    Alerts are kept newest first in a ring of `alert_capacity`; every alert is also written
+    to `event_log` (an EventLog), if given; the log may be shared, so on exit it is flushed,
+    not closed. With render=False frames are published unannotated.
+    With `heartbeat_timeout` (seconds), the worker stops by itself once heartbeat() has not
+    been called for that long, e.g. because the browser tab polling it was closed. A live
+    source that fails to read is reopened after `reconnect_delay` seconds.
+    """
+
+    def __init__(self, detector, cap, source, live, writer, conf_threshold=0.55,
+                 sus_threshold=0.5, gate=None, capture_every=45, event_log=None,
+                 alert_capacity=ALERT_CAPACITY, render=True, heartbeat_timeout=None,
+                 reconnect_delay=1.0):
+        super().__init__(daemon=True)
+        self.detector = detector
+        self.cap = cap
+        self.source = source
+        self.live = live
+        self.writer = writer
+        self.conf_threshold = conf_threshold
+        self.sus_threshold = sus_threshold
+        self.gate = gate
+        self.capture_every = capture_every
+        self.renderer = FrameRenderer(dashboard_labels(), enabled=render)
+        self.event_log = event_log
+        self.alerts = deque(maxlen=alert_capacity)
+        self.error = None
+        self.heartbeat_timeout = heartbeat_timeout
+        self.reconnect_delay = reconnect_delay
+        self._last_heartbeat = time.monotonic()
+        self._halt = threading.Event()
+        self._lock = threading.Lock()
+        self._state = {
+            "frame": None, "frame_id": 0,
+            "suspicious_count": 0, "normal_count": 0, "frames_processed": 0,
+            "suspicious": False, "alerts_version": 0, "fps": 0.0,
+        }
+        self._captures = []
+
+    def stop(self, timeout=5.0):
+        self._halt.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def heartbeat(self):
+        self._last_heartbeat = time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            snap = dict(self._state)
+            snap["alerts"] = list(self.alerts)
+        snap["gate"] = self.gate.stats() if self.gate is not None else None
+        snap["writer"] = self.writer.stats()
+        snap["running"] = self.is_alive()
+        snap["error"] = self.error
+        return snap
+
+    def _add_capture(self, entry):
+        # Called on a writer thread once the capture is on disk
+        with self._lock:
+            self._captures.append(entry)
+
+    def take_captures(self):
+        # Captures written since the last call, newest first
+        with self._lock:
+            captures, self._captures = self._captures, []
+        return captures[::-1]
+
+    def _detect(self, frame):
+        with metrics.timed("pose"):
+            r = self.detector.model_yolo(frame, verbose=False)[0]
+        # Same scoring as process_video; only the suspicious cut-off is the dashboard's own
+        persons = self.detector.classify(r, conf_threshold=self.conf_threshold)
+        alerts = []
+        normal = 0
+        best_sus_score = 0.0
+        for person in persons:
+            person["pred"] = int(person["prob"] > self.sus_threshold)
+            if person["pred"]:
+                normal += 1
+            else:
+                best_sus_score = max(best_sus_score, 1.0 - person["prob"])
+                alerts.append({"time": datetime.now().strftime("%H:%M:%S"), "label": "Suspicious",
+                               "frame": self._state["frames_processed"], "conf": person["prob"]})
+
+        # Skeletons, boxes and labels go straight into the resized frame, which is ours
+        kp = r.keypoints
+        xy = to_numpy(kp.xy) if kp is not None else None
+        kpt_conf = to_numpy(kp.conf) if kp is not None and kp.conf is not None else None
+        with metrics.timed("render"):
+            annotated_frame = self.renderer.render(frame, persons, xy, kpt_conf)
+        metrics.count("detections", len(alerts))
+        return annotated_frame, normal, alerts, best_sus_score
+
+    def run(self):
+        try:
+            self._loop()
+        except Exception as e:
+            self.error = str(e)
+            print(f"Detection worker error: {e}")
+        finally:
+            self.cap.release()
+            self.writer.close()
+            if self.event_log is not None:
+                self.event_log.flush()
+
+    def _loop(self):
+        last_capture_frame = -self.capture_every
+        last_annotated = None
+        frame_has_suspicious = False
+        best_sus_score = 0.0
+        window_start, window_frames = time.perf_counter(), 0
+
+        while not self._halt.is_set():
+            if (self.heartbeat_timeout is not None
+                    and time.monotonic() - self._last_heartbeat > self.heartbeat_timeout):
+                print(f"Detection worker: no heartbeat for {self.heartbeat_timeout:.0f}s, stopping")
+                break
+            with metrics.timed("decode"):
+                ret, frame = self.cap.read()
+            if not ret:
+                if not self.live:
+                    break
+                # Wait before reopening, so a camera that is down is not hammered in a tight loop
+                self.cap.release()
+                self._halt.wait(self.reconnect_delay)
+                self.cap = cv2.VideoCapture(self.source)
+                continue
+
+            with metrics.timed("resize"):
+                frame = cv2.resize(frame, FRAME_SIZE)
+            normal, alerts = 0, []
+            # Static scene: skip pose + classification and reuse the last annotation, with no
+            # alerts and no capture, which would only repeat the frame they came from.
+            # Published frames are never drawn on again, so sharing the array is safe.
+            skip = False
+            if self.gate is not None:
+                with metrics.timed("gate"):
+                    skip = not self.gate.should_infer(frame)
+            carried = skip and last_annotated is not None
+            if carried:
+                annotated_frame = last_annotated
+            else:
+                annotated_frame, normal, alerts, best_sus_score = self._detect(frame)
+                frame_has_suspicious = bool(alerts)
+                last_annotated = annotated_frame
+
+            if alerts and self.event_log is not None:
+                date = datetime.now().isoformat(timespec='seconds')
+                self.event_log.write([dict(a, date=date, source=str(self.source)) for a in alerts])
+
+            cur_frame = self._state["frames_processed"]
+            if frame_has_suspicious and not carried and (cur_frame - last_capture_frame) >= self.capture_every:
+                last_capture_frame = cur_frame
+                with metrics.timed("capture_submit"):
+                    self.writer.submit(annotated_frame, cur_frame, best_sus_score, self._add_capture)
+
+            window_frames += 1
+            now = time.perf_counter()
+            with self._lock:
+                state = self._state
+                state["frame"] = annotated_frame
+                state["frame_id"] += 1
+                state["frames_processed"] += 1
+                state["normal_count"] += normal
+                state["suspicious_count"] += len(alerts)
+                state["suspicious"] = frame_has_suspicious
+                if alerts:
+                    self.alerts.extendleft(alerts)
+                    state["alerts_version"] += 1
+                if now - window_start >= 1.0:
+                    state["fps"] = window_frames / (now - window_start)
+                    window_start, window_frames = now, 0
+                    metrics.gauge("detection_fps", state["fps"])
+                    metrics.gauge("capture_queue_depth", self.writer.stats()["queued"])
+            metrics.count("frames")
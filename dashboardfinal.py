@@ -1,26 +1,39 @@
 import streamlit as st
 import cv2
-import pandas as pd
-import xgboost as xgb
 import numpy as np
 import base64
 import os
-from datetime import datetime
+import time
 from detector import ShopliftingDetector
+from dashboard_worker import DetectionWorker
+from motion_gate import MotionGate
+from preview import PreviewEncoder
+from thumbnails import ThumbnailCache
+from capture_store import CaptureStore
+from capture_writer import CaptureWriter
+from event_log import EventLog
+import metrics
 import streamlit.components.v1 as components
 
 # ─── Helpers ────────────────────────────────────────────────────────────────────
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CAPTURES_DIR = os.path.join(BASE_DIR, "captures")
 os.makedirs(CAPTURES_DIR, exist_ok=True)
-
-def put_label(img, text, pos, color_bg, color_text=(255, 255, 255)):
-    font = cv2.FONT_HERSHEY_SIMPLEX
-    scale, thick = 0.6, 1
-    (tw, th), baseline = cv2.getTextSize(text, font, scale, thick)
-    x, y = pos
-    cv2.rectangle(img, (x, y - th - baseline - 4), (x + tw + 8, y + baseline), color_bg, -1)
-    cv2.putText(img, text, (x + 4, y), font, scale, color_text, thick, cv2.LINE_AA)
+# Capture retention, enforced when the dashboard process starts
+CAPTURE_MAX_FILES = 10000
+CAPTURE_MAX_MB    = 1024
+CAPTURE_MAX_DAYS  = 30
+# Newest captures loaded into a session (the gallery shows at most 50)
+CAPTURE_HISTORY   = 50
+# Captures waiting for the writer threads; when full the oldest is dropped
+CAPTURE_QUEUE     = 16
+CAPTURE_OVERFLOW  = 'drop_oldest'
+# Prometheus-text endpoint for the per-stage metrics (local only)
+METRICS_PORT = 9108
+# The worker stops once the page has not polled it for this long (tab closed, session gone)
+WORKER_HEARTBEAT_S = 15.0
+# Every alert is appended here; rotated at 10 MB, 5 old files kept
+EVENT_LOG = os.path.join(BASE_DIR, "logs", "events.jsonl")
 
 @st.cache_data
 def load_alert_sound_b64():
@@ -68,18 +81,25 @@ def set_alarm(state: str):
     </script>
     """, height=0)
 
-def save_capture(frame, frame_num, prob):
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"suspect_{ts}_f{frame_num}_s{prob:.2f}.jpg"
-    path = os.path.join(CAPTURES_DIR, filename)
-    cv2.imwrite(path, frame)
-    return path
-
-def img_to_b64(path):
-    if not os.path.exists(path):
-        return ""
-    with open(path, "rb") as f:
-        return base64.b64encode(f.read()).decode()
+@st.cache_resource
+def get_capture_store():
+    store = CaptureStore(CAPTURES_DIR, max_entries=CAPTURE_MAX_FILES,
+                         max_bytes=CAPTURE_MAX_MB * 1024 * 1024, max_age_days=CAPTURE_MAX_DAYS)
+    migrated = store.migrate()
+    pruned = store.prune()
+    if migrated or pruned:
+        print(f"Capture index: {migrated} files indexed, {pruned} pruned")
+    return store
+
+@st.cache_resource
+def get_event_log():
+    # One log shared by every session, so only one of them ever rotates the file
+    return EventLog(EVENT_LOG)
+
+@st.cache_resource
+def get_thumbnails():
+    # One thumbnail cache (and generator thread) shared by every session
+    return ThumbnailCache()
 
 # ─── Page Config ────────────────────────────────────────────────────────────────
 st.set_page_config(
@@ -233,13 +253,15 @@ defaults = {
     'frames_processed': 0, 'detector': None,
     'source_mode': None, 'rtsp_url': '',
     'webcam_index': 0, 'alarm_active': False,
-    'captures': [],
+    'captures': [], 'worker': None,
 }
 for k, v in defaults.items():
     if k not in st.session_state:
         st.session_state[k] = v
 
 inject_audio_controller()
+thumbs = get_thumbnails()
+store = get_capture_store()
 
 # ─── Header ─────────────────────────────────────────────────────────────────────
 st.markdown("""
@@ -330,6 +352,9 @@ with left_col:
     st.markdown(f'<div class="source-badge-sm">{badge_icon}&nbsp;{badge_text}</div>', unsafe_allow_html=True)
 
     if st.button("🔄 Change Source", use_container_width=True):
+        if st.session_state.worker is not None:
+            st.session_state.worker.stop()
+            st.session_state.worker = None
         st.session_state.source_mode = None
         st.session_state.running = False
         set_alarm('stop')
@@ -341,6 +366,41 @@ with left_col:
     sus_threshold  = st.slider("Suspicion",  0.3, 0.9, 0.5,  0.05, help="XGBoost threshold — below = Suspicious")
     sound_enabled  = st.checkbox("🔔 Alert Sound", value=True)
     max_captures   = st.slider("Max Captures", 6, 50, 20, 2)
+    capture_quality = st.slider("Capture Quality", 50, 100, 90, 5, help="JPEG quality of saved captures")
+    capture_width  = st.select_slider("Capture Width", options=[320, 480, 640, 800, 1018], value=1018,
+                                      help="Saved captures are downscaled to this width")
+    gate_enabled   = st.checkbox("🏃 Motion Gate", value=False, help="Skip pose estimation while nothing moves")
+    gate_sens      = st.slider("Motion Sensitivity", 0.0005, 0.02, 0.002, 0.0005, format="%.4f",
+                               help="Fraction of changed pixels that counts as motion", disabled=not gate_enabled)
+    gate_refresh   = st.slider("Gate Refresh", 10, 200, 50, 10,
+                               help="Force inference at least every N frames", disabled=not gate_enabled)
+    ui_hz          = st.slider("UI Refresh (Hz)", 2, 15, 8, 1,
+                               help="How often the page redraws; detection runs at its own pace")
+    draw_annotations = st.checkbox("🖍 Draw Annotations", value=True,
+                                   help="Skeletons, boxes and labels on the video and captures")
+    show_preview   = st.checkbox("📺 Live Preview", value=True, help="Nothing is encoded while the preview is off")
+    preview_width  = st.slider("Preview Width", 320, 1018, 640, 32, disabled=not show_preview)
+    preview_quality = st.slider("Preview Quality", 30, 95, 70, 5, help="JPEG quality", disabled=not show_preview)
+    preview_fps    = st.slider("Max Preview FPS", 1, 15, 8, 1, disabled=not show_preview)
+    # Metrics are process-wide: every session and the /metrics endpoint share one registry.
+    # The checkbox shows that shared state on every rerun and switches it for everyone
+    def toggle_metrics():
+        st.session_state.metrics_error = None
+        if not st.session_state.stage_metrics:
+            metrics.disable()
+            return
+        try:
+            metrics.serve(METRICS_PORT)
+        except OSError as e:
+            metrics.enable()
+            st.session_state.metrics_error = f"Metrics endpoint unavailable: {e}"
+
+    st.session_state.stage_metrics = metrics.enabled()
+    perf_enabled   = st.checkbox("📈 Stage Metrics (all sessions)", key="stage_metrics", on_change=toggle_metrics,
+                                 help=f"Time every stage, for every dashboard session at once; also served "
+                                      f"at http://127.0.0.1:{METRICS_PORT}/metrics")
+    if st.session_state.get("metrics_error"):
+        st.caption(st.session_state.metrics_error)
 
     # ── START / STOP Buttons ──
     st.markdown('<div class="ctrl-section">🎮 Controls</div>', unsafe_allow_html=True)
@@ -348,6 +408,8 @@ with left_col:
     stop_btn  = st.button("⏹ STOP Detection",  use_container_width=True)
 
     if stop_btn:
+        if st.session_state.worker is not None:
+            st.session_state.worker.stop()
         st.session_state.running = False
         set_alarm('stop')
 
@@ -355,11 +417,8 @@ with left_col:
 
     if st.button("Clear All Captures", use_container_width=True):
         st.session_state.captures = []
-        try:
-            for f in os.listdir(CAPTURES_DIR):
-                os.remove(os.path.join(CAPTURES_DIR, f))
-        except Exception:
-            pass
+        thumbs.clear()
+        store.clear()
         st.rerun()
 
     # ── Session Log ──
@@ -422,13 +481,17 @@ with right_col:
         "color:#334155; font-size:1rem;'>Press START to begin surveillance</div>",
         unsafe_allow_html=True
     )
+    stats_placeholder = st.empty()
+    if perf_enabled:
+        with st.expander("📈 Pipeline Metrics", expanded=False):
+            perf_placeholder = st.empty()
 
 # ─── Captures Gallery (full-width below) ────────────────────────────────────────
 st.markdown("<br>", unsafe_allow_html=True)
 st.markdown('<div class="section-title">&#128247; Captured Shoplifters</div>', unsafe_allow_html=True)
 gallery_placeholder = st.empty()
 
-def render_gallery(captures, max_n):
+def render_gallery(captures, max_n, wait=0.0):
     if not captures:
         gallery_placeholder.markdown(
             "<div style='color:#475569; font-size:0.83rem; padding:10px;'>"
@@ -437,14 +500,22 @@ def render_gallery(captures, max_n):
         )
         return
     shown = captures[:max_n]
+    if wait:
+        thumbs.wait([cap['path'] for cap in shown], wait)
     cards_html = '<div class="capture-gallery">'
     for cap in shown:
         try:
-            b64 = img_to_b64(cap['path'])
-            if b64:
+            # Cached thumbnails only; a miss is queued and shows up on a later render
+            b64 = thumbs.get(cap['path'])
+            if b64 is None:
+                img_html = ("<div style='height:110px; display:flex; align-items:center; justify-content:center;"
+                            "color:#475569; font-size:0.7rem;'>Loading…</div>")
+            else:
+                img_html = f'<img src="data:image/jpeg;base64,{b64}" alt="suspect"/>'
+            if b64 != "":
                 cards_html += (
                     f'<div class="capture-card">'
-                    f'<img src="data:image/jpeg;base64,{b64}" alt="suspect"/>'
+                    f'{img_html}'
                     f'<div class="cap-info">&#128680; {cap["time"]}</div>'
                     f'<div class="cap-score">Frame #{cap["frame"]} &nbsp;|&nbsp; Score {cap["score"]:.2f}</div>'
                     f'</div>'
@@ -454,7 +525,49 @@ def render_gallery(captures, max_n):
     cards_html += '</div>'
     gallery_placeholder.markdown(cards_html, unsafe_allow_html=True)
 
-render_gallery(st.session_state.captures, max_captures)
+render_gallery(st.session_state.captures, max_captures, wait=2.0)
+
+def render_stats(snap, preview=None):
+    line = f"Detection: {snap['fps']:.1f} fps"
+    if preview is not None:
+        line += f" · Preview: {preview.stats()['bytes_per_sec'] / 1024:.0f} KB/s"
+    w = snap["writer"]
+    dropped = w["dropped_oldest"] + w["dropped_newest"]
+    if w["queued"] or dropped or w["errors"]:
+        line += f" · Captures: {w['queued']} queued, {dropped} dropped, {w['errors']} failed"
+    g = snap["gate"]
+    if g is not None:
+        line += (f" · Motion gate: {g['skipped']}/{g['frames']} frames skipped ({g['skip_ratio']:.0%}), "
+                 f"{g['forced_refresh']} forced refreshes")
+    stats_placeholder.caption(line)
+
+def render_perf_panel():
+    m = metrics.REGISTRY
+    if m is None:
+        return
+    snap = m.snapshot()
+    rows = "".join(
+        f"| {name} | {s['p50'] * 1000:.1f} | {s['p95'] * 1000:.1f} | {s['p99'] * 1000:.1f} | {s['count']} |\n"
+        for name, s in sorted(snap["stages"].items())
+    )
+    table = "| Stage | p50 ms | p95 ms | p99 ms | Samples |\n|---|---:|---:|---:|---:|\n" + rows
+    extras = [f"{k}: {v:.1f}" if isinstance(v, float) else f"{k}: {v}" for k, v in sorted(snap["gauges"].items())]
+    extras += [f"{k}: {v}" for k, v in sorted(snap["counters"].items())]
+    perf_placeholder.markdown(table + ("\n" + " · ".join(extras) if extras else ""))
+
+def render_alerts(alerts):
+    alerts_html = '<div class="alert-scroll">'
+    alerts_html += "".join(
+        f'<div class="alert-item"><strong>&#128680; {a["time"]}</strong><br>'
+        f'Suspicious detected<br>'
+        f'<span style="color:#f87171; font-size:0.7rem;">Frame #{a["frame"]} &bull; Score: {a["conf"]:.3f}</span></div>'
+        for a in alerts[:20]
+    ) or "<div style='color:#475569; font-size:0.78rem; padding:8px;'>No alerts yet...</div>"
+    alerts_html += '</div>'
+    alert_placeholder.markdown(alerts_html, unsafe_allow_html=True)
+
+    log_lines = "\n".join(f"[{a['time']}] Frame#{a['frame']}" for a in alerts[:8])
+    log_placeholder.text(log_lines or "No events yet.")
 
 # ─── Detection Loop ──────────────────────────────────────────────────────────────
 if start_btn:
@@ -462,6 +575,11 @@ if start_btn:
         st.error("Please enter an RTSP URL before starting.")
         st.stop()
 
+    # Restarting replaces any worker that is still running
+    if st.session_state.worker is not None:
+        st.session_state.worker.stop()
+        st.session_state.worker = None
+
     st.session_state.suspicious_count = 0
     st.session_state.normal_count     = 0
     st.session_state.frames_processed = 0
@@ -469,23 +587,9 @@ if start_btn:
     st.session_state.alarm_active     = False
     st.session_state.running          = True
 
-    # Reload disk captures if session is empty
+    # Reload the newest disk captures if session is empty
     if not st.session_state.captures:
-        try:
-            files = [os.path.join(CAPTURES_DIR, f) for f in os.listdir(CAPTURES_DIR) if f.endswith('.jpg')]
-            files.sort(key=os.path.getmtime, reverse=True)
-            for f in files:
-                fname = os.path.basename(f)
-                try:
-                    parts = fname.split('_')
-                    ts_str = f"{parts[2][:2]}:{parts[2][2:4]}:{parts[2][4:]}"
-                    frm = int(parts[3][1:])
-                    sc  = float(parts[4][1:-4])
-                    st.session_state.captures.append({'path': f, 'time': ts_str, 'frame': frm, 'score': sc})
-                except:
-                    st.session_state.captures.append({'path': f, 'time': 'Unknown', 'frame': 0, 'score': 0.0})
-        except:
-            pass
+        st.session_state.captures = store.recent(CAPTURE_HISTORY)
 
     if st.session_state.detector is None:
         with st.spinner("Loading AI models (YOLO + XGBoost)..."):
@@ -523,123 +627,99 @@ if start_btn:
     # Seek back to start after preflight read
     cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
 
-    last_capture_frame = -60
+    gate = MotionGate(sensitivity=gate_sens, refresh_every=gate_refresh) if gate_enabled else None
+    writer = CaptureWriter(CAPTURES_DIR, store=store, queue_size=CAPTURE_QUEUE, quality=capture_quality,
+                           width=capture_width, overflow=CAPTURE_OVERFLOW)
+    worker = DetectionWorker(detector, cap, cv_source, live=(mode != 'file'), writer=writer,
+                             conf_threshold=conf_threshold, sus_threshold=sus_threshold, gate=gate,
+                             event_log=get_event_log(), render=draw_annotations,
+                             heartbeat_timeout=WORKER_HEARTBEAT_S)
+    worker.start()
+    st.session_state.worker = worker
+
+# ─── UI Refresh ──────────────────────────────────────────────────────────────────
+# Detection runs on the worker thread; this loop only redraws what changed since the last
+# poll. Widget changes rerun the script, which lands back here while the worker keeps going.
+worker = st.session_state.worker
+if worker is not None:
+    worker.conf_threshold = conf_threshold
+    worker.sus_threshold  = sus_threshold
+    if st.session_state.alerts:
+        render_alerts(st.session_state.alerts)
+
+    preview = PreviewEncoder(preview_width, preview_quality, preview_fps) if show_preview else None
+    if preview is None:
+        video_placeholder.markdown(
+            "<div style='color:#475569; font-size:0.83rem; padding:10px;'>Preview off — detection is still running.</div>",
+            unsafe_allow_html=True
+        )
 
-    while cap.isOpened() and st.session_state.running:
-        ret, frame = cap.read()
-        if not ret:
-            if mode == 'file':
-                st.session_state.running = False
-                break
-            else:
-                cap.release()
-                cap = cv2.VideoCapture(cv_source)
-                continue
-
-        frame = cv2.resize(frame, (1018, 600))
-        results = detector.model_yolo(frame, verbose=False)
-        annotated_frame = results[0].plot(boxes=False)
-
-        frame_has_suspicious = False
-        best_sus_score = 0.0
-
-        for r in results:
-            bound_box = r.boxes.xyxy
-            conf      = r.boxes.conf.tolist()
-            keypoints = r.keypoints.xyn.tolist()
-
-            for index, box in enumerate(bound_box):
-                if conf[index] < conf_threshold:
-                    continue
-                x1, y1, x2, y2 = box.tolist()
-                kp = keypoints[index]
-                if len(kp) == 0:
-                    continue
-
-                cols, vals = [], []
-                for j in range(len(kp)):
-                    cols.append(f'x{j}'); vals.append(kp[j][0])
-                    cols.append(f'y{j}'); vals.append(kp[j][1])
-
-                df_kp    = pd.DataFrame([vals], columns=cols)
-                dmatrix  = xgb.DMatrix(df_kp)
-                sus_prob = detector.model.predict(dmatrix)
-                prob_val = float(sus_prob[0]) if hasattr(sus_prob, '__len__') else float(sus_prob)
-                pred     = 0 if prob_val < sus_threshold else 1
-
-                if pred == 0:
-                    frame_has_suspicious = True
-                    conf_score = 1.0 - prob_val
-                    if conf_score > best_sus_score:
-                        best_sus_score = conf_score
-                    st.session_state.suspicious_count += 1
-                    cv2.rectangle(annotated_frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 0, 255), 3)
-                    put_label(annotated_frame, "!! SUSPICIOUS", (int(x1), max(int(y1) - 4, 20)), (180, 0, 0))
-                    ts = datetime.now().strftime("%H:%M:%S")
-                    st.session_state.alerts.insert(0, {
-                        "time": ts, "label": "Suspicious",
-                        "frame": st.session_state.frames_processed,
-                        "conf": prob_val
-                    })
-                else:
-                    st.session_state.normal_count += 1
-                    cv2.rectangle(annotated_frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 200, 80), 2)
-                    put_label(annotated_frame, "Normal", (int(x1), max(int(y1) - 4, 20)), (0, 140, 60))
-
-        # Save capture
-        cur_frame = st.session_state.frames_processed
-        if frame_has_suspicious and (cur_frame - last_capture_frame) >= 45:
-            last_capture_frame = cur_frame
-            try:
-                path = save_capture(annotated_frame, cur_frame, best_sus_score)
-                st.session_state.captures.insert(0, {
-                    "path": path, "time": datetime.now().strftime("%H:%M:%S"),
-                    "frame": cur_frame, "score": best_sus_score
-                })
-                render_gallery(st.session_state.captures, max_captures)
-            except Exception as e:
-                print(f"Capture error: {e}")
+    shown_metrics, shown_alerts, shown_thumbs = None, None, thumbs.version
+    next_stats = 0.0
+    while True:
+        worker.heartbeat()
+        snap = worker.snapshot()
+        ui_start = time.perf_counter()
+
+        new_captures = worker.take_captures()
+        for capture in new_captures:
+            thumbs.submit(capture["path"])
+        if new_captures:
+            st.session_state.captures[:0] = new_captures
+            del st.session_state.captures[CAPTURE_HISTORY:]
+        if new_captures or thumbs.version != shown_thumbs:
+            shown_thumbs = thumbs.version
+            render_gallery(st.session_state.captures, max_captures)
+
+        # JPEG goes to the browser as-is: no full-size RGB frame, no re-encode by Streamlit
+        if preview is not None:
+            jpeg = preview.encode(snap["frame"], snap["frame_id"])
+            if jpeg is not None:
+                video_placeholder.image(jpeg, use_container_width=True)
+
+        counts = (snap["suspicious_count"], snap["normal_count"], snap["frames_processed"], snap["running"])
+        if counts != shown_metrics:
+            shown_metrics = counts
+            (st.session_state.suspicious_count, st.session_state.normal_count,
+             st.session_state.frames_processed, _) = counts
+            render_metrics(*counts)
+
+        if snap["alerts_version"] != shown_alerts:
+            shown_alerts = snap["alerts_version"]
+            st.session_state.alerts = snap["alerts"]
+            render_alerts(snap["alerts"])
 
         # Alarm control
+        suspicious = snap["suspicious"] and snap["running"]
         if sound_enabled:
-            if frame_has_suspicious and not st.session_state.alarm_active:
+            if suspicious and not st.session_state.alarm_active:
                 set_alarm('play')
                 st.session_state.alarm_active = True
-            elif not frame_has_suspicious and st.session_state.alarm_active:
+            elif not suspicious and st.session_state.alarm_active:
                 set_alarm('stop')
                 st.session_state.alarm_active = False
 
-        st.session_state.frames_processed += 1
-
-        # Update video feed
-        frame_rgb = cv2.cvtColor(annotated_frame, cv2.COLOR_BGR2RGB)
-        video_placeholder.image(frame_rgb, channels="RGB", use_container_width=True)
-
-        # Update metrics
-        render_metrics(st.session_state.suspicious_count, st.session_state.normal_count,
-                       st.session_state.frames_processed, True)
-
-        # Update alerts panel (left panel)
-        alerts_html = '<div class="alert-scroll">'
-        alerts_html += "".join(
-            f'<div class="alert-item"><strong>&#128680; {a["time"]}</strong><br>'
-            f'Suspicious detected<br>'
-            f'<span style="color:#f87171; font-size:0.7rem;">Frame #{a["frame"]} &bull; Score: {a["conf"]:.3f}</span></div>'
-            for a in st.session_state.alerts[:20]
-        ) or "<div style='color:#475569; font-size:0.78rem; padding:8px;'>No alerts yet...</div>"
-        alerts_html += '</div>'
-        alert_placeholder.markdown(alerts_html, unsafe_allow_html=True)
+        now = time.monotonic()
+        if now >= next_stats or not snap["running"]:
+            render_stats(snap, preview)
+            if perf_enabled:
+                render_perf_panel()
+            next_stats = now + 1.0
 
-        # Update session log
-        log_lines = "\n".join(f"[{a['time']}] Frame#{a['frame']}" for a in st.session_state.alerts[:8])
-        log_placeholder.text(log_lines or "No events yet.")
+        metrics.observe("ui_push", time.perf_counter() - ui_start)
+        if not snap["running"]:
+            break
+        time.sleep(1.0 / ui_hz)
 
-    cap.release()
+    st.session_state.worker = None
     set_alarm('stop')
     st.session_state.alarm_active = False
     st.session_state.running = False
 
     render_metrics(st.session_state.suspicious_count, st.session_state.normal_count,
                    st.session_state.frames_processed, False)
-    render_gallery(st.session_state.captures, max_captures)
-    st.success(f"✅ Detection stopped. {len(st.session_state.captures)} suspicious frames captured.")
+    render_gallery(st.session_state.captures, max_captures, wait=2.0)
+    if worker.error:
+        st.error(f"Detection stopped with an error: {worker.error}")
+    else:
+        st.success(f"✅ Detection stopped. {len(st.session_state.captures)} suspicious frames captured.")
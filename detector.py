@@ -1,88 +1,235 @@
 import cv2
-import pandas as pd
-from ultralytics import YOLO
-import xgboost as xgb
 import numpy as np
-import cvzone
 import time
+import metrics
+from features import FRAME_SIZE, keypoints_to_features, to_numpy
+from temporal import push_tracked
 
 class ShopliftingDetector:
-    def __init__(self, model_path='trained_model.json', yolo_path='yolo11n-pose.pt'):
-        self.model_yolo = YOLO(yolo_path)
-        self.model = xgb.Booster()
+    def __init__(self, model_path='trained_model.json', yolo_path='yolo11n-pose.pt', backend='xgboost', render=True,
+                 pose_model=None):
+        # pose_model: an already loaded model that answers like YOLO(yolo_path), used instead of
+        # loading yolo_path (ultralytics is then never imported)
+        from renderer import FrameRenderer
+        if pose_model is None:
+            from ultralytics import YOLO
+            pose_model = YOLO(yolo_path)
+        self.model_yolo = pose_model
+        self.backend = backend
+        # render=False: annotate()/draw_persons() hand frames back untouched
+        self.renderer = FrameRenderer(enabled=render)
         try:
-            self.model.load_model(model_path)
+            if backend == 'numpy':
+                # Pure NumPy forest, xgboost is never imported
+                from forest import TreeEnsemble
+                self.model = TreeEnsemble.from_json(model_path)
+            elif backend == 'xgboost':
+                import xgboost as xgb
+                self.model = xgb.Booster()
+                self.model.load_model(model_path)
+            else:
+                raise ValueError(f"Unknown classifier backend: {backend}")
         except Exception as e:
-            print(f"Error loading XGBoost model: {e}")
-            raise e
+            print(f"Error loading {backend} classifier model {model_path}: {e}")
+            raise
 
-    def process_video(self, video_path):
-        cap = cv2.VideoCapture(video_path)
+    def predict_proba(self, features):
+        # One call for every person in the frame instead of a DataFrame + DMatrix each
+        if len(features) == 0:
+            return np.empty(0, dtype=np.float32)
+        if self.backend == 'numpy':
+            return self.model.predict(features)
+        return self.model.inplace_predict(features)
+
+    def classify(self, r, conf_threshold=0.55, cache=None):
+        # Score every confident person of one YOLO result; returns box, (17, 2) normalized
+        # keypoints, probability and 0/1 prediction (plus track_id when tracking).
+        # One call per frame: it ticks the cache, also when nobody is in view
+        if cache is not None:
+            cache.tick()
+        if r.keypoints is None:
+            return []
+        track_ids = r.boxes.id
+        return self.classify_arrays(r.boxes.xyxy, r.boxes.conf, r.keypoints.xyn, conf_threshold,
+                                    track_ids=track_ids, cache=cache)
+
+    def classify_arrays(self, boxes, conf, xyn, conf_threshold=0.55, track_ids=None, cache=None):
+        # Same as classify() for boxes/confidences/keypoints that did not come straight from YOLO.
+        # With track ids and a track_cache.TrackCache, unchanged tracks reuse their last score;
+        # the caller ticks the cache once per frame, as classify() does.
+        bound_box = to_numpy(boxes).tolist()
+        conf = to_numpy(conf).tolist()
+        keep = [index for index, c in enumerate(conf) if c > conf_threshold]
+        if not keep:
+            return []
+        xyn = to_numpy(xyn)
+        if xyn.ndim == 2:
+            # One person's keypoints without the person axis
+            xyn = xyn[None]
+        with metrics.timed("features"):
+            features = keypoints_to_features(xyn)
+        if len(features) != len(conf):
+            raise ValueError(f"{len(conf)} boxes but {len(features)} keypoint sets")
+        ids = [int(t) for t in to_numpy(track_ids).tolist()] if track_ids is not None else None
+        with metrics.timed("classifier"):
+            if cache is not None and ids is not None:
+                sus = cache.score([ids[index] for index in keep], features[keep], self.predict_proba)
+            else:
+                sus = self.predict_proba(features[keep])
+        persons = [
+            {"box": bound_box[index], "keypoints": xyn[index], "prob": float(prob), "pred": int(prob > 0.5)}
+            for index, prob in zip(keep, sus)
+        ]
+        if ids is not None:
+            for index, person in zip(keep, persons):
+                person["track_id"] = ids[index]
+        metrics.count("persons", len(persons))
+        return persons
+
+    def update_history(self, history, r, persons, frame_idx, fps):
+        # On the history's grid frames push every tracked pose of r, as collect.collect does,
+        # then attach each tracked person's temporal feature row (NaN without a history yet)
+        if history.due(frame_idx, fps):
+            push_tracked(history, r)
+        tracked = [p for p in persons if "track_id" in p]
+        for person, row in zip(tracked, history.features([p["track_id"] for p in tracked])):
+            person["temporal"] = row
+
+    def annotate(self, r, persons, out=None):
+        # Skeletons of every detection plus boxes and labels, drawn in one pass into `out`. By
+        # default that is the renderer's reusable buffer, so the caller's frame stays clean
+        # without a new array per frame, but the result is overwritten by the next call.
+        # Callers that own the frame, or keep annotated frames, pass out=r.orig_img
+        kp = r.keypoints
+        xy = to_numpy(kp.xy) if kp is not None else None
+        kpt_conf = to_numpy(kp.conf) if kp is not None and kp.conf is not None else None
+        with metrics.timed("render"):
+            if out is None and self.renderer.enabled:
+                out = self.renderer.buffer(r.orig_img)
+            return self.renderer.render(r.orig_img, persons, xy, kpt_conf, out=out)
+
+    def draw_persons(self, annotated_frame, persons):
+        # Boxes and labels only
+        return self.renderer.render(annotated_frame, persons, skeletons=False)
+
+    def detections_for(self, persons, frame_idx):
+        metrics.count("frames")
+        metrics.count("detections", sum(1 for person in persons if person["pred"] == 0))
+        return [
+            {
+                "time": time.strftime("%H:%M:%S"),
+                "frame": frame_idx,
+                "type": "Suspicious Behavior",
+                "confidence": person["prob"]
+            }
+            for person in persons if person["pred"] == 0
+        ]
+
+    def process_result(self, r, frame_idx):
+        persons = self.classify(r)
+        return self.annotate(r, persons), self.detections_for(persons, frame_idx)
+
+    def process_video(self, video_path, batch_size=1, gate=None, roi=None, cache=None, history=None):
+        """Yield (annotated_frame, detections) for every frame of the video.
+
+        With batch_size > 1, that many decoded frames go through the pose model in a
+        single call; results are still yielded one frame at a time, in order.
+        With a motion_gate.MotionGate, frames it judges static skip pose estimation and
+        classification: they reuse the previous frame's annotation and have no detections.
+        With a roi.RoiCropper, only the camera's regions of interest go to the pose model; crops
+        are not tracked, so it cannot be combined with a cache or history.
+        With a track_cache.TrackCache, people are tracked (frames go through the tracker one
+        at a time) and only tracks whose pose changed are re-scored.
+        With a temporal.TrackHistory (also tracking), each person gets its "temporal" feature row;
+        poses go into the history on its SAMPLE_HZ grid of the video's frame rate.
+        video_path may also be an already opened capture (anything with isOpened/read/release).
+        """
+        if roi is not None and (cache is not None or history is not None):
+            raise ValueError("roi cannot be combined with cache or history: ROI crops are not tracked")
+        cap = video_path if hasattr(video_path, 'read') else cv2.VideoCapture(video_path)
         if not cap.isOpened():
             print("Error: Could not open video.")
             return
 
-        fps = int(cap.get(cv2.CAP_PROP_FPS))
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         frame_tot = 0
+        batch = []
+        last = None
+        # Cameras that report no frame rate are taken as 25 fps for the history's grid
+        fps = (cap.get(cv2.CAP_PROP_FPS) or 25.0) if history is not None else None
+
+        try:
+            while cap.isOpened():
+                with metrics.timed("decode"):
+                    success, frame = cap.read()
+                if success:
+                    # Resize for consistent processing
+                    with metrics.timed("resize"):
+                        frame = cv2.resize(frame, FRAME_SIZE)
+                    if gate is None:
+                        run = True
+                    else:
+                        with metrics.timed("gate"):
+                            run = gate.should_infer(frame)
+                    batch.append((frame, run))
+
+                if batch and (len(batch) >= batch_size or not success):
+                    to_infer = [(frame_tot + k, f) for k, (f, run) in enumerate(batch) if run]
+                    outputs = []
+                    if roi is not None:
+                        # Frames are resized copies of our own, so annotations go straight into them
+                        outputs = [roi.process(self, f, out=f) for _, f in to_infer]
+                    elif cache is not None or history is not None:
+                        for k, (f, run) in enumerate(batch):
+                            if not run:
+                                # Gated frames still age the cache, in frame order
+                                if cache is not None:
+                                    cache.tick()
+                                continue
+                            frame_idx = frame_tot + k
+                            with metrics.timed("pose"):
+                                r = self.model_yolo.track(f, persist=True, verbose=False)[0]
+                            persons = self.classify(r, cache=cache)
+                            if history is not None:
+                                self.update_history(history, r, persons, frame_idx, fps)
+                            outputs.append((self.annotate(r, persons, out=r.orig_img), persons))
+                    elif to_infer:
+                        # Run YOLO on the whole batch at once
+                        with metrics.timed("pose"):
+                            results = self.model_yolo([f for _, f in to_infer], verbose=False)
+                        for r in results:
+                            persons = self.classify(r)
+                            outputs.append((self.annotate(r, persons, out=r.orig_img), persons))
+                    outputs = iter(outputs)
+                    for _, run in batch:
+                        if run:
+                            last = next(outputs)
+                            yield last[0], self.detections_for(last[1], frame_tot)
+                        else:
+                            # Nobody was looked at: no detections, or one person would alert again
+                            # for every frame the gate holds
+                            yield last[0].copy(), self.detections_for([], frame_tot)
+                        frame_tot += 1
+                    batch = []
+
+                if not success:
+                    break
+        finally:
+            cap.release()
+
+    def process_video_pipelined(self, video_path, live=None, queue_size=4):
+        """Pipelined process_video: decode, infer, classify and render run on separate threads.
+
+        Returns a pipeline.Pipeline; iterate it for (annotated_frame, detections) and call
+        its stats() for queue depths and per-stage throughput. Live sources (webcam index,
+        rtsp://...) drop the oldest queued frame when a stage falls behind; files never drop.
+        """
+        from pipeline import Pipeline
+        return Pipeline(self, video_path, live=live, queue_size=queue_size)
+
+    def process_video_adaptive(self, video_path, controller=None):
+        """process_video with a content-adaptive pose stride (see adaptive.py).
 
-        while cap.isOpened():
-            success, frame = cap.read()
-            if not success:
-                break
-            
-            # Resize for consistent processing
-            frame = cv2.resize(frame, (1018, 600))
-            
-            # Run YOLO
-            results = self.model_yolo(frame, verbose=False)
-            annotated_frame = results[0].plot(boxes=False)
-            
-            detections = []
-            
-            for r in results:
-                bound_box = r.boxes.xyxy
-                conf = r.boxes.conf.tolist()
-                keypoints = r.keypoints.xyn.tolist()
-                
-                for index, box in enumerate(bound_box):
-                    if conf[index] > 0.55:
-                        x1, y1, x2, y2 = box.tolist()
-                        
-                        # Prepare data
-                        data = {}
-                        if len(keypoints[index]) == 0:
-                            continue
-
-                        for j in range(len(keypoints[index])):
-                            data[f'x{j}'] = keypoints[index][j][0]
-                            data[f'y{j}'] = keypoints[index][j][1]
-                        
-                        df = pd.DataFrame(data, index=[0])
-                        dmatrix = xgb.DMatrix(df)
-                        
-                        sus = self.model.predict(dmatrix)
-                        # Handle prediction format
-                        binary_predictions = (sus > 0.5).astype(int)
-                        pred = int(binary_predictions[0]) if hasattr(binary_predictions, '__len__') else int(binary_predictions)
-                        
-                        label = "Suspicious" if pred == 0 else "Normal"
-                        color = (0, 0, 255) if pred == 0 else (0, 255, 0)
-                        
-                        # Draw bounding box and label
-                        cv2.rectangle(annotated_frame, (int(x1), int(y1)), (int(x2), int(y2)), color, 2)
-                        cvzone.putTextRect(annotated_frame, label, (int(x1), int(y1)), 1, 1)
-                        
-                        if pred == 0:
-                            detections.append({
-                                "time": time.strftime("%H:%M:%S"),
-                                "frame": frame_tot,
-                                "type": "Suspicious Behavior",
-                                "confidence": float(sus[0]) if hasattr(sus, '__len__') else float(sus)
-                            })
-            
-            frame_tot += 1
-            yield annotated_frame, detections
-
-        cap.release()
+        Pass an adaptive.AdaptiveStride to tune it and read its report() afterwards.
+        """
+        from adaptive import process_video_adaptive
+        return process_video_adaptive(self, video_path, controller)
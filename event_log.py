@@ -0,0 +1,67 @@
+import json
+import os
+import threading
+import time
+
+
+class EventLog:
+    """Append-only JSON-lines log that rotates at `max_bytes`.
+
+    events.jsonl rolls over to events.jsonl.1, .1 to .2 and so on; the oldest beyond
+    `backups` is deleted. Writes are buffered and flushed at most every `flush_every`
+    seconds (and on flush/close), so logging a busy frame costs one buffered write. One
+    EventLog may be shared by several threads; give every writer of a path the same one,
+    since each instance rotates on its own count of the file's bytes.
+    """
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backups=5, flush_every=1.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_every = flush_every
+        self.written = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._f = open(path, 'ab')
+        self._size = self._f.tell()
+        self._last_flush = time.monotonic()
+
+    def write(self, events):
+        if not events:
+            return
+        # max_bytes counts bytes on disk, not characters
+        data = "".join(json.dumps(e, separators=(',', ':')) + "\n" for e in events).encode('utf-8')
+        with self._lock:
+            if self._size and self._size + len(data) > self.max_bytes:
+                self._rotate()
+            self._f.write(data)
+            self._size += len(data)
+            self.written += len(events)
+            now = time.monotonic()
+            if now - self._last_flush >= self.flush_every:
+                self._f.flush()
+                self._last_flush = now
+
+    def flush(self):
+        with self._lock:
+            if not self._f.closed:
+                self._f.flush()
+                self._last_flush = time.monotonic()
+
+    def _rotate(self):
+        self._f.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._f = open(self.path, 'ab')
+        self._size = 0
+
+    def close(self):
+        with self._lock:
+            if not self._f.closed:
+                self._f.close()
@@ -0,0 +1,33 @@
+import numpy as np
+
+NUM_KEYPOINTS = 17
+
+# Every frame is resized to this before pose estimation
+FRAME_SIZE = (1018, 600)
+
+# Column order the XGBoost model was trained on (see Normal.py / Suspicious.py)
+FEATURE_NAMES = [f'{axis}{j}' for j in range(NUM_KEYPOINTS) for axis in ('x', 'y')]
+
+
+def to_numpy(t):
+    # YOLO results hold torch tensors; everything else is already array-like
+    if hasattr(t, 'cpu'):
+        t = t.cpu().numpy()
+    return np.asarray(t)
+
+
+def keypoints_to_features(xyn):
+    """Turn (N, 17, 2) normalized keypoints into an (N, 34) float32 matrix ordered x0, y0, x1, y1, ...
+
+    A single person's (17, 2) keypoints give one row and an empty array gives none; any other
+    shape raises ValueError.
+    """
+    kp = to_numpy(xyn)
+    if kp.size == 0:
+        return np.empty((0, NUM_KEYPOINTS * 2), dtype=np.float32)
+    if kp.ndim == 2:
+        # One person's keypoints without the person axis
+        kp = kp[None]
+    if kp.ndim != 3 or kp.shape[1:] != (NUM_KEYPOINTS, 2):
+        raise ValueError(f"Expected (N, {NUM_KEYPOINTS}, 2) keypoints, got shape {kp.shape}")
+    return np.ascontiguousarray(kp.reshape(kp.shape[0], kp.shape[1] * kp.shape[2]), dtype=np.float32)
@@ -0,0 +1,106 @@
+import json
+import math
+
+import numpy as np
+
+
+def _parse_base_score(raw):
+    # XGBoost 3.x writes vector-valued params like "[5E-1]"
+    return float(str(raw).strip('[]').split(',')[0])
+
+
+class TreeEnsemble:
+    """XGBoost binary:logistic forest flattened into NumPy arrays, evaluated without xgboost.
+
+    All trees share one node table (feature, threshold, left, right, default_left, value).
+    Leaves point at themselves, so every person walks every tree for `depth` steps with
+    vectorized gathers.
+    """
+
+    def __init__(self, feature, threshold, left, right, default_left, value, roots, depth, base_margin):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.base_margin = np.float32(base_margin)
+
+    @classmethod
+    def from_json(cls, path):
+        with open(path) as f:
+            learner = json.load(f)['learner']
+
+        objective = learner['objective']['name']
+        if objective != 'binary:logistic':
+            raise ValueError(f"Unsupported objective for NumPy backend: {objective}")
+        base_score = _parse_base_score(learner['learner_model_param']['base_score'])
+        base_margin = math.log(base_score / (1.0 - base_score))
+
+        trees = learner['gradient_booster']['model']['trees']
+        feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+        depth = 0
+        offset = 0
+        for tree in trees:
+            if any(t != 0 for t in tree.get('split_type', [])):
+                raise ValueError("Categorical splits are not supported by the NumPy backend")
+            lc = np.asarray(tree['left_children'], dtype=np.int32)
+            rc = np.asarray(tree['right_children'], dtype=np.int32)
+            cond = np.asarray(tree['split_conditions'], dtype=np.float32)
+            n = len(lc)
+            own = np.arange(n, dtype=np.int32)
+            is_leaf = lc == -1
+
+            feature.append(np.where(is_leaf, 0, tree['split_indices']).astype(np.int32))
+            threshold.append(np.where(is_leaf, 0.0, cond).astype(np.float32))
+            left.append(np.where(is_leaf, own, lc) + offset)
+            right.append(np.where(is_leaf, own, rc) + offset)
+            default_left.append(np.asarray(tree['default_left'], dtype=bool))
+            # Leaf values live in split_conditions
+            value.append(np.where(is_leaf, cond, 0.0).astype(np.float32))
+            roots.append(offset)
+            depth = max(depth, _tree_depth(lc, rc))
+            offset += n
+
+        return cls(
+            np.concatenate(feature), np.concatenate(threshold),
+            np.concatenate(left).astype(np.int32), np.concatenate(right).astype(np.int32),
+            np.concatenate(default_left), np.concatenate(value),
+            np.asarray(roots, dtype=np.int32), depth, base_margin,
+        )
+
+    @property
+    def num_trees(self):
+        return len(self.roots)
+
+    def predict_margin(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        n = X.shape[0]
+        node = np.broadcast_to(self.roots, (n, self.num_trees)).copy()
+        rows = np.arange(n)[:, None]
+        for _ in range(self.depth):
+            x = X[rows, self.feature[node]]
+            go_left = np.where(np.isnan(x), self.default_left[node], x < self.threshold[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+        leaves = self.value[node]
+        # Accumulate tree by tree in float32, the way XGBoost's CPU predictor does
+        margin = np.full(n, self.base_margin, dtype=np.float32)
+        for t in range(self.num_trees):
+            margin += leaves[:, t]
+        return margin
+
+    def predict(self, X):
+        margin = self.predict_margin(X)
+        return (np.float32(1.0) / (np.float32(1.0) + np.exp(-margin))).astype(np.float32)
+
+
+def _tree_depth(left, right):
+    depth = np.zeros(len(left), dtype=np.int32)
+    # XGBoost stores parents before their children
+    for i in range(len(left)):
+        if left[i] != -1:
+            depth[left[i]] = depth[i] + 1
+            depth[right[i]] = depth[i] + 1
+    return int(depth.max())
@@ -1,3 +1,4 @@
+# Superseded by collect_parallel.py, which labels crops from its manifest; kept for the Normal.py/Suspicious.py flow
 import os
 import shutil
 
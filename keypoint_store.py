@@ -0,0 +1,218 @@
+"""Columnar keypoint store: typed, append-only parts of .npy columns, read memory-mapped.
+
+Layout of a store directory:
+    schema.json               column -> dtype and per-row shape, fixed by the first append
+    part-00000/<column>.npy   one array per column, first axis = rows
+    part-00000/meta.json      row count and the distinct values of string columns
+Every append() adds a part, written to a temporary directory and renamed into place, so a
+reader never sees half a part and nothing already written is rewritten. Numeric columns
+are opened with np.load(mmap_mode='r'), so a read only touches the columns asked for.
+String columns (video, image_name) are dictionary-encoded: int32 codes on disk, values in
+meta.json. (NPZ members cannot be memory-mapped, hence plain .npy files.)
+
+Columns written by collect.py:
+    xy          (17, 2) float32  normalized keypoints, x0, y0, x1, ... as in the CSV
+    conf        (17,)   float32  keypoint confidences
+    box         (4,)    float32  x1, y1, x2, y2 in pixels
+    video       str              source video
+    timestamp_ms        float64  sample time in the video
+    frame               int64    decoded frame index
+    image_name  str              crop file name
+    label               int8     0 Suspicious, 1 Normal, -1 unlabelled (model.py's mapping)
+plus `temporal` (136,) float32 when collected with temporal features.
+
+    python keypoint_store.py import nkeypoint.csv --out keypoints [--label Normal]
+    python keypoint_store.py info keypoints
+"""
+import argparse
+import json
+import os
+import re
+
+import numpy as np
+
+from features import FEATURE_NAMES, NUM_KEYPOINTS
+
+LABEL_CODES = {'Suspicious': 0, 'Normal': 1}
+UNLABELLED = -1
+SCHEMA_NAME = 'schema.json'
+META_NAME = 'meta.json'
+STRING = 'str'
+
+
+def _write_json(path, data):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+class KeypointStore:
+    def __init__(self, path):
+        self.path = path
+        schema_path = os.path.join(path, SCHEMA_NAME)
+        self.schema = _read_json(schema_path) if os.path.exists(schema_path) else None
+
+    @property
+    def columns(self):
+        return list(self.schema["columns"]) if self.schema else []
+
+    def parts(self):
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(os.path.join(self.path, n) for n in os.listdir(self.path) if re.fullmatch(r'part-\d+', n))
+
+    def __len__(self):
+        return sum(_read_json(os.path.join(part, META_NAME))["rows"] for part in self.parts())
+
+    def _spec(self, columns):
+        spec = {}
+        for name, arr in columns.items():
+            if arr.dtype.kind in 'OUS':
+                spec[name] = {"dtype": STRING, "shape": []}
+            else:
+                spec[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape[1:])}
+        return spec
+
+    def append(self, columns):
+        """Write {column: array with one row per entry} as a new part; returns its path."""
+        columns = {name: np.asarray(values) for name, values in columns.items()}
+        lengths = {len(arr) for arr in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError(f"Columns have different lengths: { {n: len(a) for n, a in columns.items()} }")
+        rows = lengths.pop()
+
+        spec = self._spec(columns)
+        if self.schema is None:
+            os.makedirs(self.path, exist_ok=True)
+            self.schema = {"version": 1, "columns": spec}
+            _write_json(os.path.join(self.path, SCHEMA_NAME), self.schema)
+        else:
+            expected = self.schema["columns"]
+            if set(spec) != set(expected):
+                raise ValueError(f"{self.path} has columns {sorted(expected)}, got {sorted(spec)}")
+            for name, s in spec.items():
+                e = expected[name]
+                if (s["dtype"] == STRING) != (e["dtype"] == STRING) or s["shape"] != e["shape"]:
+                    raise ValueError(f"Column {name} is {e}, got {s}")
+                if e["dtype"] != STRING:
+                    # Same kind of data: store it as the schema's type (e.g. float64 -> float32)
+                    columns[name] = columns[name].astype(e["dtype"], copy=False)
+
+        parts = self.parts()
+        number = int(os.path.basename(parts[-1])[5:]) + 1 if parts else 0
+        final = os.path.join(self.path, f'part-{number:05d}')
+        tmp = os.path.join(self.path, f'.tmp-part-{number:05d}-{os.getpid()}')
+        os.makedirs(tmp)
+        meta = {"rows": rows, "strings": {}}
+        for name, arr in columns.items():
+            if self.schema["columns"][name]["dtype"] == STRING:
+                values, codes = np.unique(arr.astype(str), return_inverse=True)
+                meta["strings"][name] = values.tolist()
+                arr = codes.astype(np.int32)
+            np.save(os.path.join(tmp, f'{name}.npy'), np.ascontiguousarray(arr))
+        _write_json(os.path.join(tmp, META_NAME), meta)
+        os.replace(tmp, final)
+        return final
+
+    def _empty(self, name):
+        spec = self.schema["columns"][name]
+        dtype = object if spec["dtype"] == STRING else np.dtype(spec["dtype"])
+        return np.empty([0] + spec["shape"], dtype=dtype)
+
+    def read(self, columns=None, mmap=True):
+        """{column: array} over every part, for the requested columns only.
+
+        Numeric columns of a single-part store come back as read-only memory maps; with
+        several parts they are concatenated (only those columns are read). String columns
+        are decoded to object arrays.
+        """
+        if self.schema is None:
+            raise FileNotFoundError(f"No keypoint store at {self.path}")
+        names = list(columns) if columns is not None else self.columns
+        unknown = set(names) - set(self.columns)
+        if unknown:
+            raise KeyError(f"Unknown column(s): {', '.join(sorted(unknown))}")
+        chunks = {name: [] for name in names}
+        for part in self.parts():
+            meta = _read_json(os.path.join(part, META_NAME))
+            for name in names:
+                arr = np.load(os.path.join(part, f'{name}.npy'), mmap_mode='r' if mmap else None)
+                if name in meta["strings"]:
+                    arr = np.asarray(meta["strings"][name], dtype=object)[arr]
+                chunks[name].append(arr)
+        return {name: (parts[0] if len(parts) == 1 else np.concatenate(parts) if parts else self._empty(name))
+                for name, parts in chunks.items()}
+
+    def features(self):
+        """(N, 34) float32 matrix in FEATURE_NAMES order (x0, y0, x1, y1, ...)."""
+        xy = self.read(['xy'])['xy']
+        return np.asarray(xy, dtype=np.float32).reshape(len(xy), NUM_KEYPOINTS * 2)
+
+    def training_data(self):
+        """(X, y) of the labelled rows: X a DataFrame with the model's x0..y16 columns, y 0/1."""
+        import pandas as pd
+        data = self.read(['xy', 'label'])
+        keep = np.asarray(data['label']) != UNLABELLED
+        xy = np.asarray(data['xy'], dtype=np.float32)[keep]
+        X = pd.DataFrame(xy.reshape(len(xy), NUM_KEYPOINTS * 2), columns=FEATURE_NAMES)
+        return X, pd.Series(np.asarray(data['label'])[keep], name='label')
+
+
+def import_csv(csv_path, store, label=None, video=''):
+    """Append a collection CSV (image_name, x0, y0, ..., optional label) to the store; returns rows added."""
+    import pandas as pd
+    df = pd.read_csv(csv_path)
+    n = len(df)
+    if 'label' in df.columns:
+        labels = df['label'].map(LABEL_CODES).fillna(UNLABELLED).to_numpy(np.int8)
+    else:
+        labels = np.full(n, LABEL_CODES[label] if label else UNLABELLED, dtype=np.int8)
+    columns = {
+        'xy': df[FEATURE_NAMES].to_numpy(np.float32).reshape(n, NUM_KEYPOINTS, 2),
+        # The CSV never had these; NaN / -1 mark them as unknown
+        'conf': np.full((n, NUM_KEYPOINTS), np.nan, dtype=np.float32),
+        'box': np.full((n, 4), np.nan, dtype=np.float32),
+        'video': np.full(n, video, dtype=object),
+        'timestamp_ms': np.full(n, np.nan),
+        'frame': np.full(n, -1, dtype=np.int64),
+        'image_name': df['image_name'].astype(str).to_numpy(object),
+        'label': labels,
+    }
+    if n:
+        store.append(columns)
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar keypoint store tools")
+    sub = parser.add_subparsers(dest='command', required=True)
+    imp = sub.add_parser('import', help="Append a keypoint CSV to a store")
+    imp.add_argument('csv')
+    imp.add_argument('--out', required=True, help="Store directory")
+    imp.add_argument('--label', choices=sorted(LABEL_CODES), default=None,
+                     help="Label every row (if the CSV has no label column)")
+    imp.add_argument('--video', default='', help="Source video recorded for every row")
+    info = sub.add_parser('info', help="Show a store's schema and size")
+    info.add_argument('store')
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        store = KeypointStore(args.out)
+        print(f"Imported {import_csv(args.csv, store, args.label, args.video)} rows into {args.out}")
+    else:
+        store = KeypointStore(args.store)
+        if store.schema is None:
+            raise SystemExit(f"No keypoint store at {args.store}")
+        print(f"{args.store}: {len(store)} rows in {len(store.parts())} part(s)")
+        for name, spec in store.schema["columns"].items():
+            print(f"  {name:<14} {spec['dtype']:<6} {tuple(spec['shape'])}")
+
+
+if __name__ == "__main__":
+    main()
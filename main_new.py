@@ -1,10 +1,10 @@
 import cv2
 import os
-import pandas as pd
 from ultralytics import YOLO
 import xgboost as xgb
 import numpy as np
 import cvzone
+from features import keypoints_to_features
 
 # Define the path to the video file
 video_path = "vid.mp4"
@@ -57,42 +57,30 @@ def detect_shoplifting(video_path):
         annotated_frame = results[0].plot(boxes=False)
 
         for r in results:
-            bound_box = r.boxes.xyxy  # Bounding box coordinates
+            bound_box = r.boxes.xyxy.tolist()  # Bounding box coordinates
             conf = r.boxes.conf.tolist()  # Confidence levels
-            keypoints = r.keypoints.xyn.tolist()  # Keypoints for human pose
+            features = keypoints_to_features(r.keypoints.xyn)  # (N, 34) keypoints for human pose
 
             print(f'Frame {frame_tot}: Detected {len(bound_box)} bounding boxes')
 
-            for index, box in enumerate(bound_box):
-                if conf[index] > 0.55:  # Threshold for confidence score
-                    x1, y1, x2, y2 = box.tolist()
-
-                    # Prepare data for XGBoost prediction
-                    data = {}
-                    for j in range(len(keypoints[index])):
-                        data[f'x{j}'] = keypoints[index][j][0]
-                        data[f'y{j}'] = keypoints[index][j][1]
-
-                    # Convert the data to a DataFrame
-                    df = pd.DataFrame(data, index=[0])
-
-                    # Prepare data for XGBoost prediction
-                    dmatrix = xgb.DMatrix(df)
-
-                    # Make prediction using the XGBoost model
-                    sus = model.predict(dmatrix)
-                    binary_predictions = (sus > 0.5).astype(int)
-                    # binary_predictions may be an array; get scalar
-                    pred = int(binary_predictions[0]) if hasattr(binary_predictions, '__len__') else int(binary_predictions)
-                    print(f'Prediction: {pred}')
-
-                    # Annotate the frame based on prediction (0 = Suspicious, 1 = Normal)
-                    if pred == 0:  # Suspicious
-                        cv2.rectangle(annotated_frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 0, 255), 2)
-                        cvzone.putTextRect(annotated_frame, f"{'Suspicious'}", (int(x1), int(y1)), 1, 1)
-                    else:  # Normal
-                        cv2.rectangle(annotated_frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 2)
-                        cvzone.putTextRect(annotated_frame, f"{'Normal'}", (int(x1), int(y1) + 50), 1, 1)
+            # Score every confident person in one call
+            keep = [index for index, c in enumerate(conf) if c > 0.55]  # Threshold for confidence score
+            if not keep:
+                continue
+            sus = model.inplace_predict(features[keep])
+
+            for index, prob in zip(keep, sus):
+                x1, y1, x2, y2 = bound_box[index]
+                pred = int(prob > 0.5)
+                print(f'Prediction: {pred}')
+
+                # Annotate the frame based on prediction (0 = Suspicious, 1 = Normal)
+                if pred == 0:  # Suspicious
+                    cv2.rectangle(annotated_frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 0, 255), 2)
+                    cvzone.putTextRect(annotated_frame, f"{'Suspicious'}", (int(x1), int(y1)), 1, 1)
+                else:  # Normal
+                    cv2.rectangle(annotated_frame, (int(x1), int(y1)), (int(x2), int(y2)), (0, 255, 0), 2)
+                    cvzone.putTextRect(annotated_frame, f"{'Normal'}", (int(x1), int(y1) + 50), 1, 1)
 
         # Show the annotated frame in a window
         cv2.imshow('Frame', annotated_frame)
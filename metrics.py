@@ -0,0 +1,204 @@
+"""Per-stage latency, counters and gauges, served as Prometheus text.
+
+Instrumented code wraps each stage in `with metrics.timed("pose"):` and bumps counters with
+metrics.count(...) / metrics.gauge(...). Until enable() is called (and after disable()) those
+calls return immediately: timed() hands back one shared no-op context manager, nothing is
+recorded and no lock is taken.
+
+Every stage keeps a cumulative histogram (for Prometheus) and the last 1024 samples for
+p50/p95/p99. serve() exposes everything on http://127.0.0.1:<port>/metrics.
+"""
+import bisect
+import contextlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# Histogram upper bounds in seconds (+Inf is implicit)
+BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+WINDOW = 1024
+PREFIX = "shoplift"
+
+_NULL = contextlib.nullcontext()
+
+
+class StageHistogram:
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = np.zeros(WINDOW, dtype=np.float64)
+
+    def observe(self, seconds):
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.recent[self.count % WINDOW] = seconds
+        self.count += 1
+        self.sum += seconds
+
+    def percentiles(self):
+        n = min(self.count, WINDOW)
+        if n == 0:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+        p50, p95, p99 = np.percentile(self.recent[:n], [50, 95, 99])
+        return {"p50": float(p50), "p95": float(p95), "p99": float(p99)}
+
+
+class _Timer:
+    __slots__ = ("registry", "stage", "t0")
+
+    def __init__(self, registry, stage):
+        self.registry = registry
+        self.stage = stage
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.stage, time.perf_counter() - self.t0)
+        return False
+
+
+class Metrics:
+    def __init__(self):
+        self.started = time.time()
+        self.stages = {}
+        self.counters = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            hist = self.stages.get(stage)
+            if hist is None:
+                hist = self.stages[stage] = StageHistogram()
+            hist.observe(seconds)
+
+    def timed(self, stage):
+        return _Timer(self, stage)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def gauge(self, name, value):
+        self.gauges[name] = value
+
+    def snapshot(self):
+        with self._lock:
+            stages = {name: dict(h.percentiles(), count=h.count, mean=h.sum / h.count if h.count else 0.0)
+                      for name, h in self.stages.items()}
+            counters = dict(self.counters)
+        uptime = time.time() - self.started
+        return {
+            "uptime": uptime,
+            "stages": stages,
+            "counters": counters,
+            "rates": {name: value / uptime for name, value in counters.items()} if uptime > 0 else {},
+            "gauges": dict(self.gauges),
+        }
+
+    def prometheus_text(self):
+        lines = []
+        with self._lock:
+            stages = [(name, list(h.buckets), h.count, h.sum, h.percentiles()) for name, h in sorted(self.stages.items())]
+            counters = sorted(self.counters.items())
+        gauges = sorted(self.gauges.items())
+
+        lines.append(f"# HELP {PREFIX}_stage_seconds Latency of each processing stage.")
+        lines.append(f"# TYPE {PREFIX}_stage_seconds histogram")
+        for name, buckets, count, total, _ in stages:
+            cumulative = 0
+            for bound, n in zip(BUCKETS + (float('inf'),), buckets):
+                cumulative += n
+                le = "+Inf" if bound == float('inf') else repr(bound)
+                lines.append(f'{PREFIX}_stage_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'{PREFIX}_stage_seconds_sum{{stage="{name}"}} {total}')
+            lines.append(f'{PREFIX}_stage_seconds_count{{stage="{name}"}} {count}')
+
+        lines.append(f"# HELP {PREFIX}_stage_recent_seconds Stage latency quantiles over the last {WINDOW} samples.")
+        lines.append(f"# TYPE {PREFIX}_stage_recent_seconds gauge")
+        for name, _, _, _, pct in stages:
+            for q, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")):
+                lines.append(f'{PREFIX}_stage_recent_seconds{{stage="{name}",quantile="{q}"}} {pct[key]}')
+
+        for name, value in counters:
+            lines.append(f"# TYPE {PREFIX}_{name}_total counter")
+            lines.append(f"{PREFIX}_{name}_total {value}")
+        for name, value in gauges:
+            lines.append(f"# TYPE {PREFIX}_{name} gauge")
+            lines.append(f"{PREFIX}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# The active registry; None while instrumentation is off
+REGISTRY = None
+_server = None
+
+
+def enable():
+    global REGISTRY
+    if REGISTRY is None:
+        REGISTRY = Metrics()
+    return REGISTRY
+
+
+def disable():
+    global REGISTRY
+    REGISTRY = None
+
+
+def enabled():
+    return REGISTRY is not None
+
+
+def timed(stage):
+    registry = REGISTRY
+    return registry.timed(stage) if registry is not None else _NULL
+
+
+def observe(stage, seconds):
+    registry = REGISTRY
+    if registry is not None:
+        registry.observe(stage, seconds)
+
+
+def count(name, n=1):
+    registry = REGISTRY
+    if registry is not None:
+        registry.count(name, n)
+
+
+def gauge(name, value):
+    registry = REGISTRY
+    if registry is not None:
+        registry.gauge(name, value)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        registry = REGISTRY
+        body = (registry.prometheus_text() if registry is not None else "").encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=9108, host='127.0.0.1'):
+    """Start the /metrics endpoint on a daemon thread (once per process) and enable metrics."""
+    global _server
+    enable()
+    if _server is None:
+        _server = ThreadingHTTPServer((host, port), _Handler)
+        threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
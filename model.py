@@ -1,14 +1,23 @@
+import os
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
 import xgboost as xgb
+from keypoint_store import KeypointStore
 
-# Load the dataset CSV file
-df = pd.read_csv(r'C:\Users\WIN 11\Downloads\yoloposeshopliftingmain\yolo-pose-shoplifting-main\dataset_path\dataset.csv')
+# Keypoint store written by collect_parallel.py --store; used instead of the CSV when present
+KEYPOINT_STORE = r'C:\Users\WIN 11\Downloads\yoloposeshopliftingmain\yolo-pose-shoplifting-main\dataset_path\keypoints'
 
-# Prepare feature matrix X and target vector y
-X = df.drop(['label', 'image_name'], axis=1)  # Drop the label and image_name columns
-y = df['label'].map({'Suspicious': 0, 'Normal': 1})  # Map the label to 0 (Suspicious) and 1 (Normal)
+if os.path.isdir(KEYPOINT_STORE):
+    # Only the keypoint and label columns are read, memory-mapped
+    X, y = KeypointStore(KEYPOINT_STORE).training_data()
+else:
+    # Load the dataset CSV file
+    df = pd.read_csv(r'C:\Users\WIN 11\Downloads\yoloposeshopliftingmain\yolo-pose-shoplifting-main\dataset_path\dataset.csv')
+
+    # Prepare feature matrix X and target vector y
+    X = df.drop(['label', 'image_name'], axis=1)  # Drop the label and image_name columns
+    y = df['label'].map({'Suspicious': 0, 'Normal': 1})  # Map the label to 0 (Suspicious) and 1 (Normal)
 
 # Split the dataset into training and testing sets (80% train, 20% test)
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
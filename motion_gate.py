@@ -0,0 +1,74 @@
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Cheap check in front of the pose model: is anything moving?
+
+    Frames are shrunk to a small grayscale thumbnail and compared with the thumbnail of the
+    last frame that was sent to inference ('diff'), or fed to a MOG2 background subtractor
+    ('mog2'). If the fraction of changed pixels stays below `sensitivity`, the frame can reuse
+    the previous annotation. Every `refresh_every` frames inference is forced regardless, so
+    a person standing perfectly still is still re-scored.
+    """
+
+    def __init__(self, sensitivity=0.002, refresh_every=50, method='diff', width=160, pixel_threshold=25):
+        if method not in ('diff', 'mog2'):
+            raise ValueError(f"Unknown motion gate method: {method}")
+        self.sensitivity = sensitivity
+        self.refresh_every = refresh_every
+        self.method = method
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self._reference = None
+        self._since_infer = 0
+        self._subtractor = cv2.createBackgroundSubtractorMOG2(detectShadows=False) if method == 'mog2' else None
+        self.frames = 0
+        self.inferred = 0
+        self.skipped = 0
+        self.forced = 0
+        self.last_motion = 0.0
+
+    def _thumbnail(self, frame):
+        h, w = frame.shape[:2]
+        small = cv2.resize(frame, (self.width, max(1, h * self.width // w)), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def motion(self, thumb):
+        if self.method == 'mog2':
+            mask = self._subtractor.apply(thumb)
+            return float(np.count_nonzero(mask)) / mask.size
+        if self._reference is None:
+            return 1.0
+        diff = cv2.absdiff(thumb, self._reference)
+        return float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
+
+    def should_infer(self, frame):
+        thumb = self._thumbnail(frame)
+        self.frames += 1
+        self.last_motion = self.motion(thumb)
+        self._since_infer += 1
+
+        run = self._reference is None or self.last_motion >= self.sensitivity
+        if not run and self.refresh_every and self._since_infer >= self.refresh_every:
+            run = True
+            self.forced += 1
+
+        if run:
+            self.inferred += 1
+            self._since_infer = 0
+            self._reference = thumb
+        else:
+            self.skipped += 1
+        return run
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "inferred": self.inferred,
+            "skipped": self.skipped,
+            "forced_refresh": self.forced,
+            "skip_ratio": self.skipped / self.frames if self.frames else 0.0,
+            "last_motion": self.last_motion,
+        }
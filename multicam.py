@@ -0,0 +1,238 @@
+"""Run many cameras through one ShopliftingDetector (one YOLO + one classifier in memory).
+
+Each source gets a reader thread that keeps only its newest frame. The runner takes the
+latest unseen frame from every camera, runs them through the pose model as one batch and
+hands per-camera results to that camera's subscribers.
+
+    python multicam.py vid.mp4 nm1.mp4 rtsp://user:pass@ip:554/stream 0 --loop
+"""
+import argparse
+import threading
+import time
+
+import cv2
+
+import metrics
+from detector import FRAME_SIZE, ShopliftingDetector
+from pipeline import StageStats, is_live_source
+
+
+class CameraReader(threading.Thread):
+    def __init__(self, name, source, loop=False, reconnect_delay=1.0):
+        super().__init__(name=f"camera-{name}", daemon=True)
+        self.camera = name
+        self.source = int(source) if isinstance(source, str) and source.isdigit() else source
+        self.live = is_live_source(self.source)
+        self.loop = loop
+        self.reconnect_delay = reconnect_delay
+        self.finished = False
+        self.stats = StageStats()
+        self._latest = None
+        self._lock = threading.Lock()
+        self._halt = threading.Event()
+
+    def run(self):
+        cap = cv2.VideoCapture(self.source)
+        # Files are paced at their native fps so they behave like a camera
+        interval = 0.0
+        if not self.live:
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            interval = 1.0 / fps if fps and fps > 0 else 0.0
+        frame_idx = 0
+        next_due = time.perf_counter()
+        try:
+            while not self._halt.is_set():
+                success, frame = cap.read()
+                if not success:
+                    if self.live:
+                        # Same recovery as the dashboard: reopen the stream
+                        cap.release()
+                        self._halt.wait(self.reconnect_delay)
+                        cap = cv2.VideoCapture(self.source)
+                        continue
+                    if self.loop and frame_idx > 0:
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        continue
+                    break
+                t0 = time.perf_counter()
+                frame = cv2.resize(frame, FRAME_SIZE)
+                with self._lock:
+                    self._latest = (frame_idx, frame, t0)
+                self.stats.add(time.perf_counter() - t0)
+                frame_idx += 1
+                if interval:
+                    next_due += interval
+                    self._halt.wait(max(0.0, next_due - time.perf_counter()))
+        finally:
+            cap.release()
+            self.finished = True
+
+    def take(self):
+        # Newest frame not yet handed out, or None
+        with self._lock:
+            item, self._latest = self._latest, None
+        return item
+
+    def stop(self):
+        self._halt.set()
+
+
+class MultiCameraRunner:
+    """Round-robins the newest frame of every camera through one detector.
+
+    subscribe(camera, callback) registers callback(camera, frame_idx, annotated_frame, detections).
+    stats() gives per-camera processed fps, capture fps and capture-to-delivery latency.
+    """
+
+    def __init__(self, detector, sources, loop=False, annotate=True, rois=None):
+        self.detector = detector
+        self.annotate = annotate
+        # Optional {camera: roi.RoiCropper}; those cameras only send their ROI crops to the model
+        self.rois = rois or {}
+        self.cameras = {name: CameraReader(name, src, loop=loop) for name, src in sources.items()}
+        self.subscribers = {name: [] for name in self.cameras}
+        self._stats = {name: StageStats() for name in self.cameras}
+        self._last_latency = {name: 0.0 for name in self.cameras}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, camera, callback):
+        self.subscribers[camera].append(callback)
+
+    def step(self):
+        batch = []
+        for name, reader in self.cameras.items():
+            item = reader.take()
+            if item is not None:
+                batch.append((name, item))
+        if not batch:
+            return 0
+
+        full = [(name, item) for name, item in batch if name not in self.rois]
+        with metrics.timed("pose"):
+            results = self.detector.model_yolo([item[1] for _, item in full], verbose=False) if full else []
+        outputs = {}
+        for (name, item), r in zip(full, results):
+            persons = self.detector.classify(r)
+            # Frames are the readers' own resized copies and subscribers keep them: draw in place
+            outputs[name] = (self.detector.annotate(r, persons, out=r.orig_img) if self.annotate else item[1],
+                             persons)
+        for name, item in batch:
+            if name in self.rois:
+                outputs[name] = self.rois[name].process(self.detector, item[1], out=item[1], annotate=self.annotate)
+
+        for name, (frame_idx, frame, captured) in batch:
+            annotated_frame, persons = outputs[name]
+            detections = self.detector.detections_for(persons, frame_idx)
+            for d in detections:
+                d["camera"] = name
+            for callback in self.subscribers[name]:
+                callback(name, frame_idx, annotated_frame, detections)
+            latency = time.perf_counter() - captured
+            self._stats[name].add(latency)
+            self._last_latency[name] = latency
+        return len(batch)
+
+    def run(self, duration=None):
+        for reader in self.cameras.values():
+            if not reader.is_alive():
+                reader.start()
+        for stats in self._stats.values():
+            stats.started = time.perf_counter()
+        deadline = time.perf_counter() + duration if duration else None
+        try:
+            while not self._stop.is_set():
+                if deadline and time.perf_counter() >= deadline:
+                    break
+                if self.step() == 0:
+                    if all(reader.finished for reader in self.cameras.values()):
+                        break
+                    # Nothing new from any camera yet
+                    time.sleep(0.002)
+        finally:
+            for reader in self.cameras.values():
+                reader.stop()
+            for reader in self.cameras.values():
+                reader.join(timeout=2.0)
+
+    def start(self, duration=None):
+        self._thread = threading.Thread(target=self.run, args=(duration,), name="multicam", daemon=True)
+        self._thread.start()
+        return self
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+
+    def stats(self):
+        out = {}
+        for name, reader in self.cameras.items():
+            processed = self._stats[name].snapshot()
+            out[name] = {
+                "frames": processed["frames"],
+                "fps": processed["fps"],
+                "capture_fps": reader.stats.snapshot()["fps"],
+                "latency_ms": processed["avg_ms"],
+                "last_latency_ms": self._last_latency[name] * 1000,
+            }
+        return out
+
+
+def parse_sources(values):
+    # "name=source" or plain source (named cam0, cam1, ...)
+    sources = {}
+    for i, value in enumerate(values):
+        name, sep, src = value.partition('=')
+        if not sep or '://' in name:
+            name, src = f"cam{i}", value
+        sources[name] = src
+    return sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-camera shoplifting detection with one model instance")
+    parser.add_argument('sources', nargs='+', help="Video files, RTSP URLs or webcam indices (optionally name=source)")
+    parser.add_argument('--loop', action='store_true', help="Restart video files when they end")
+    parser.add_argument('--duration', type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument('--report-every', type=float, default=5.0)
+    parser.add_argument('--backend', default='xgboost', choices=['xgboost', 'numpy'])
+    parser.add_argument('--roi', default=None, help="JSON file of per-camera regions of interest")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="Serve per-stage metrics at http://127.0.0.1:PORT/metrics")
+    args = parser.parse_args()
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+
+    rois = None
+    if args.roi:
+        from roi import load_rois
+        rois = load_rois(args.roi)
+    detector = ShopliftingDetector(backend=args.backend)
+    runner = MultiCameraRunner(detector, parse_sources(args.sources), loop=args.loop, annotate=False, rois=rois)
+
+    def report(camera, frame_idx, annotated_frame, detections):
+        for d in detections:
+            print(f"[{camera}] frame {frame_idx}: {d['type']} ({d['confidence']:.2f})")
+
+    for name in runner.cameras:
+        runner.subscribe(name, report)
+
+    runner.start(args.duration)
+    try:
+        while runner.is_running():
+            time.sleep(args.report_every)
+            for name, s in runner.stats().items():
+                print(f"{name}: {s['fps']:.1f} fps (capture {s['capture_fps']:.1f}), "
+                      f"latency {s['latency_ms']:.0f} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        runner.stop()
+
+
+if __name__ == "__main__":
+    main()
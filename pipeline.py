@@ -0,0 +1,201 @@
+import queue
+import threading
+import time
+
+import cv2
+
+import metrics
+from detector import FRAME_SIZE
+
+# Marks the end of the stream as it travels through the stage queues
+_END = object()
+
+
+def is_live_source(source):
+    # Webcam indices and network streams are live; anything else is a file
+    if isinstance(source, int):
+        return True
+    return isinstance(source, str) and (source.isdigit() or '://' in source)
+
+
+class StageQueue:
+    """Bounded queue between two stages.
+
+    With drop_oldest the producer never waits: a full queue discards its oldest item,
+    so live sources stay current. Otherwise the producer blocks and nothing is lost.
+    """
+
+    def __init__(self, maxsize, drop_oldest):
+        self._q = queue.Queue(maxsize)
+        self._lock = threading.Lock()
+        self.drop_oldest = drop_oldest
+        self.dropped = 0
+
+    def put(self, item, stop):
+        if self.drop_oldest:
+            with self._lock:
+                while True:
+                    try:
+                        self._q.put_nowait(item)
+                        return
+                    except queue.Full:
+                        try:
+                            self._q.get_nowait()
+                            self.dropped += 1
+                        except queue.Empty:
+                            pass
+        while not stop.is_set():
+            try:
+                self._q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def get(self, stop):
+        while not stop.is_set():
+            try:
+                return self._q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def qsize(self):
+        return self._q.qsize()
+
+
+class StageStats:
+    def __init__(self):
+        self.frames = 0
+        self.busy = 0.0
+        self.started = time.perf_counter()
+
+    def add(self, seconds):
+        self.frames += 1
+        self.busy += seconds
+
+    def snapshot(self):
+        elapsed = time.perf_counter() - self.started
+        return {
+            "frames": self.frames,
+            "fps": self.frames / elapsed if elapsed > 0 else 0.0,
+            "avg_ms": self.busy / self.frames * 1000 if self.frames else 0.0,
+        }
+
+
+class Pipeline:
+    """Decode -> infer -> classify -> render, each stage on its own thread.
+
+    Iterating yields (annotated_frame, detections) in frame order, like
+    ShopliftingDetector.process_video. stats() can be called from any thread while it runs.
+    """
+
+    STAGES = ("decode", "infer", "classify", "render")
+
+    def __init__(self, detector, source, live=None, queue_size=4):
+        self.detector = detector
+        self.source = source
+        self.live = is_live_source(source) if live is None else live
+        self._stop = threading.Event()
+        self._error = None
+        self._threads = []
+        # One queue after each stage; the last one feeds the consumer
+        self.queues = {name: StageQueue(queue_size, self.live) for name in self.STAGES}
+        self._stats = {name: StageStats() for name in self.STAGES}
+
+    def _decode(self, out):
+        source = int(self.source) if isinstance(self.source, str) and self.source.isdigit() else self.source
+        cap = cv2.VideoCapture(source)
+        stats = self._stats["decode"]
+        try:
+            if not cap.isOpened():
+                raise IOError(f"Could not open video source: {self.source}")
+            frame_idx = 0
+            while not self._stop.is_set():
+                t0 = time.perf_counter()
+                success, frame = cap.read()
+                if not success:
+                    break
+                frame = cv2.resize(frame, FRAME_SIZE)
+                stats.add(time.perf_counter() - t0)
+                out.put((frame_idx, frame), self._stop)
+                frame_idx += 1
+        finally:
+            cap.release()
+
+    def _infer(self, item):
+        frame_idx, frame = item
+        with metrics.timed("pose"):
+            return frame_idx, self.detector.model_yolo(frame, verbose=False)[0]
+
+    def _classify(self, item):
+        frame_idx, r = item
+        return frame_idx, r, self.detector.classify(r)
+
+    def _render(self, item):
+        frame_idx, r, persons = item
+        # The decode stage's resized frame belongs to the pipeline: draw into it
+        return self.detector.annotate(r, persons, out=r.orig_img), self.detector.detections_for(persons, frame_idx)
+
+    def _worker(self, name, fn, inq, outq):
+        stats = self._stats[name]
+        try:
+            if inq is None:
+                fn(outq)
+                return
+            while True:
+                item = inq.get(self._stop)
+                if item is _END:
+                    break
+                t0 = time.perf_counter()
+                result = fn(item)
+                stats.add(time.perf_counter() - t0)
+                outq.put(result, self._stop)
+                metrics.gauge(f"queue_depth_{name}", outq.qsize())
+        except Exception as e:
+            self._error = e
+            self._stop.set()
+        finally:
+            outq.put(_END, self._stop)
+
+    def start(self):
+        if self._threads:
+            return self
+        fns = {"decode": self._decode, "infer": self._infer, "classify": self._classify, "render": self._render}
+        inq = None
+        for name in self.STAGES:
+            t = threading.Thread(target=self._worker, args=(name, fns[name], inq, self.queues[name]),
+                                 name=f"pipeline-{name}", daemon=True)
+            self._threads.append(t)
+            inq = self.queues[name]
+        for stats in self._stats.values():
+            stats.started = time.perf_counter()
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=2.0)
+
+    def __iter__(self):
+        self.start()
+        out = self.queues[self.STAGES[-1]]
+        try:
+            while True:
+                item = out.get(self._stop)
+                if item is _END:
+                    break
+                yield item
+        finally:
+            self.stop()
+        if self._error is not None:
+            raise self._error
+
+    def stats(self):
+        return {
+            "live": self.live,
+            "queues": {name: q.qsize() for name, q in self.queues.items()},
+            "dropped": {name: q.dropped for name, q in self.queues.items()},
+            "stages": {name: s.snapshot() for name, s in self._stats.items()},
+        }
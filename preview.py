@@ -0,0 +1,63 @@
+import time
+
+import cv2
+
+import metrics
+
+
+class PreviewEncoder:
+    """Downscaled JPEG preview of the annotated frames, capped at `max_fps`.
+
+    encode() is called by whoever is showing the preview, so nothing is encoded while nobody
+    is watching. It returns None when the frame has not changed or the rate cap says wait.
+    """
+
+    def __init__(self, width=640, quality=70, max_fps=8):
+        self.width = width
+        self.quality = quality
+        self.max_fps = max_fps
+        self.frames = 0
+        self.bytes = 0
+        self.bytes_per_sec = 0.0
+        self._last_id = None
+        self._last_at = 0.0
+        self._window_start = time.perf_counter()
+        self._window_bytes = 0
+
+    def encode(self, frame, frame_id=None):
+        now = time.perf_counter()
+        if frame is None or (frame_id is not None and frame_id == self._last_id):
+            return None
+        if self.max_fps and now - self._last_at < 1.0 / self.max_fps:
+            return None
+
+        with metrics.timed("jpeg_encode"):
+            h, w = frame.shape[:2]
+            if self.width and w > self.width:
+                frame = cv2.resize(frame, (self.width, max(1, h * self.width // w)), interpolation=cv2.INTER_AREA)
+            ok, buf = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, int(self.quality)])
+        if not ok:
+            return None
+        data = buf.tobytes()
+
+        self._last_id = frame_id
+        self._last_at = now
+        self.frames += 1
+        self.bytes += len(data)
+        self._window_bytes += len(data)
+        self._roll(now)
+        return data
+
+    def _roll(self, now):
+        if now - self._window_start >= 1.0:
+            self.bytes_per_sec = self._window_bytes / (now - self._window_start)
+            self._window_start, self._window_bytes = now, 0
+
+    def stats(self):
+        self._roll(time.perf_counter())
+        return {
+            "frames": self.frames,
+            "bytes": self.bytes,
+            "bytes_per_sec": self.bytes_per_sec,
+            "avg_bytes": self.bytes / self.frames if self.frames else 0.0,
+        }
@@ -0,0 +1,158 @@
+"""Single-pass annotation: skeletons, boxes and labels drawn straight into the frame.
+
+Replaces `r.plot(boxes=False)` plus per-person `cv2.rectangle` / `cvzone.putTextRect` calls.
+r.plot copies the frame and every text call measures and rasterizes its string again; here
+the frame being annotated is drawn on in place (or copied once into a caller-owned buffer)
+and each label is rasterized once, at construction, into a sprite that is blitted.
+Skeletons use ultralytics' palette, limbs, radius and keypoint-confidence cutoff; limbs of
+one colour are drawn for all people with a single cv2.polylines call.
+"""
+import cv2
+import numpy as np
+
+from detector import FRAME_SIZE
+from features import NUM_KEYPOINTS
+
+# ultralytics pose palette, limb list (1-based COCO keypoints) and colour indices
+POSE_PALETTE = np.array([
+    [255, 128, 0], [255, 153, 51], [255, 178, 102], [230, 230, 0], [255, 153, 255],
+    [153, 204, 255], [255, 102, 255], [255, 51, 255], [102, 178, 255], [51, 153, 255],
+    [255, 153, 153], [255, 102, 102], [255, 51, 51], [153, 255, 153], [102, 255, 102],
+    [51, 255, 51], [0, 255, 0], [0, 0, 255], [255, 0, 0], [255, 255, 255],
+], dtype=np.uint8)
+SKELETON = np.array([
+    [16, 14], [14, 12], [17, 15], [15, 13], [12, 13], [6, 12], [7, 13], [6, 7], [6, 8], [7, 9],
+    [8, 10], [9, 11], [2, 3], [1, 2], [1, 3], [2, 4], [3, 5], [4, 6], [5, 7],
+]) - 1
+LIMB_COLORS = [tuple(int(c) for c in POSE_PALETTE[i])
+               for i in [9, 9, 9, 9, 7, 7, 7, 0, 0, 0, 0, 0, 16, 16, 16, 16, 16, 16, 16]]
+KPT_COLORS = [tuple(int(c) for c in POSE_PALETTE[i])
+              for i in [16, 16, 16, 16, 16, 0, 0, 0, 0, 0, 0, 9, 9, 9, 9, 9, 9]]
+
+
+def cvzone_sprite(text, scale=1, thickness=1, offset=10, color_text=(255, 255, 255), color_rect=(255, 0, 255)):
+    # Pixels cvzone.putTextRect(img, text, (x, y), scale, thickness) draws, and their
+    # top-left corner relative to (x, y)
+    font = cv2.FONT_HERSHEY_PLAIN
+    (w, h), _ = cv2.getTextSize(text, font, scale, thickness)
+    sprite = np.empty((h + 2 * offset + 1, w + 2 * offset + 1, 3), dtype=np.uint8)
+    sprite[:] = color_rect
+    cv2.putText(sprite, text, (offset, h + offset), font, scale, color_text, thickness)
+    return sprite, (-offset, -h - offset)
+
+
+def put_label_sprite(text, color_bg, color_text=(255, 255, 255), scale=0.6, thickness=1):
+    # Same pixels as the dashboard's put_label(img, text, (x, y), color_bg)
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    (tw, th), baseline = cv2.getTextSize(text, font, scale, thickness)
+    sprite = np.empty((th + 2 * baseline + 5, tw + 9, 3), dtype=np.uint8)
+    sprite[:] = color_bg
+    cv2.putText(sprite, text, (4, th + baseline + 4), font, scale, color_text, thickness, cv2.LINE_AA)
+    return sprite, (0, -th - baseline - 4)
+
+
+def detector_labels():
+    # ShopliftingDetector.draw_persons: pred -> (sprite, offset, box colour, box thickness, label anchor)
+    return {
+        0: (*cvzone_sprite("Suspicious"), (0, 0, 255), 2, "corner"),
+        1: (*cvzone_sprite("Normal"), (0, 255, 0), 2, "corner"),
+    }
+
+
+def dashboard_labels():
+    # dashboardfinal.py: label sits 4 px above the box, never above y=20
+    return {
+        0: (*put_label_sprite("!! SUSPICIOUS", (180, 0, 0)), (0, 0, 255), 3, "above"),
+        1: (*put_label_sprite("Normal", (0, 140, 60)), (0, 200, 80), 2, "above"),
+    }
+
+
+def blit(dst, sprite, x, y):
+    # Copy sprite into dst with its top-left at (x, y), clipped to dst
+    h, w = sprite.shape[:2]
+    H, W = dst.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, W), min(y + h, H)
+    if x1 > x0 and y1 > y0:
+        dst[y0:y1, x0:x1] = sprite[y0 - y:y1 - y, x0 - x:x1 - x]
+
+
+class FrameRenderer:
+    """Draws people into a frame in one pass; disabled, it returns frames untouched.
+
+    `labels` maps a person's "pred" to (sprite, sprite offset, box colour, box thickness,
+    anchor), see detector_labels() and dashboard_labels().
+    """
+
+    def __init__(self, labels=None, enabled=True, skeleton=True, kpt_conf=0.25, radius=5, frame_size=FRAME_SIZE):
+        self.labels = labels if labels is not None else detector_labels()
+        self.enabled = enabled
+        self.skeleton = skeleton
+        self.kpt_conf = kpt_conf
+        self.radius = radius
+        self.frame_size = frame_size
+        # ultralytics line width for this frame size; limbs are half as thick
+        w, h = frame_size
+        self.limb_thickness = int(np.ceil(max(round((w + h + 3) / 2 * 0.003), 2) / 2))
+        self._limb_groups = [(color, np.array([i for i, c in enumerate(LIMB_COLORS) if c == color]))
+                             for color in dict.fromkeys(LIMB_COLORS)]
+        self._buffers = {}
+
+    def buffer(self, like):
+        """Output array for frames shaped like `like`, reused on every call with that shape.
+
+        What was drawn into it is only good until the next frame of that shape is rendered.
+        """
+        key = (like.shape, like.dtype)
+        buf = self._buffers.get(key)
+        if buf is None:
+            buf = self._buffers[key] = np.empty_like(like)
+        return buf
+
+    def _skeletons(self, canvas, keypoints, keypoint_conf):
+        h, w = canvas.shape[:2]
+        pts = np.asarray(keypoints, dtype=np.float32).reshape(-1, NUM_KEYPOINTS, 2)
+        # ultralytics skips keypoints on the image border (undetected ones sit at 0, 0)
+        visible = (pts[..., 0] % w != 0) & (pts[..., 1] % h != 0) & (pts[..., 0] >= 0) & (pts[..., 1] >= 0)
+        if keypoint_conf is not None:
+            visible &= np.asarray(keypoint_conf).reshape(-1, NUM_KEYPOINTS) >= self.kpt_conf
+        ipts = pts.astype(np.int32)
+        for m, j in zip(*np.nonzero(visible)):
+            cv2.circle(canvas, (int(ipts[m, j, 0]), int(ipts[m, j, 1])), self.radius, KPT_COLORS[j], -1, cv2.LINE_AA)
+        segments = ipts[:, SKELETON]
+        limb_visible = visible[:, SKELETON[:, 0]] & visible[:, SKELETON[:, 1]]
+        for color, limbs in self._limb_groups:
+            drawn = segments[:, limbs][limb_visible[:, limbs]]
+            if len(drawn):
+                cv2.polylines(canvas, list(drawn), False, color, self.limb_thickness, cv2.LINE_AA)
+
+    def render(self, frame, persons, keypoints=None, keypoint_conf=None, skeletons=True, out=None):
+        """Annotate `frame` in place, or a copy of it in `out` (a reusable array of the same shape;
+        out=frame draws in place too).
+
+        keypoints (M, 17, 2) pixel coordinates with optional (M, 17) confidences give the
+        skeletons to draw, which may include people that were not classified; by default
+        the persons' own normalized keypoints are used. Returns the annotated array.
+        """
+        if not self.enabled:
+            return frame
+        canvas = frame
+        if out is not None:
+            if out is not frame:
+                np.copyto(out, frame)
+            canvas = out
+
+        if skeletons and self.skeleton:
+            if keypoints is None and persons:
+                h, w = canvas.shape[:2]
+                keypoints = np.array([p["keypoints"] for p in persons], dtype=np.float32) * np.array([w, h], dtype=np.float32)
+            if keypoints is not None and len(keypoints):
+                self._skeletons(canvas, keypoints, keypoint_conf)
+
+        for person in persons:
+            sprite, (dx, dy), color, thickness, anchor = self.labels[person["pred"]]
+            x1, y1, x2, y2 = (int(v) for v in person["box"])
+            cv2.rectangle(canvas, (x1, y1), (x2, y2), color, thickness)
+            ly = max(y1 - 4, 20) if anchor == "above" else y1
+            blit(canvas, sprite, x1 + dx, ly + dy)
+        return canvas
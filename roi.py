@@ -0,0 +1,138 @@
+"""Per-camera regions of interest in front of the pose model.
+
+Regions are given in the coordinates of the resized frame (FRAME_SIZE, 1018x600): a rectangle
+is [x1, y1, x2, y2], a polygon is a list of [x, y] points. Overlapping regions are merged, and
+each merged crop (pixels outside the polygons blacked out) is sent to the pose model at the
+same pixel scale full frames use, so a crop a quarter of the frame costs roughly a quarter of
+the inference. Boxes and keypoints are mapped back to full-frame pixels and xyn coordinates,
+so the classifier sees exactly the features it was trained on.
+
+A JSON config maps camera names to region lists:
+    {"cam0": [[100, 50, 700, 600], [[720, 80], [1000, 80], [1000, 500]]]}
+"""
+import json
+import math
+
+import cv2
+import numpy as np
+
+import metrics
+from detector import FRAME_SIZE
+from features import to_numpy
+
+# Pose model input size used for a full FRAME_SIZE frame
+POSE_IMGSZ = 640
+
+
+def _bounding_rect(region):
+    if len(region) == 4 and not isinstance(region[0], (list, tuple)):
+        x1, y1, x2, y2 = region
+        return int(x1), int(y1), int(math.ceil(x2)), int(math.ceil(y2))
+    pts = np.asarray(region, dtype=np.float32)
+    return (int(pts[:, 0].min()), int(pts[:, 1].min()),
+            int(math.ceil(pts[:, 0].max())), int(math.ceil(pts[:, 1].max())))
+
+
+def merge_rects(rects):
+    # Repeatedly union overlapping rectangles until none overlap
+    rects = [list(r) for r in rects]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(rects)):
+            for j in range(i + 1, len(rects)):
+                a, b = rects[i], rects[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    rects[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    del rects[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return [tuple(r) for r in rects]
+
+
+class RoiCropper:
+    def __init__(self, regions, frame_size=FRAME_SIZE, pose_imgsz=POSE_IMGSZ):
+        if not regions:
+            raise ValueError("RoiCropper needs at least one region")
+        self.frame_size = frame_size
+        w, h = frame_size
+        self.mask = np.zeros((h, w), dtype=np.uint8)
+        rects = []
+        for region in regions:
+            x1, y1, x2, y2 = _bounding_rect(region)
+            x1, y1, x2, y2 = max(0, x1), max(0, y1), min(w, x2), min(h, y2)
+            if x2 <= x1 or y2 <= y1:
+                continue
+            if len(region) == 4 and not isinstance(region[0], (list, tuple)):
+                self.mask[y1:y2, x1:x2] = 255
+            else:
+                cv2.fillPoly(self.mask, [np.asarray(region, dtype=np.int32)], 255)
+            rects.append((x1, y1, x2, y2))
+        if not rects:
+            raise ValueError(f"No region of {regions} overlaps the {w}x{h} frame")
+        self.crops = merge_rects(rects)
+        # Keep pixels per inference the same as for the full frame
+        self.scale = pose_imgsz / max(frame_size)
+        self._crop_masks = [self.mask[y1:y2, x1:x2] > 0 for x1, y1, x2, y2 in self.crops]
+        self._needs_mask = [not m.all() for m in self._crop_masks]
+
+    @property
+    def pixel_fraction(self):
+        w, h = self.frame_size
+        return sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in self.crops) / (w * h)
+
+    def imgsz(self):
+        longest = max(max(x2 - x1, y2 - y1) for x1, y1, x2, y2 in self.crops)
+        return max(32, int(math.ceil(longest * self.scale / 32)) * 32)
+
+    def crop(self, frame):
+        out = []
+        for (x1, y1, x2, y2), mask, needs_mask in zip(self.crops, self._crop_masks, self._needs_mask):
+            img = frame[y1:y2, x1:x2]
+            if needs_mask:
+                img = np.where(mask[:, :, None], img, 0).astype(frame.dtype)
+            out.append(np.ascontiguousarray(img))
+        return out
+
+    def process(self, detector, frame, conf_threshold=0.55, out=None, annotate=True):
+        """Pose + classification on the ROI crops of one FRAME_SIZE frame.
+
+        Returns (annotated_frame, persons) with everything in full-frame coordinates. The
+        annotation goes into `out` (out=frame draws in place), by default the renderer's reusable
+        buffer, so `frame` stays clean until the next call. With annotate=False nothing is drawn and `frame` comes back as is.
+        """
+        w, h = self.frame_size
+        with metrics.timed("pose"):
+            results = detector.model_yolo(self.crop(frame), imgsz=self.imgsz(), verbose=False)
+        boxes, confs, xys, kpt_confs = [], [], [], []
+        for (x1, y1, x2, y2), r in zip(self.crops, results):
+            if r.keypoints is None or len(r.boxes.conf) == 0:
+                continue
+            boxes.append(to_numpy(r.boxes.xyxy) + np.array([x1, y1, x1, y1], dtype=np.float32))
+            confs.append(to_numpy(r.boxes.conf))
+            xy = to_numpy(r.keypoints.xy)
+            # Undetected keypoints stay at (0, 0), as YOLO reports them
+            valid = np.any(xy != 0, axis=-1, keepdims=True)
+            xys.append(np.where(valid, xy + np.array([x1, y1], dtype=np.float32), 0).astype(np.float32))
+            kpt_confs.append(to_numpy(r.keypoints.conf) if r.keypoints.conf is not None
+                             else np.ones(xy.shape[:2], dtype=np.float32))
+        if not boxes:
+            return frame, []
+        xy_full = np.concatenate(xys)
+        persons = detector.classify_arrays(np.concatenate(boxes), np.concatenate(confs),
+                                           xy_full / np.array([w, h], dtype=np.float32), conf_threshold)
+        if not annotate:
+            return frame, persons
+        with metrics.timed("render"):
+            if out is None and detector.renderer.enabled:
+                out = detector.renderer.buffer(frame)
+            annotated_frame = detector.renderer.render(frame, persons, xy_full, np.concatenate(kpt_confs), out=out)
+        return annotated_frame, persons
+
+
+def load_rois(path, frame_size=FRAME_SIZE):
+    with open(path) as f:
+        config = json.load(f)
+    return {camera: RoiCropper(regions, frame_size) for camera, regions in config.items()}
@@ -0,0 +1,183 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from features import NUM_KEYPOINTS, to_numpy
+
+# Poses go into a TrackHistory on this fixed grid, at collection and at inference alike, so a
+# velocity or acceleration step means the same time in training data and at runtime
+SAMPLE_HZ = 5.0
+
+# Column names of TrackHistory.features() after the 34 plain keypoint columns
+TEMPORAL_FEATURE_NAMES = [
+    f'{prefix}{axis}{j}'
+    for prefix in ('v', 'a', 'm', 's')
+    for j in range(NUM_KEYPOINTS)
+    for axis in ('x', 'y')
+]
+
+
+def sample_frame(k, step_ms, fps):
+    """Frame of the k-th sample taken every step_ms: int(msec / 1000 * fps + 0.5), as OpenCV's seek picks it."""
+    return int(k * step_ms / 1000 * fps + 0.5)
+
+
+class TrackHistory:
+    """Preallocated per-track ring buffers of (window, 17, 2) keypoints.
+
+    Each update is O(1) per track: velocity and acceleration come from the previous entries,
+    windowed mean and variance from running sums that add the new pose and subtract the one
+    leaving the window. Slots of tracks unseen for `evict_after` updates are recycled; when
+    all slots are busy the least recently seen track gives up its slot. Tracks are kept in
+    last-seen order, so both only ever look at the front.
+
+    Velocity and acceleration are per update. Callers push only on the frames due() accepts,
+    one every 1 / rate seconds of video, so the spacing is the same whatever the frame rate
+    and however often the caller looks at the video.
+    """
+
+    def __init__(self, window=16, max_tracks=64, evict_after=30, rate=SAMPLE_HZ):
+        self.window = window
+        self.max_tracks = max_tracks
+        self.evict_after = evict_after
+        shape = (max_tracks, NUM_KEYPOINTS, 2)
+        self.buffer = np.zeros((max_tracks, window, NUM_KEYPOINTS, 2), dtype=np.float32)
+        self.head = np.zeros(max_tracks, dtype=np.int64)
+        self.count = np.zeros(max_tracks, dtype=np.int64)
+        self.last_seen = np.zeros(max_tracks, dtype=np.int64)
+        self.velocity = np.zeros(shape, dtype=np.float32)
+        self.acceleration = np.zeros(shape, dtype=np.float32)
+        self._sum = np.zeros(shape, dtype=np.float64)
+        self._sumsq = np.zeros(shape, dtype=np.float64)
+        self.step = 0
+        self.step_ms = 1000 / rate
+        self.samples = 0
+        self.slots = OrderedDict()
+        self._free = list(range(max_tracks - 1, -1, -1))
+
+    def due(self, frame_index, fps):
+        """True if frame_index is the next grid frame (or lies past it, after frames were skipped)."""
+        if fps <= 0:
+            raise ValueError(f"Frame rate must be positive (got {fps})")
+        if frame_index < sample_frame(self.samples, self.step_ms, fps):
+            return False
+        while sample_frame(self.samples, self.step_ms, fps) <= frame_index:
+            self.samples += 1
+        return True
+
+    def _reset(self, slot):
+        self.head[slot] = 0
+        self.count[slot] = 0
+        self.velocity[slot] = 0
+        self.acceleration[slot] = 0
+        self._sum[slot] = 0
+        self._sumsq[slot] = 0
+
+    def _slot_for(self, track_id):
+        slot = self.slots.get(track_id)
+        if slot is not None:
+            return slot
+        if not self._free:
+            # Every slot busy: recycle the track seen longest ago
+            oldest = next(iter(self.slots))
+            if self.last_seen[self.slots[oldest]] >= self.step:
+                raise ValueError(f"More than max_tracks={self.max_tracks} people in one frame")
+            self._free.append(self.slots.pop(oldest))
+        slot = self._free.pop()
+        self._reset(slot)
+        self.last_seen[slot] = self.step
+        self.slots[track_id] = slot
+        return slot
+
+    def evict(self):
+        gone = 0
+        while self.slots:
+            track_id, slot = next(iter(self.slots.items()))
+            if self.step - self.last_seen[slot] <= self.evict_after:
+                break
+            del self.slots[track_id]
+            self._free.append(slot)
+            gone += 1
+        return gone
+
+    def update(self, track_ids, keypoints):
+        """Push one frame of poses: track_ids (N,), keypoints (N, 17, 2) normalized xyn."""
+        self.step += 1
+        if len(track_ids) == 0:
+            self.evict()
+            return np.empty(0, dtype=np.int64)
+        # Tracks in this frame must not be recycled for newcomers in the same frame
+        for t in track_ids:
+            if t in self.slots:
+                self.last_seen[self.slots[t]] = self.step
+                self.slots.move_to_end(t)
+        slots = np.array([self._slot_for(t) for t in track_ids], dtype=np.int64)
+        new = np.asarray(keypoints, dtype=np.float32)
+        head = self.head[slots]
+        count = self.count[slots]
+        prev = self.buffer[slots, (head - 1) % self.window]
+
+        has_prev = (count > 0)[:, None, None]
+        velocity = np.where(has_prev, new - prev, 0).astype(np.float32)
+        self.acceleration[slots] = np.where((count > 1)[:, None, None], velocity - self.velocity[slots], 0)
+        self.velocity[slots] = velocity
+
+        full = (count >= self.window)[:, None, None]
+        leaving = np.where(full, self.buffer[slots, head], 0).astype(np.float64)
+        self._sum[slots] += new - leaving
+        self._sumsq[slots] += new.astype(np.float64) ** 2 - leaving ** 2
+
+        self.buffer[slots, head] = new
+        self.head[slots] = (head + 1) % self.window
+        self.count[slots] = np.minimum(count + 1, self.window)
+        self.last_seen[slots] = self.step
+        self.evict()
+        return slots
+
+    def features(self, track_ids):
+        """(N, 34 + 136) rows: current pose, velocity, acceleration, windowed mean and std.
+
+        Tracks without a history (not pushed yet, or evicted) get a row of NaN.
+        """
+        known = np.array([t in self.slots for t in track_ids], dtype=bool)
+        if not known.all():
+            out = np.full((len(known), NUM_KEYPOINTS * 2 + len(TEMPORAL_FEATURE_NAMES)), np.nan, dtype=np.float32)
+            out[known] = self.features([t for t, k in zip(track_ids, known) if k])
+            return out
+        slots = np.array([self.slots[t] for t in track_ids], dtype=np.int64)
+        n = len(slots)
+        if n == 0:
+            return np.empty((0, NUM_KEYPOINTS * 2 + len(TEMPORAL_FEATURE_NAMES)), dtype=np.float32)
+        count = np.maximum(self.count[slots], 1)[:, None, None]
+        mean = self._sum[slots] / count
+        var = np.maximum(self._sumsq[slots] / count - mean ** 2, 0.0)
+        current = self.buffer[slots, (self.head[slots] - 1) % self.window]
+        return np.concatenate([
+            current.reshape(n, -1),
+            self.velocity[slots].reshape(n, -1),
+            self.acceleration[slots].reshape(n, -1),
+            mean.reshape(n, -1),
+            np.sqrt(var).reshape(n, -1),
+        ], axis=1).astype(np.float32)
+
+
+def push_tracked(history, r):
+    """Push every tracked person of YOLO result r, whatever their confidence; returns the track ids.
+
+    collect.collect and ShopliftingDetector both push through here, so a history holds the
+    same people in training data and at inference.
+    """
+    if r.boxes.id is None or r.keypoints is None:
+        ids, keypoints = [], np.empty((0, NUM_KEYPOINTS, 2), dtype=np.float32)
+    else:
+        ids, keypoints = [int(t) for t in to_numpy(r.boxes.id).tolist()], to_numpy(r.keypoints.xyn)
+    history.update(ids, keypoints)
+    return ids
+
+
+def temporal_columns(history, track_ids):
+    # Row dicts of the temporal columns, for the collection scripts' CSV rows
+    if len(track_ids) == 0:
+        return []
+    extra = history.features(track_ids)[:, NUM_KEYPOINTS * 2:]
+    return [dict(zip(TEMPORAL_FEATURE_NAMES, row.tolist())) for row in extra]
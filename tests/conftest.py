@@ -0,0 +1,28 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# The modules live at the project root, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def model_path(tmp_path_factory):
+    """A small classifier trained on random keypoints, saved as model.py saves trained_model.json."""
+    xgb = pytest.importorskip("xgboost")
+    rng = np.random.default_rng(0)
+    X = rng.random((256, 34), dtype=np.float32)
+    y = (X[:, 0] + X[:, 21] > 1).astype(int)
+    booster = xgb.train({"objective": "binary:logistic", "tree_method": "hist", "max_depth": 3, "eta": 0.1},
+                        xgb.DMatrix(X, label=y), num_boost_round=50)
+    path = str(tmp_path_factory.mktemp('model') / 'trained_model.json')
+    booster.save_model(path)
+    return path
+
+
+@pytest.fixture
+def detector_module():
+    import detector
+    return detector
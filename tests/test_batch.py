@@ -0,0 +1,63 @@
+import json
+import os
+
+import pytest
+
+from batch import Checkpoint, run
+
+
+def test_fresh_run_keeps_existing_jsonl(tmp_path):
+    out = tmp_path / 'detections.jsonl'
+    out.write_text('{"video": "old.mp4", "frame": 3}\n')
+    with pytest.raises(SystemExit):
+        run([str(tmp_path / 'new.mp4')], str(out))
+    assert out.read_text() == '{"video": "old.mp4", "frame": 3}\n'
+
+
+def test_fresh_run_keeps_existing_parquet_parts(tmp_path):
+    out = tmp_path / 'detections'
+    out.mkdir()
+    (out / 'old-0123456789.parquet').write_bytes(b'PAR1')
+    with pytest.raises(SystemExit):
+        run([str(tmp_path / 'new.mp4')], str(out), fmt='parquet')
+    assert os.listdir(out) == ['old-0123456789.parquet']
+
+
+def test_resumed_run_needs_no_overwrite(tmp_path):
+    video = tmp_path / 'done.mp4'
+    video.write_bytes(b'')
+    out = tmp_path / 'detections.jsonl'
+    out.write_text('{"video": "done.mp4", "frame": 3}\n')
+    checkpoint = Checkpoint(str(out) + '.checkpoint.json', os.path.abspath(out), 'jsonl')
+    checkpoint.mark_done(str(video), {"frames": 10}, offset=out.stat().st_size)
+    totals = run([str(video)], str(out))
+    assert totals["skipped"] == 1
+    assert json.loads(out.read_text())["frame"] == 3
+
+
+@pytest.mark.parametrize("content", [None, '{"video": "done.mp4"'])
+def test_resume_refuses_a_jsonl_shorter_than_its_checkpoint(tmp_path, content):
+    video = tmp_path / 'done.mp4'
+    video.write_bytes(b'')
+    out = tmp_path / 'detections.jsonl'
+    if content is not None:
+        out.write_text(content)
+    checkpoint = Checkpoint(str(out) + '.checkpoint.json', os.path.abspath(out), 'jsonl')
+    checkpoint.mark_done(str(video), {"frames": 10}, offset=100)
+    with pytest.raises(SystemExit, match="--overwrite"):
+        run([str(video), str(tmp_path / 'new.mp4')], str(out))
+    if content is None:
+        assert not out.exists()
+    else:
+        assert out.read_text() == content
+
+
+def test_overwrite_drops_a_checkpoint_its_jsonl_no_longer_matches(tmp_path):
+    video = tmp_path / 'done.mp4'
+    video.write_bytes(b'')
+    out = tmp_path / 'detections.jsonl'
+    checkpoint = Checkpoint(str(out) + '.checkpoint.json', os.path.abspath(out), 'jsonl')
+    checkpoint.mark_done(str(video), {"frames": 10}, offset=100)
+    totals = run([], str(out), overwrite=True)
+    assert totals["skipped"] == 0
+    assert not os.path.exists(checkpoint.path)
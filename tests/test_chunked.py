@@ -0,0 +1,59 @@
+import cv2
+import numpy as np
+import pytest
+
+import chunked
+
+
+class KeyframeSeekCapture:
+    # A capture whose seek lands on the keyframe before the target, every `gop` frames, and
+    # whose POS_FRAMES echoes the requested frame until the next grab, as some backends do
+    def __init__(self, frames, gop=10):
+        self.frames = frames
+        self.gop = gop
+        self.pos = 0
+        self.requested = None
+
+    def set(self, prop, value):
+        self.requested = int(value)
+        self.pos = self.requested // self.gop * self.gop
+        return True
+
+    def get(self, prop):
+        return self.requested if self.requested is not None else self.pos
+
+    def grab(self):
+        self.requested = None
+        if self.pos >= len(self.frames):
+            return False
+        self.pos += 1
+        return True
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return True, self.frames[self.pos - 1]
+
+    def release(self):
+        pass
+
+
+@pytest.mark.parametrize("start", [1, 7, 10, 23])
+def test_open_at_walks_forward_when_the_seek_is_not_exact(monkeypatch, start):
+    frames = [np.full((4, 4, 3), i, dtype=np.uint8) for i in range(30)]
+    monkeypatch.setattr(chunked.cv2, 'VideoCapture', lambda path: KeyframeSeekCapture(frames))
+    ok, frame = chunked.open_at('video.mp4', start).read()
+    assert ok and frame[0, 0, 0] == start
+
+
+def test_open_at_matches_sequential_decode(tmp_path):
+    from benchmarks.synthetic import SyntheticScene
+    video = SyntheticScene(160, 96, people=1).write(str(tmp_path / 'scene.mp4'), 40)
+    cap = cv2.VideoCapture(video)
+    frames = [cap.read()[1] for _ in range(40)]
+    cap.release()
+    for start in (0, 1, 17, 39):
+        cap = chunked.open_at(video, start)
+        ok, frame = cap.read()
+        cap.release()
+        assert ok and np.array_equal(frame, frames[start])
@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import collect_parallel
+from collect_parallel import LEDGER_NAME, merge, shard_path
+from features import FEATURE_NAMES, NUM_KEYPOINTS
+from keypoint_store import KeypointStore
+
+
+def make_shard(out, video, rows):
+    # What _collect_shard leaves behind: crops and their keypoint rows
+    shard = shard_path(out, video)
+    os.makedirs(os.path.join(shard, 'crops'))
+    names = [f'person_nn_{i}.jpg' for i in range(rows)]
+    for name in names:
+        with open(os.path.join(shard, 'crops', name), 'wb') as f:
+            f.write(name.encode())
+    df = pd.DataFrame([[i / 100] * len(FEATURE_NAMES) for i in range(rows)], columns=FEATURE_NAMES)
+    df.insert(0, 'image_name', names)
+    df.to_csv(os.path.join(shard, 'rows.csv'), index=False)
+    KeypointStore(os.path.join(shard, collect_parallel.STORE_NAME)).append({
+        'xy': df[FEATURE_NAMES].to_numpy(np.float32).reshape(rows, NUM_KEYPOINTS, 2),
+        'image_name': np.array(names, dtype=object),
+    })
+
+
+@pytest.fixture
+def entries(tmp_path):
+    out = str(tmp_path / 'out')
+    entries = [{"video": '/videos/a.mp4', "label": 'Normal'}, {"video": '/videos/b.mp4', "label": 'Suspicious'}]
+    make_shard(out, entries[0]["video"], 3)
+    make_shard(out, entries[1]["video"], 2)
+    return out, entries
+
+
+def test_merge_twice_adds_rows_once(entries):
+    out, entries = entries
+    assert merge(entries, out) == 5
+    assert merge(entries, out) == 0
+    df = pd.read_csv(os.path.join(out, 'dataset.csv'))
+    assert len(df) == 5 and list(df['label']) == ['Normal'] * 3 + ['Suspicious'] * 2
+    assert all(os.path.exists(os.path.join(out, label, name)) for name, label in zip(df['image_name'], df['label']))
+    assert not os.path.exists(os.path.join(out, collect_parallel.SHARDS_DIR))
+
+
+@pytest.mark.parametrize('use_store', [False, True])
+def test_merge_interrupted_before_ledger_is_rolled_back(entries, monkeypatch, use_store):
+    out, entries = entries
+    write_json = collect_parallel._write_json
+
+    def crash_on_ledger(path, data):
+        if path.endswith(LEDGER_NAME):
+            raise OSError("disk full")
+        write_json(path, data)
+
+    monkeypatch.setattr(collect_parallel, '_write_json', crash_on_ledger)
+    with pytest.raises(OSError):
+        merge(entries, out, use_store)
+    monkeypatch.setattr(collect_parallel, '_write_json', write_json)
+
+    assert merge(entries, out, use_store) == 5
+    if use_store:
+        names = KeypointStore(os.path.join(out, collect_parallel.STORE_NAME)).read(['image_name'])['image_name']
+    else:
+        names = pd.read_csv(os.path.join(out, 'dataset.csv'))['image_name']
+    assert list(names) == [f'person_nn_{i}.jpg' for i in range(5)]
+    labels = ['Normal'] * 3 + ['Suspicious'] * 2
+    assert all(os.path.exists(os.path.join(out, label, name)) for name, label in zip(names, labels))
+
+
+def test_merge_interrupted_after_ledger_is_finished(entries, monkeypatch):
+    out, entries = entries
+    moves = []
+
+    def crash_on_second_crop(src, dst):
+        if dst.endswith('.jpg'):
+            if moves:
+                raise OSError("killed")
+            moves.append(dst)
+        os.rename(src, dst)
+
+    monkeypatch.setattr(collect_parallel.os, 'replace', crash_on_second_crop)
+    with pytest.raises(OSError):
+        merge(entries, out)
+    monkeypatch.undo()
+
+    assert merge(entries, out) == 0
+    df = pd.read_csv(os.path.join(out, 'dataset.csv'))
+    assert len(df) == 5
+    assert all(os.path.exists(os.path.join(out, label, name)) for name, label in zip(df['image_name'], df['label']))
+    assert not os.path.exists(os.path.join(out, collect_parallel.SHARDS_DIR))
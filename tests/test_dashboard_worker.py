@@ -0,0 +1,77 @@
+import time
+
+import numpy as np
+
+from dashboard_worker import DetectionWorker
+from features import FRAME_SIZE
+
+
+class EndlessCapture:
+    def __init__(self):
+        self.released = False
+
+    def read(self):
+        time.sleep(0.005)
+        return True, np.zeros((60, 80, 3), dtype=np.uint8)
+
+    def release(self):
+        self.released = True
+
+
+class NullWriter:
+    def submit(self, *args):
+        pass
+
+    def stats(self):
+        return {"queued": 0}
+
+    def close(self):
+        pass
+
+
+def test_worker_stops_without_heartbeat():
+    cap = EndlessCapture()
+    worker = DetectionWorker(None, cap, 'test', live=True, writer=NullWriter(), heartbeat_timeout=0.2)
+    # No model: every frame comes back unannotated with nobody in it
+    worker._detect = lambda frame: (frame, 0, [], 0.0)
+    worker.start()
+    deadline = time.monotonic() + 0.5
+    while time.monotonic() < deadline:
+        worker.heartbeat()
+        time.sleep(0.05)
+    assert worker.is_alive()
+    worker.join(2.0)
+    assert not worker.is_alive() and cap.released
+
+
+def test_detect_scores_like_the_detector(model_path):
+    from benchmarks.synthetic import StubPose, SyntheticScene
+    from detector import ShopliftingDetector
+    scene = SyntheticScene(*FRAME_SIZE, people=3)
+    detector = ShopliftingDetector(model_path=model_path, render=False, pose_model=StubPose(scene))
+    worker = DetectionWorker(detector, EndlessCapture(), 'test', live=False, writer=NullWriter(),
+                             sus_threshold=0.5, render=False)
+    frame = scene.frame(0)
+    expected = detector.classify(StubPose(scene)(frame)[0])
+    _, normal, alerts, best = worker._detect(frame)
+    suspicious = [p["prob"] for p in expected if p["prob"] <= 0.5]
+    assert normal == len(expected) - len(suspicious)
+    assert [a["conf"] for a in alerts] == suspicious
+    assert best == max([1.0 - p for p in suspicious], default=0.0)
+
+
+def test_failed_live_read_backs_off_before_reopening(monkeypatch):
+    opened = []
+
+    class DeadCapture(EndlessCapture):
+        def read(self):
+            return False, None
+
+    monkeypatch.setattr('dashboard_worker.cv2.VideoCapture', lambda source: opened.append(source) or DeadCapture())
+    worker = DetectionWorker(None, DeadCapture(), 'rtsp://camera', live=True, writer=NullWriter(),
+                             reconnect_delay=0.1)
+    worker.start()
+    time.sleep(0.35)
+    worker.stop()
+    assert not worker.is_alive()
+    assert 1 <= len(opened) <= 4
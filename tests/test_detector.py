@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+
+class EveryOther:
+    # Motion gate stand-in: pose runs on even frames only
+    def __init__(self):
+        self.frames = 0
+
+    def should_infer(self, frame):
+        self.frames += 1
+        return self.frames % 2 == 1
+
+
+@pytest.fixture
+def detector(detector_module, model_path):
+    from benchmarks.synthetic import SyntheticScene, StubPose
+    scene = SyntheticScene(*detector_module.FRAME_SIZE, people=2)
+    detector = detector_module.ShopliftingDetector(model_path=model_path, render=False, pose_model=StubPose(scene))
+    detector.scene = scene
+    return detector
+
+
+def test_gated_frames_have_no_detections(detector, tmp_path):
+    video = detector.scene.write(str(tmp_path / 'scene.mp4'), 10)
+    # Everyone is suspicious, so every inferred frame reports both people
+    detector.predict_proba = lambda features: np.zeros(len(features), dtype=np.float32)
+    out = [detections for _, detections in detector.process_video(video, gate=EveryOther())]
+    assert len(out) == 10
+    assert all(len(d) == 2 for d in out[0::2])
+    assert all(d == [] for d in out[1::2])
+
+
+def test_gated_frames_age_the_track_cache(detector, tmp_path):
+    from track_cache import TrackCache
+    video = detector.scene.write(str(tmp_path / 'scene.mp4'), 10)
+    detector.model_yolo.track = lambda frame, **kwargs: detector.model_yolo(frame)
+    cache = TrackCache()
+    assert len(list(detector.process_video(video, gate=EveryOther(), cache=cache))) == 10
+    assert cache.frame == 10
+
+
+def test_roi_with_tracking_is_rejected(detector, tmp_path):
+    from roi import RoiCropper
+    from track_cache import TrackCache
+    video = detector.scene.write(str(tmp_path / 'scene.mp4'), 2)
+    with pytest.raises(ValueError):
+        next(detector.process_video(video, roi=RoiCropper([[0, 0, 500, 600]]), cache=TrackCache()))
+
+
+def test_annotate_leaves_the_frame_clean(detector_module, model_path):
+    from benchmarks.synthetic import SyntheticScene, StubPose
+    scene = SyntheticScene(*detector_module.FRAME_SIZE, people=2)
+    detector = detector_module.ShopliftingDetector(model_path=model_path, pose_model=StubPose(scene))
+    frame = scene.frame(0)
+    clean = frame.copy()
+    r = detector.model_yolo(frame)[0]
+    annotated = detector.annotate(r, detector.classify(r))
+    assert (frame == clean).all()
+    assert (annotated != clean).any()
+    # The next frame reuses the same buffer instead of allocating one
+    assert detector.annotate(r, detector.classify(r)) is annotated
+    # Drawing in place is still available to callers that own the frame
+    assert detector.annotate(r, detector.classify(r), out=frame) is frame
+    assert (frame == annotated).all()
@@ -0,0 +1,42 @@
+import json
+import threading
+
+from event_log import EventLog
+
+
+def test_rotation_keeps_files_under_max_bytes(tmp_path):
+    path = str(tmp_path / 'events.jsonl')
+    log = EventLog(path, max_bytes=100, backups=2)
+    # 61 bytes a line once "é" is escaped, so two lines do not fit in one file
+    event = {"label": "é" * 8}
+    log.write([event])
+    log.write([event])
+    log.close()
+    with open(path, 'rb') as f:
+        current = f.read()
+    with open(path + '.1', 'rb') as f:
+        rotated = f.read()
+    assert len(current) <= 100 and len(rotated) <= 100
+    assert json.loads(current) == event and json.loads(rotated) == event
+
+
+def test_threads_can_share_one_log(tmp_path):
+    path = str(tmp_path / 'events.jsonl')
+    log = EventLog(path, max_bytes=2000, backups=50)
+    threads = [threading.Thread(target=lambda: [log.write([{"frame": i}]) for i in range(200)]) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    log.close()
+    lines = []
+    for suffix in [''] + [f'.{i}' for i in range(1, 51)]:
+        try:
+            with open(path + suffix, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            continue
+        assert len(data) <= 2000
+        lines += data.splitlines()
+    assert log.written == 800
+    assert len(lines) == 800 and all(json.loads(line) for line in lines)
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from features import FEATURE_NAMES, NUM_KEYPOINTS, keypoints_to_features
+
+
+def test_row_order_matches_feature_names():
+    kp = np.arange(2 * NUM_KEYPOINTS * 2, dtype=np.float32).reshape(2, NUM_KEYPOINTS, 2)
+    features = keypoints_to_features(kp)
+    assert features.shape == (2, len(FEATURE_NAMES)) and features.dtype == np.float32
+    # x0, y0, x1, y1, ...
+    assert features[1, FEATURE_NAMES.index('y3')] == kp[1, 3, 1]
+
+
+@pytest.mark.parametrize('shape, rows', [((0, NUM_KEYPOINTS, 2), 0), ((0,), 0), ((NUM_KEYPOINTS, 2), 1)])
+def test_empty_and_single_person(shape, rows):
+    assert keypoints_to_features(np.zeros(shape, dtype=np.float32)).shape == (rows, NUM_KEYPOINTS * 2)
+
+
+@pytest.mark.parametrize('shape', [(3, 34), (2, NUM_KEYPOINTS, 3), (1, 2, NUM_KEYPOINTS, 2)])
+def test_other_shapes_are_rejected(shape):
+    with pytest.raises(ValueError):
+        keypoints_to_features(np.zeros(shape, dtype=np.float32))
+
+
+def test_batched_scoring_matches_per_person(model_path):
+    xgb = pytest.importorskip("xgboost")
+    from benchmarks.scoring_parity import per_person_predict
+    booster = xgb.Booster()
+    booster.load_model(model_path)
+    rng = np.random.default_rng(1)
+    features = keypoints_to_features(rng.random((40, NUM_KEYPOINTS, 2), dtype=np.float32))
+    np.testing.assert_array_equal(booster.inplace_predict(features), per_person_predict(booster, features))
+
+
+def test_classify_arrays_matches_per_person(detector_module, model_path):
+    from benchmarks.scoring_parity import per_person_predict
+    detector = detector_module.ShopliftingDetector(model_path=model_path, render=False, pose_model=object())
+    rng = np.random.default_rng(2)
+    xyn = rng.random((6, NUM_KEYPOINTS, 2), dtype=np.float32)
+    conf = np.array([0.9, 0.2, 0.8, 0.7, 0.1, 0.6], dtype=np.float32)
+    persons = detector.classify_arrays(np.zeros((6, 4)), conf, xyn)
+    expected = per_person_predict(detector.model, keypoints_to_features(xyn)[conf > 0.55])
+    np.testing.assert_array_equal([p["prob"] for p in persons], expected)
+    # A lone person whose keypoints lost their person axis
+    (person,) = detector.classify_arrays(np.zeros((1, 4)), [0.9], xyn[0])
+    assert person["prob"] == pytest.approx(float(expected[0]))
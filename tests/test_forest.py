@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from forest import TreeEnsemble
+
+xgb = pytest.importorskip("xgboost")
+
+
+@pytest.fixture(scope='module')
+def booster_path(tmp_path_factory):
+    # Missing keypoints in training too, so the trees learn both default directions
+    rng = np.random.default_rng(0)
+    X = rng.random((400, 34), dtype=np.float32)
+    y = (X[:, 0] + X[:, 21] > 1).astype(int)
+    X[rng.random(X.shape) < 0.2] = np.nan
+    booster = xgb.train({"objective": "binary:logistic", "tree_method": "hist", "max_depth": 3, "eta": 0.3},
+                        xgb.DMatrix(X, label=y), num_boost_round=20)
+    path = str(tmp_path_factory.mktemp('forest') / 'model.json')
+    booster.save_model(path)
+    return path
+
+
+def predictions(path, X):
+    booster = xgb.Booster()
+    booster.load_model(path)
+    return booster.inplace_predict(X), TreeEnsemble.from_json(path).predict(X)
+
+
+def test_matches_xgboost_with_missing_values(booster_path):
+    rng = np.random.default_rng(1)
+    X = rng.random((500, 34), dtype=np.float32)
+    X[rng.random(X.shape) < 0.3] = np.nan
+    X[:5] = np.nan
+    expected, got = predictions(booster_path, X)
+    np.testing.assert_allclose(got, expected, atol=1e-6)
+
+
+def test_matches_xgboost_on_split_thresholds(booster_path):
+    from benchmarks.scoring_parity import forest_edge_cases
+    # Values exactly on every threshold, and NaN in every split feature
+    X = forest_edge_cases(TreeEnsemble.from_json(booster_path), 34)
+    expected, got = predictions(booster_path, X)
+    np.testing.assert_allclose(got, expected, atol=1e-6)
@@ -0,0 +1,60 @@
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def scene_video(tmp_path):
+    from benchmarks.synthetic import SyntheticScene
+    from features import FRAME_SIZE
+    scene = SyntheticScene(*FRAME_SIZE, people=2)
+    return scene, scene.write(str(tmp_path / 'scene.mp4'), 10, fps=25)
+
+
+def test_looping_cameras_reach_their_subscribers(detector_module, model_path, scene_video):
+    from benchmarks.synthetic import StubPose
+    from multicam import MultiCameraRunner
+    scene, video = scene_video
+    detector = detector_module.ShopliftingDetector(model_path=model_path, render=False, pose_model=StubPose(scene))
+    runner = MultiCameraRunner(detector, {"a": video, "b": video}, loop=True)
+    seen = {"a": [], "b": []}
+    lock = threading.Lock()
+
+    def record(camera, frame_idx, annotated_frame, detections):
+        with lock:
+            seen[camera].append((frame_idx, annotated_frame.shape, [d["camera"] for d in detections]))
+
+    for name in seen:
+        runner.subscribe(name, record)
+    runner.run(duration=1.0)
+
+    stats = runner.stats()
+    for name, calls in seen.items():
+        # Ten-frame files at 25 fps: a second of video only gets there by looping
+        assert len(calls) > 10
+        assert max(frame_idx for frame_idx, _, _ in calls) >= 10
+        assert all(shape == (detector_module.FRAME_SIZE[1], detector_module.FRAME_SIZE[0], 3)
+                   for _, shape, _ in calls)
+        assert all(cameras == [name] * len(cameras) for _, _, cameras in calls)
+        assert stats[name]["frames"] == len(calls)
+        assert stats[name]["fps"] > 0 and stats[name]["capture_fps"] > 0
+        assert stats[name]["latency_ms"] > 0
+    assert not any(reader.is_alive() for reader in runner.cameras.values())
+
+
+def test_unannotated_runner_draws_nothing_for_roi_cameras(detector_module, model_path, scene_video):
+    from benchmarks.synthetic import StubPose
+    from multicam import MultiCameraRunner
+    from roi import RoiCropper
+    scene, video = scene_video
+    detector = detector_module.ShopliftingDetector(model_path=model_path, pose_model=StubPose(scene))
+    drawn = []
+    detector.renderer.render = lambda *args, **kwargs: drawn.append(args)
+    runner = MultiCameraRunner(detector, {"full": video, "roi": video}, annotate=False,
+                               rois={"roi": RoiCropper([[0, 0, 600, 600]])})
+    frames = []
+    for name in runner.cameras:
+        runner.subscribe(name, lambda camera, frame_idx, annotated_frame, detections: frames.append(camera))
+    runner.run(duration=0.5)
+    assert "roi" in frames and "full" in frames
+    assert drawn == []
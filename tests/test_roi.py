@@ -0,0 +1,18 @@
+import pytest
+
+
+@pytest.fixture
+def roi(detector_module):
+    import roi
+    return roi
+
+
+def test_regions_outside_the_frame_are_rejected(roi):
+    with pytest.raises(ValueError):
+        roi.RoiCropper([[2000, 0, 2500, 300], [[-50, -50], [-10, -50], [-10, -10]]])
+
+
+def test_partly_visible_region_is_clipped(roi):
+    cropper = roi.RoiCropper([[900, 500, 1400, 900]])
+    assert cropper.crops == [(900, 500, 1018, 600)]
+    assert cropper.imgsz() >= 32
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from collect import collect, iter_samples
+from temporal import TEMPORAL_FEATURE_NAMES, TrackHistory
+
+FPS = 25
+FRAMES = 80
+
+
+class PixelTracker:
+    # Stand-in for YOLO(...).track: one person, track id 1, whose keypoints are read off the
+    # frame's pixels, so both paths get the same pose for the same decoded frame
+    def track(self, frame, **kwargs):
+        h, w = frame.shape[:2]
+        stripes = frame[:h - h % 17, :, 1].reshape(17, -1, w).astype(np.float32)
+        xyn = np.stack([stripes[:, :, :w // 2].mean(axis=(1, 2)), stripes[:, :, w // 2:].mean(axis=(1, 2))],
+                       axis=1)[None] / 255
+        return [SimpleNamespace(
+            orig_img=frame,
+            boxes=SimpleNamespace(xyxy=np.array([[100, 100, 300, 500]], dtype=np.float32),
+                                  conf=np.array([0.9], dtype=np.float32), id=np.array([1])),
+            keypoints=SimpleNamespace(xyn=xyn, xy=xyn * np.array([w, h], dtype=np.float32),
+                                      conf=np.full((1, 17), 0.9, dtype=np.float32)),
+        )]
+
+    def __call__(self, frame, **kwargs):
+        return self.track(frame)
+
+
+@pytest.fixture
+def video(tmp_path):
+    from benchmarks.synthetic import SyntheticScene
+    # The detector's frame size, so its resize leaves the pixels as decoded
+    return SyntheticScene(1018, 600, people=1, seed=3).write(str(tmp_path / 'walk.mp4'), FRAMES, fps=FPS)
+
+
+def test_evicts_least_recently_seen_first():
+    history = TrackHistory(max_tracks=2, evict_after=2)
+    pose = np.zeros((1, 17, 2), dtype=np.float32)
+    history.update([1], pose)
+    history.update([2], pose)
+    history.update([1], pose)
+    # Track 2 is now the oldest and gives up its slot to a newcomer
+    history.update([3], pose)
+    assert list(history.slots) == [1, 3]
+    for _ in range(3):
+        history.update([3], pose)
+    assert list(history.slots) == [3]
+
+
+def test_unknown_tracks_get_nan_rows():
+    history = TrackHistory()
+    history.update([7], np.ones((1, 17, 2), dtype=np.float32))
+    rows = history.features([7, 8])
+    assert np.isfinite(rows[0]).all()
+    assert np.isnan(rows[1]).all()
+
+
+def test_collection_and_inference_features_match(video, tmp_path, detector_module, model_path):
+    # Samples every 700 ms, off the history's grid
+    rows, taken, _ = collect(video, PixelTracker(), None, str(tmp_path / 'crops'), stride_ms=700,
+                             conf_threshold=0.5, temporal_features=True)
+    sample_frames = [frame_index for _, _, frame_index, _ in iter_samples(video, stride_ms=700)]
+    assert len(rows) == taken == len(sample_frames)
+
+    seen = {}
+
+    class Recorder(detector_module.ShopliftingDetector):
+        def detections_for(self, persons, frame_idx):
+            seen[frame_idx] = persons
+            return super().detections_for(persons, frame_idx)
+
+    detector = Recorder(model_path=model_path, render=False, pose_model=PixelTracker())
+    for _ in detector.process_video(video, history=TrackHistory()):
+        pass
+    assert len(seen) == FRAMES
+
+    for row, frame_index in zip(rows, sample_frames):
+        collected = np.array([row[name] for name in TEMPORAL_FEATURE_NAMES], dtype=np.float32)
+        (person,) = seen[frame_index]
+        np.testing.assert_allclose(collected, person["temporal"][34:], rtol=1e-6)
+    # Movement registered, so the comparison covered real velocities
+    assert any(abs(row['vx9']) > 0 for row in rows[1:])
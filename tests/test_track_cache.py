@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from track_cache import TrackCache
+
+
+def predict(features):
+    return features[:, 0].astype(np.float32)
+
+
+def test_empty_frames_age_entries():
+    cache = TrackCache(max_age=5, evict_after=10)
+    pose = np.full((1, 34), 0.5, dtype=np.float32)
+    cache.tick()
+    cache.score([1], pose, predict)
+    for _ in range(5):
+        cache.tick()  # nobody in view
+    cache.tick()
+    cache.score([1], pose, predict)
+    assert cache.misses_stale == 1 and cache.hits == 0
+
+
+def test_empty_frames_evict():
+    cache = TrackCache(evict_after=3)
+    cache.tick()
+    cache.score([1], np.zeros((1, 34), dtype=np.float32), predict)
+    for _ in range(4):
+        cache.tick()
+    assert len(cache) == 0 and cache.evictions == 1
+
+
+def test_classify_ticks_on_frames_without_people(detector_module, model_path):
+    detector = detector_module.ShopliftingDetector(model_path=model_path, render=False, pose_model=object())
+    cache = TrackCache()
+    nobody = SimpleNamespace(boxes=SimpleNamespace(xyxy=np.empty((0, 4)), conf=np.empty(0), id=None), keypoints=None)
+    unsure = SimpleNamespace(
+        boxes=SimpleNamespace(xyxy=np.zeros((1, 4)), conf=np.array([0.1]), id=np.array([4])),
+        keypoints=SimpleNamespace(xyn=np.zeros((1, 17, 2), dtype=np.float32)))
+    assert detector.classify(nobody, cache=cache) == []
+    assert detector.classify(unsure, cache=cache) == []
+    assert cache.frame == 2
@@ -0,0 +1,113 @@
+import base64
+import queue
+import threading
+from collections import OrderedDict
+
+import cv2
+
+
+def make_thumbnail(path, width=320, quality=70):
+    # Base64 JPEG of the image shrunk to `width`; "" if it cannot be read
+    img = cv2.imread(path)
+    if img is None:
+        return ""
+    h, w = img.shape[:2]
+    if w > width:
+        img = cv2.resize(img, (width, max(1, h * width // w)), interpolation=cv2.INTER_AREA)
+    ok, buf = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+    return base64.b64encode(buf.tobytes()).decode() if ok else ""
+
+
+class ThumbnailCache:
+    """LRU of base64 JPEG thumbnails keyed by capture path, bounded by `max_bytes` of strings.
+
+    Thumbnails are made once per path on a background thread. get() never decodes anything:
+    a miss queues the path and returns None, so the caller renders a placeholder and picks
+    the thumbnail up on a later render (`version` changes whenever one is added).
+    """
+
+    def __init__(self, width=320, quality=70, max_bytes=16 * 1024 * 1024):
+        self.width = width
+        self.quality = quality
+        self.max_bytes = max_bytes
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._pending = set()
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, path):
+        with self._lock:
+            if path in self._entries or path in self._pending:
+                return
+            self._pending.add(path)
+        self._queue.put(path)
+
+    def get(self, path):
+        with self._lock:
+            b64 = self._entries.get(path)
+            if b64 is not None:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return b64
+            self.misses += 1
+        self.submit(path)
+        return None
+
+    def wait(self, paths, timeout=2.0):
+        # Queue every path and block until all are cached or the timeout passes
+        for path in paths:
+            self.submit(path)
+        with self._ready:
+            return self._ready.wait_for(lambda: all(p in self._entries for p in paths), timeout)
+
+    def discard(self, path):
+        with self._lock:
+            b64 = self._entries.pop(path, None)
+            if b64 is not None:
+                self._bytes -= len(b64)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _run(self):
+        while True:
+            path = self._queue.get()
+            try:
+                b64 = make_thumbnail(path, self.width, self.quality)
+            except Exception as e:
+                print(f"Thumbnail error: {e}")
+                b64 = ""
+            with self._ready:
+                self._pending.discard(path)
+                self._entries[path] = b64
+                self._bytes += len(b64)
+                while self._bytes > self.max_bytes and len(self._entries) > 1:
+                    _, old = self._entries.popitem(last=False)
+                    self._bytes -= len(old)
+                    self.evictions += 1
+                self.generated += 1
+                self.version += 1
+                self._ready.notify_all()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "pending": len(self._pending),
+                "hits": self.hits,
+                "misses": self.misses,
+                "generated": self.generated,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,89 @@
+import numpy as np
+
+
+class TrackCache:
+    """Per-track memo of the last keypoint vector and classifier score.
+
+    A tracked person is re-scored only when a keypoint coordinate moved more than
+    `tolerance` (xyn units) since it was last scored, or the score is `max_age` frames old.
+    Tracks not seen for `evict_after` frames are dropped. Frames are counted by tick(), once
+    per processed frame, including frames with nobody to score.
+    """
+
+    def __init__(self, tolerance=0.01, max_age=15, evict_after=30):
+        self.tolerance = tolerance
+        self.max_age = max_age
+        self.evict_after = evict_after
+        self.frame = 0
+        # track_id -> [features, prob, scored_at, last_seen]
+        self._entries = {}
+        self.lookups = 0
+        self.hits = 0
+        self.misses_new = 0
+        self.misses_moved = 0
+        self.misses_stale = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def tick(self):
+        """Start the next frame: age every entry and drop tracks gone for too long."""
+        self.frame += 1
+        self._evict()
+
+    def score(self, track_ids, features, predict):
+        """Probabilities for one frame's people; predict(features) is called once for the misses.
+
+        track_ids may contain None or negative ids for people the tracker has not assigned yet;
+        those are always scored and never cached. Call tick() first for every frame.
+        """
+        n = len(features)
+        probs = np.empty(n, dtype=np.float32)
+        miss = []
+        for i in range(n):
+            tid = track_ids[i]
+            if tid is None or tid < 0:
+                miss.append(i)
+                continue
+            self.lookups += 1
+            entry = self._entries.get(tid)
+            if entry is None:
+                self.misses_new += 1
+                miss.append(i)
+            elif self.frame - entry[2] >= self.max_age:
+                self.misses_stale += 1
+                miss.append(i)
+            elif np.abs(features[i] - entry[0]).max() > self.tolerance:
+                self.misses_moved += 1
+                miss.append(i)
+            else:
+                self.hits += 1
+                probs[i] = entry[1]
+                entry[3] = self.frame
+
+        if miss:
+            probs[miss] = predict(features[miss])
+            for i in miss:
+                tid = track_ids[i]
+                if tid is not None and tid >= 0:
+                    self._entries[tid] = [features[i].copy(), float(probs[i]), self.frame, self.frame]
+        return probs
+
+    def _evict(self):
+        gone = [tid for tid, entry in self._entries.items() if self.frame - entry[3] > self.evict_after]
+        for tid in gone:
+            del self._entries[tid]
+        self.evictions += len(gone)
+
+    def stats(self):
+        return {
+            "tracks": len(self._entries),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "misses_new": self.misses_new,
+            "misses_moved": self.misses_moved,
+            "misses_stale": self.misses_stale,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+        }